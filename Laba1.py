@@ -1,25 +1,128 @@
+import atexit
 import json
+import logging
+import os
+import threading
+import time
+import re
 import xml.etree.ElementTree as ET
+from collections.abc import MutableSequence
+from contextlib import ExitStack
+from json.decoder import scanstring
+from xml.parsers import expat
+
+import filecodec
+import metrics
+import search
+
+logger = logging.getLogger("laba1")
 
 # -------------------- Основные классы --------------------
 
+class IdAllocator:
+    """Потокобезопасная выдача целочисленных ID с отметкой максимума по каждому виду сущностей.
+
+    Отметки сохраняются вместе с данными магазина, поэтому после перезапуска
+    новые ID не пересекаются с уже сохраненными.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.high_water = {}
+
+    def next(self, kind):
+        """Выдает следующий ID вида kind ("product", "order", ...)."""
+        with self.lock:
+            value = self.high_water.get(kind, 0) + 1
+            self.high_water[kind] = value
+        return value
+
+    def reserve(self, kind, count):
+        """Резервирует блок из count ID для пакетной вставки и возвращает его как range."""
+        with self.lock:
+            start = self.high_water.get(kind, 0) + 1
+            self.high_water[kind] = start + count - 1
+        return range(start, start + count)
+
+    def observe(self, kind, value):
+        """Поднимает отметку вида до value (для ID, прочитанных из файла)."""
+        with self.lock:
+            if value > self.high_water.get(kind, 0):
+                self.high_water[kind] = value
+
+    def state(self):
+        """Отметки максимума {вид: последний выданный ID} для сохранения."""
+        with self.lock:
+            return dict(self.high_water)
+
+    def restore(self, state):
+        """Учитывает сохраненные отметки (отметки никогда не уменьшаются)."""
+        for kind, value in state.items():
+            self.observe(kind, int(value))
+
+
+ids = IdAllocator()
+
+
+def format_id(kind, value):
+    """Строковое представление ID для файлов: format_id("product", 12) -> "product_12"."""
+    return f"{kind}_{value}"
+
+
+def parse_id(value):
+    """Целый ID из строкового представления ("product_12") или числа."""
+    if isinstance(value, int):
+        return value
+    return int(value.rpartition("_")[2])
+
+
 class Product:
     """Класс, представляющий товар."""
-    next_id = 1
+    __slots__ = ('id', 'name', 'description', 'price', 'stock', 'lock', 'store', 'inventory')
 
-    def __init__(self, name, description, price, stock):
-        self.id = f"product_{Product.next_id}"
-        Product.next_id += 1
+    def __init__(self, name, description, price, stock, id=None):
+        self.id = ids.next("product") if id is None else id
         self.name = name
         self.description = description
         self.price = price
         self.stock = stock
+        self.lock = threading.Lock()
+        self.store = None
+        self.inventory = None
 
     def update_stock(self, quantity):
         """Обновляет количество товара на складе."""
-        if quantity < 0 and abs(quantity) > self.stock:
-            raise ValueError("Недостаточно товара на складе.")
-        self.stock += quantity
+        with self.lock:
+            if quantity < 0 and abs(quantity) > self.stock:
+                raise ValueError("Недостаточно товара на складе.")
+            self.stock += quantity
+        self.record("restock" if quantity > 0 else "adjust", quantity)
+        self.touch()
+
+    def reserve(self, quantity):
+        """Атомарно проверяет остаток и списывает товар со склада."""
+        with self.lock:
+            if self.stock < quantity:
+                raise ValueError(f"Недостаточно товара {self.name} на складе.")
+            self.stock -= quantity
+        self.record("reserve", -quantity)
+        self.touch()
+
+    def release(self, quantity):
+        """Возвращает на склад ранее зарезервированный товар."""
+        with self.lock:
+            self.stock += quantity
+        self.record("release", quantity)
+        self.touch()
+
+    def record(self, op, delta):
+        """Записывает изменение остатка в журнал склада, если товар к нему подключен."""
+        if self.inventory is not None:
+            self.inventory.record(op, self.id, delta)
+
+    def touch(self):
+        """Отмечает товар как измененный для инкрементальной контрольной точки."""
+        if self.store is not None:
+            self.store.mark("products", self.id)
 
     def __repr__(self):
         return f"Product(id={self.id}, name={self.name}, price={self.price}, stock={self.stock})"
@@ -27,21 +130,25 @@ class Product:
 
 class Category:
     """Класс, представляющий категорию товаров."""
-    next_id = 1
+    __slots__ = ('id', 'name', 'products', 'store')
 
-    def __init__(self, name):
-        self.id = f"category_{Category.next_id}"
-        Category.next_id += 1
+    def __init__(self, name, id=None):
+        self.id = ids.next("category") if id is None else id
         self.name = name
-        self.products = []
+        self.products = {}
+        self.store = None
 
     def add_product(self, product):
         """Добавляет товар в категорию."""
-        self.products.append(product)
+        self.products[product.id] = product
+        if self.store is not None:
+            self.store.index_product(product, self)
 
     def remove_product(self, product_id):
         """Удаляет товар из категории по ID."""
-        self.products = [product for product in self.products if product.id != product_id]
+        self.products.pop(product_id, None)
+        if self.store is not None:
+            self.store.unindex_product(product_id)
 
     def __repr__(self):
         return f"Category(id={self.id}, name={self.name}, products={len(self.products)})"
@@ -49,23 +156,20 @@ class Category:
 
 class Admin:
     """Класс, представляющий администратора."""
-    next_id = 1
 
-    def __init__(self, username):
-        self.id = f"admin_{Admin.next_id}"
-        Admin.next_id += 1
+    def __init__(self, username, id=None):
+        self.id = ids.next("admin") if id is None else id
         self.username = username
 
-    def add_category(self, name, categories):
-        """Создает новую категорию и добавляет ее в список категорий."""
+    def add_category(self, name, store):
+        """Создает новую категорию и добавляет ее в хранилище."""
         category = Category(name)
-        categories.append(category)
+        store.add_category(category)
         return category
 
-    def remove_category(self, category_id, categories):
+    def remove_category(self, category_id, store):
         """Удаляет категорию по ID."""
-        categories = [category for category in categories if category.id != category_id]
-        return categories
+        return store.remove_category(category_id)
 
     def add_product(self, category, name, description, price, stock):
         """Добавляет новый товар в категорию."""
@@ -73,6 +177,17 @@ class Admin:
         category.add_product(product)
         return product
 
+    def add_products(self, category, rows):
+        """Добавляет пачку товаров (name, description, price, stock) с одним резервированием ID."""
+        rows = list(rows)
+        products = [
+            Product(name, description, price, stock, id=product_id)
+            for product_id, (name, description, price, stock) in zip(ids.reserve("product", len(rows)), rows)
+        ]
+        for product in products:
+            category.add_product(product)
+        return products
+
     def remove_product(self, category, product_id):
         """Удаляет товар по ID из категории."""
         category.remove_product(product_id)
@@ -83,25 +198,93 @@ class Admin:
 
 class Customer:
     """Класс, представляющий покупателя."""
-    next_id = 1
+    __slots__ = ('id', 'name', 'email', 'orders', 'store')
 
-    def __init__(self, name, email):
-        self.id = f"customer_{Customer.next_id}"
-        Customer.next_id += 1
+    def __init__(self, name, email, id=None):
+        self.id = ids.next("customer") if id is None else id
         self.name = name
         self.email = email
-        self.orders = []
+        self.orders = CustomerOrders()
+        self.store = None
 
     def place_order(self, order):
         """Добавляет заказ в список заказов покупателя."""
         self.orders.append(order)
+        if self.store is not None:
+            self.store.index_order(order)
 
     def __repr__(self):
         return f"Customer(id={self.id}, name={self.name}, email={self.email})"
 
 
+class CustomerOrders(MutableSequence):
+    """Заказы покупателя в порядке оформления с индексом по ID заказа.
+
+    Добавление, удаление заказа (remove/discard), проверка вхождения и
+    обращение к первому и последнему заказу выполняются за O(1); доступ
+    и вставка по произвольной позиции перестраивают индекс за O(n).
+    """
+    __slots__ = ('by_id',)
+
+    def __init__(self, orders=()):
+        self.by_id = {order.id: order for order in orders}
+
+    def __getitem__(self, index):
+        if self.by_id and index == 0:
+            return next(iter(self.by_id.values()))
+        if self.by_id and index == -1:
+            return next(reversed(self.by_id.values()))
+        return list(self.by_id.values())[index]
+
+    def __setitem__(self, index, value):
+        orders = list(self.by_id.values())
+        orders[index] = value
+        self.by_id = {order.id: order for order in orders}
+
+    def __delitem__(self, index):
+        orders = list(self.by_id.values())
+        del orders[index]
+        self.by_id = {order.id: order for order in orders}
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def __reversed__(self):
+        return reversed(self.by_id.values())
+
+    def __contains__(self, order):
+        return self.by_id.get(order.id) is order
+
+    def insert(self, index, value):
+        if index >= len(self.by_id):
+            self.append(value)
+        else:
+            orders = list(self.by_id.values())
+            orders.insert(index, value)
+            self.by_id = {order.id: order for order in orders}
+
+    def append(self, order):
+        self.by_id[order.id] = order
+
+    def remove(self, order):
+        if order not in self:
+            raise ValueError(f"Заказ {order.id} не принадлежит покупателю.")
+        del self.by_id[order.id]
+
+    def discard(self, order_id):
+        """Удаляет заказ по ID, если он есть."""
+        self.by_id.pop(order_id, None)
+
+    def __repr__(self):
+        return repr(list(self.by_id.values()))
+
+
 class OrderItem:
     """Класс, представляющий элемент заказа."""
+    __slots__ = ('product', 'quantity', 'total_price')
     def __init__(self, product, quantity):
         if quantity <= 0:
             raise ValueError("Количество должно быть положительным числом.")
@@ -115,37 +298,121 @@ class OrderItem:
 
 class Order:
     """Класс, представляющий заказ."""
-    next_id = 1
+    __slots__ = ('id', 'customer', 'items', 'status', 'total', 'coupon', 'discount', 'lock')
 
-    def __init__(self, customer):
-        self.id = f"order_{Order.next_id}"
-        Order.next_id += 1
+    def __init__(self, customer, id=None):
+        self.id = ids.next("order") if id is None else id
         self.customer = customer
         self.items = []
         self.status = "Pending"
+        self.total = 0
+        self.coupon = None
+        self.discount = 0
+        self.lock = threading.Lock()
 
     def add_item(self, product, quantity):
         """Добавляет товар в заказ."""
-        if product.stock < quantity:
-            raise ValueError(f"Недостаточно товара {product.name} на складе.")
-        product.update_stock(-quantity)
-        self.items.append(OrderItem(product, quantity))
+        item = OrderItem(product, quantity)
+        product.reserve(quantity)
+        with self.lock:
+            self.items.append(item)
+            self.total += item.total_price
+        self.touch()
+
+    def restore_item(self, product, quantity):
+        """Добавляет позицию из сохраненных данных без списания со склада."""
+        item = OrderItem(product, quantity)
+        with self.lock:
+            self.items.append(item)
+            self.total += item.total_price
+        self.touch()
+
+    def remove_item(self, product_id):
+        """Удаляет товар из заказа и возвращает его на склад."""
+        with self.lock:
+            removed = [item for item in self.items if item.product.id == product_id]
+            if not removed:
+                return False
+            self.items = [item for item in self.items if item.product.id != product_id]
+            self.total = sum(item.total_price for item in self.items)
+        for item in removed:
+            item.product.release(item.quantity)
+        self.touch()
+        return True
+
+    def add_items(self, items):
+        """Добавляет в заказ несколько товаров: либо все, либо ни одного.
+
+        Блокировки товаров захватываются в порядке их ID, поэтому
+        параллельные заказы не могут взаимно заблокироваться.
+        """
+        order_items = [OrderItem(product, quantity) for product, quantity in items]
+        products = {}
+        quantities = {}
+        for item in order_items:
+            products[item.product.id] = item.product
+            quantities[item.product.id] = quantities.get(item.product.id, 0) + item.quantity
+
+        with ExitStack() as stack:
+            for product_id in sorted(products):
+                stack.enter_context(products[product_id].lock)
+            for product_id, product in products.items():
+                if product.stock < quantities[product_id]:
+                    raise ValueError(f"Недостаточно товара {product.name} на складе.")
+            for product_id, product in products.items():
+                product.stock -= quantities[product_id]
+        for product_id, product in products.items():
+            product.record("reserve", -quantities[product_id])
+            product.touch()
+
+        with self.lock:
+            self.items.extend(order_items)
+            self.total += sum(item.total_price for item in order_items)
+        self.touch()
+
+    def touch(self):
+        """Отмечает заказ как измененный для инкрементальной контрольной точки."""
+        store = self.customer.store
+        if store is not None:
+            store.mark("orders", self.id)
 
     def calculate_total(self):
-        """Вычисляет общую сумму заказа."""
-        return sum(item.total_price for item in self.items)
+        """Пересчитывает общую сумму заказа по всем позициям."""
+        with self.lock:
+            self.total = sum(item.total_price for item in self.items)
+            return self.total
+
+    def set_discount(self, coupon_code, discount):
+        """Запоминает купон и сумму скидки; возвращает False, если купон уже применен.
+
+        Скидка фиксируется в момент применения и не пересчитывается при чтении.
+        """
+        with self.lock:
+            if self.coupon is not None:
+                return False
+            self.coupon = coupon_code
+            self.discount = min(discount, self.total)
+        self.touch()
+        return True
+
+    @property
+    def total_due(self):
+        """Сумма к оплате с учетом скидки."""
+        return max(self.total - self.discount, 0)
 
     def __repr__(self):
-        return f"Order(id={self.id}, customer={self.customer.name}, total={self.calculate_total()}, status={self.status})"
+        if self.coupon is not None:
+            return (f"Order(id={self.id}, customer={self.customer.name}, total={self.total}, "
+                    f"discount={self.discount}, coupon={self.coupon}, status={self.status})")
+        return f"Order(id={self.id}, customer={self.customer.name}, total={self.total}, status={self.status})"
 
 
 class Feedback:
     """Класс для отзывов покупателей."""
-    next_id = 1
+    __slots__ = ('id', 'customer', 'product', 'comment')
 
-    def __init__(self, customer, product, comment):
-        self.id = f"feedback_{Feedback.next_id}"
-        Feedback.next_id += 1
+    def __init__(self, customer, product, comment, id=None):
+        self.id = ids.next("feedback") if id is None else id
         self.customer = customer
         self.product = product
         self.comment = comment
@@ -158,219 +425,1532 @@ class Wishlist:
     """Класс для списка желаемых товаров."""
     def __init__(self, customer):
         self.customer = customer
-        self.products = []
+        self.products = {}
 
     def add_product(self, product):
         """Добавляет товар в список желаемых товаров."""
-        self.products.append(product)
+        self.products[product.id] = product
 
     def remove_product(self, product_id):
         """Удаляет товар из списка желаемых товаров по ID."""
-        self.products = [product for product in self.products if product.id != product_id]
+        self.products.pop(product_id, None)
 
     def __repr__(self):
         return f"Wishlist(customer={self.customer.name}, products={len(self.products)})"
 
 
 class Coupon:
-    """Класс для купонов на скидку."""
-    def __init__(self, code, discount_percentage, active=True):
+    """Класс для купонов на скидку.
+
+    Купон действует с valid_from по valid_until (время в секундах time.time(),
+    None — без ограничения) и может быть использован не более max_uses раз
+    (None — без ограничения). Использования списываются под блокировкой
+    купона, поэтому параллельные применения не превышают лимит.
+    """
+    __slots__ = ('code', 'discount_percentage', 'active', 'valid_from', 'valid_until',
+                 'max_uses', 'uses', 'lock', 'store')
+
+    def __init__(self, code, discount_percentage, active=True, valid_from=None, valid_until=None,
+                 max_uses=None, uses=0):
+        if not 0 < discount_percentage <= 100:
+            raise ValueError("Скидка должна быть от 0 до 100 процентов.")
         self.code = code
         self.discount_percentage = discount_percentage
         self.active = active
-
-    def apply_coupon(self, order):
-        """Применяет купон к заказу."""
-        if not self.active:
-            raise ValueError("Купон неактивен.")
-        discount = order.calculate_total() * (self.discount_percentage / 100)
-        print(f"Скидка применена: {discount} руб.")
-        return order.calculate_total() - discount
+        self.valid_from = valid_from
+        self.valid_until = valid_until
+        self.max_uses = max_uses
+        self.uses = uses
+        self.lock = threading.Lock()
+        self.store = None
+
+    def is_valid(self, now=None):
+        """Проверяет, что купон активен, действует в момент now и не исчерпан."""
+        now = time.time() if now is None else now
+        return (self.active
+                and (self.valid_from is None or now >= self.valid_from)
+                and (self.valid_until is None or now <= self.valid_until)
+                and (self.max_uses is None or self.uses < self.max_uses))
+
+    def claim(self, count=1, now=None):
+        """Атомарно списывает до count использований; возвращает, сколько списано.
+
+        Неактивный или просроченный купон вызывает ValueError.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            if not self.active:
+                raise ValueError("Купон неактивен.")
+            if ((self.valid_from is not None and now < self.valid_from)
+                    or (self.valid_until is not None and now > self.valid_until)):
+                raise ValueError("Срок действия купона истек или еще не начался.")
+            if self.max_uses is not None:
+                count = min(count, self.max_uses - self.uses)
+            if count > 0:
+                self.uses += count
+        if count > 0:
+            self.touch()
+        return max(count, 0)
+
+    def release(self, count=1):
+        """Возвращает неиспользованные использования (если заказ не удалось изменить)."""
+        if count > 0:
+            with self.lock:
+                self.uses -= count
+            self.touch()
+
+    def discount_for(self, total):
+        """Сумма скидки для суммы заказа total."""
+        return total * self.discount_percentage / 100
+
+    def apply_coupon(self, order, now=None):
+        """Применяет купон к заказу и возвращает сумму к оплате."""
+        if not self.claim(1, now):
+            raise ValueError("Лимит использований купона исчерпан.")
+        if not order.set_discount(self.code, self.discount_for(order.total)):
+            self.release(1)
+            raise ValueError(f"К заказу {order.id} уже применен купон.")
+        logger.debug("Скидка по купону %s применена к заказу %s: %s руб.", self.code, order.id, order.discount)
+        return order.total_due
+
+    def apply_to_orders(self, orders, now=None):
+        """Применяет купон к пачке заказов за один проход; возвращает список измененных заказов.
+
+        Подходят заказы в статусе Pending без купона и с ненулевой суммой.
+        Использования списываются одним блоком: при лимите купон получают
+        первые по порядку заказы, не вошедшие в лимит остаются без скидки.
+        """
+        eligible = [order for order in orders
+                    if order.coupon is None and order.status == "Pending" and order.total > 0]
+        granted = self.claim(len(eligible), now)
+        rate = self.discount_percentage / 100
+        applied = []
+        for order in eligible:
+            if len(applied) == granted:
+                break
+            if order.set_discount(self.code, order.total * rate):
+                applied.append(order)
+        # Заказы, которым купон успели назначить параллельно, не расходуют лимит
+        self.release(granted - len(applied))
+        logger.debug("Купон %s применен к %d заказам из %d", self.code, len(applied), len(eligible))
+        return applied
+
+    def touch(self):
+        """Отмечает купон как измененный для инкрементальной контрольной точки."""
+        if self.store is not None:
+            self.store.mark("coupons", self.code)
 
     def __repr__(self):
-        return f"Coupon(code={self.code}, discount={self.discount_percentage}%)"
+        return f"Coupon(code={self.code}, discount={self.discount_percentage}%, uses={self.uses}/{self.max_uses})"
 
 
 class Inventory:
-    """Класс для управления инвентарем товаров."""
-    def __init__(self):
+    """Журнал движения товаров на складе (event sourcing).
+
+    Каждое изменение остатка дописывается в журнал событием
+    {"seq", "op", "product_id", "delta", "time"}: op — "reserve" (списание
+    в заказ), "release" (возврат из заказа), "restock" (пополнение) или
+    "adjust" (ручная корректировка). Пакет изменений — одно событие со
+    списком items [[product_id, delta], ...]: так записываются пакетное
+    пополнение и начальные остатки ("open") подключаемых товаров.
+
+    Текущий остаток — материализованное представление журнала: он
+    поддерживается в Product.stock и в словаре levels, поэтому чтение
+    остатка — O(1). С filename журнал пишется в файл JSON Lines, и каждые
+    snapshot_every событий остатки вместе с позицией в журнале
+    сохраняются в снимок filename + ".snapshot"; restore() загружает
+    снимок и проигрывает только события после него. Без filename события
+    хранятся в памяти.
+    """
+    def __init__(self, filename=None, snapshot_every=10000):
         self.products = {}
+        self.levels = {}
+        self.filename = filename
+        self.snapshot_filename = None if filename is None else filename + ".snapshot"
+        self.snapshot_every = snapshot_every
+        self.sequence = 0
+        self.since_snapshot = 0
+        self.events = []
+        self.file = None if filename is None else open(filename, "ab")
+        self.lock = threading.Lock()
+
+    @classmethod
+    @metrics.timed("laba1.inventory_restore")
+    def restore(cls, filename, snapshot_every=10000):
+        """Восстанавливает остатки из журнала: последний снимок и события после него."""
+        levels, sequence, offset = {}, 0, 0
+        try:
+            with open(filename + ".snapshot", "r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except FileNotFoundError:
+            snapshot = None
+        size = os.path.getsize(filename) if os.path.exists(filename) else 0
+        # Снимок от другого (например, очищенного) журнала не годится
+        if snapshot is not None and snapshot["offset"] <= size:
+            levels = {int(product_id): stock for product_id, stock in snapshot["stock"].items()}
+            sequence, offset = snapshot["sequence"], snapshot["offset"]
+
+        replayed = 0
+        if size > offset:
+            with open(filename, "r+b") as file:
+                file.seek(offset)
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        break  # Недописанное событие после сбоя
+                    event = json.loads(line)
+                    apply_inventory_event(levels, event)
+                    sequence = event["seq"]
+                    offset += len(line)
+                    replayed += 1
+                    metrics.count(1, len(line))
+                # Обрезаем недописанный хвост, чтобы новые события начинались с новой строки
+                file.truncate(offset)
+
+        inventory = cls(filename, snapshot_every)
+        inventory.levels = levels
+        inventory.sequence = sequence
+        inventory.since_snapshot = replayed
+        logger.debug("Журнал склада %s: восстановлено %d товаров, проиграно %d событий",
+                     filename, len(levels), replayed)
+        return inventory
+
+    def attach(self, store):
+        """Подключает журнал к товарам магазина и подписывается на изменения каталога.
+
+        Товарам, уже учтенным в журнале, остаток выставляется по журналу;
+        начальные остатки новых товаров записываются одним событием "open".
+        """
+        store.add_listener(self)
+        self.add_products(store.products.values())
 
     def add_product(self, product):
         """Добавляет товар в инвентарь."""
-        self.products[product.id] = product
+        self.add_products([product])
+
+    def add_products(self, products):
+        opening = []
+        with self.lock:
+            for product in products:
+                self.products[product.id] = product
+                product.inventory = self
+                level = self.levels.get(product.id)
+                if level is None:
+                    opening.append([product.id, product.stock])
+                else:
+                    product.stock = level
+            if opening:
+                self.commit({"op": "open", "items": opening})
+
+    def product_added(self, product, category):
+        self.add_product(product)
+
+    def product_removed(self, product_id):
+        """Товар перестает отслеживаться; его история остается в журнале."""
+        product = self.products.pop(product_id, None)
+        if product is not None:
+            product.inventory = None
 
     def get_product(self, product_id):
         """Получает товар по ID."""
         return self.products.get(product_id)
 
+    def require_product(self, product_id):
+        product = self.products.get(product_id)
+        if product is None:
+            raise ValueError(f"Товар {product_id} не найден.")
+        return product
+
+    def stock(self, product_id):
+        """Текущий остаток товара по журналу (None для неизвестного товара)."""
+        return self.levels.get(product_id)
+
+    def reserve(self, product_id, quantity):
+        """Списывает товар со склада в заказ."""
+        self.require_product(product_id).reserve(quantity)
+
+    def release(self, product_id, quantity):
+        """Возвращает товар на склад."""
+        self.require_product(product_id).release(quantity)
+
+    def restock(self, product_id, quantity):
+        """Пополняет остаток товара."""
+        if quantity <= 0:
+            raise ValueError("Количество должно быть положительным числом.")
+        self.require_product(product_id).update_stock(quantity)
+
     def update_product(self, product_id, stock):
         """Обновляет количество товара по ID."""
-        if product_id in self.products:
-            self.products[product_id].update_stock(stock)
+        self.require_product(product_id).update_stock(stock)
+
+    @metrics.timed("laba1.inventory_restock")
+    def restock_many(self, rows):
+        """Пополняет склад пачкой (product_id, quantity) за один шаг.
+
+        Пачка проверяется целиком до изменений, остатки меняются под
+        блокировками товаров (в порядке ID, как в Order.add_items), а в
+        журнал пишется одно событие "restock" со всеми позициями.
+        """
+        quantities = {}
+        for product_id, quantity in rows:
+            if quantity <= 0:
+                raise ValueError("Количество должно быть положительным числом.")
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        products = {product_id: self.require_product(product_id) for product_id in quantities}
+        if not products:
+            return 0
+
+        with ExitStack() as stack:
+            for product_id in sorted(products):
+                stack.enter_context(products[product_id].lock)
+            for product_id, product in products.items():
+                product.stock += quantities[product_id]
+        with self.lock:
+            self.commit({"op": "restock", "items": [[product_id, quantities[product_id]]
+                                                    for product_id in sorted(quantities)]})
+        for product in products.values():
+            product.touch()
+        metrics.count(len(products))
+        return len(products)
+
+    def record(self, op, product_id, delta):
+        """Дописывает событие об изменении остатка одного товара."""
+        with self.lock:
+            self.commit({"op": op, "product_id": product_id, "delta": delta})
+
+    def commit(self, event):
+        """Нумерует событие, применяет его к остаткам и дописывает в журнал (под self.lock)."""
+        self.sequence += 1
+        event["seq"] = self.sequence
+        event["time"] = time.time()
+        apply_inventory_event(self.levels, event)
+        if self.file is None:
+            self.events.append(event)
+            return
+        self.file.write(json.dumps(event).encode("utf-8") + b"\n")
+        self.file.flush()
+        self.since_snapshot += 1
+        if self.since_snapshot >= self.snapshot_every:
+            self.write_snapshot()
+
+    def snapshot(self):
+        """Сохраняет снимок остатков сейчас (без ожидания snapshot_every событий)."""
+        if self.file is not None:
+            with self.lock:
+                self.write_snapshot()
+
+    @metrics.timed("laba1.inventory_snapshot")
+    def write_snapshot(self):
+        os.fsync(self.file.fileno())
+        snapshot = {"sequence": self.sequence, "offset": self.file.tell(), "stock": self.levels}
+        tmp_filename = self.snapshot_filename + ".tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as file:
+            json.dump(snapshot, file)
+        os.replace(tmp_filename, self.snapshot_filename)
+        self.since_snapshot = 0
+
+    def history(self, product_id=None):
+        """События журнала по порядку; с product_id — только затрагивающие этот товар."""
+        if self.file is None:
+            events = list(self.events)
         else:
-            print("Товар не найден.")
+            with self.lock:
+                self.file.flush()
+            with open(self.filename, "rb") as file:
+                events = [json.loads(line) for line in file if line.endswith(b"\n")]
+        if product_id is None:
+            return events
+        return [event for event in events
+                if event.get("product_id") == product_id
+                or any(item[0] == product_id for item in event.get("items", ()))]
+
+    def close(self):
+        """Сохраняет снимок и закрывает файл журнала."""
+        if self.file is not None:
+            self.snapshot()
+            self.file.close()
+            self.file = None
+
+    def __repr__(self):
+        return f"Inventory(products={len(self.products)}, events={self.sequence})"
+
+
+def apply_inventory_event(levels, event):
+    """Применяет событие журнала склада к словарю остатков {product_id: stock}."""
+    items = event.get("items")
+    if items is None:
+        items = ((event["product_id"], event["delta"]),)
+    for product_id, delta in items:
+        levels[product_id] = levels.get(product_id, 0) + delta
+
+
+# Виды изменений, которые отслеживает Store для инкрементальных контрольных точек
+DIRTY_KINDS = ("categories", "products", "customers", "orders", "coupons",
+               "removed_categories", "removed_products", "removed_customers", "removed_orders",
+               "removed_coupons")
+
+
+class Store:
+    """Хранилище магазина с хеш-индексами по ID для быстрого поиска."""
+    def __init__(self):
+        self.categories = {}
+        self.customers = {}
+        self.products = {}
+        self.product_categories = {}
+        self.customers_by_email = {}
+        self.orders = {}
+        self.coupons = {}
+        self.dirty = self.new_dirty()
+        self.checkpoint = 0
+        self.listeners = []
+        self.lazy_orders = []
+
+    def new_dirty(self):
+        return {kind: set() for kind in DIRTY_KINDS}
+
+    def mark(self, kind, entity_id):
+        """Отмечает сущность как измененную (kind — ключ из DIRTY_KINDS)."""
+        self.dirty[kind].add(entity_id)
+
+    def take_dirty(self):
+        """Возвращает накопленные изменения и начинает отслеживание заново."""
+        dirty = self.dirty
+        self.dirty = self.new_dirty()
+        return dirty
+
+    def clear_dirty(self):
+        self.dirty = self.new_dirty()
+
+    def sync_ids(self):
+        """Поднимает отметки выдачи ID до максимальных ID в хранилище (после загрузки)."""
+        for kind, index in (("category", self.categories), ("product", self.products),
+                            ("customer", self.customers), ("order", self.orders)):
+            ids.observe(kind, max(index, default=0))
+
+    def add_listener(self, listener):
+        """Подписывает наблюдателя (например, поисковый индекс) на изменения каталога.
+
+        У наблюдателя вызываются product_added(product, category) и product_removed(product_id).
+        """
+        self.listeners.append(listener)
+
+    def add_category(self, category):
+        """Добавляет категорию и индексирует ее товары."""
+        category.store = self
+        self.categories[category.id] = category
+        self.mark("categories", category.id)
+        for product in category.products.values():
+            self.index_product(product, category)
+
+    def remove_category(self, category_id):
+        """Удаляет категорию по ID вместе с ее товарами из индексов."""
+        category = self.categories.pop(category_id, None)
+        if category is None:
+            return None
+        for product_id in category.products:
+            self.unindex_product(product_id)
+        category.store = None
+        self.mark("removed_categories", category_id)
+        return category
+
+    def index_product(self, product, category):
+        """Добавляет товар в индексы."""
+        product.store = self
+        self.products[product.id] = product
+        self.product_categories[product.id] = category
+        self.mark("products", product.id)
+        for listener in self.listeners:
+            listener.product_added(product, category)
+
+    def unindex_product(self, product_id):
+        """Удаляет товар из индексов."""
+        product = self.products.pop(product_id, None)
+        if product is not None:
+            product.store = None
+        self.product_categories.pop(product_id, None)
+        self.mark("removed_products", product_id)
+        for listener in self.listeners:
+            listener.product_removed(product_id)
+
+    def get_product(self, product_id):
+        """Получает товар по ID."""
+        return self.products.get(product_id)
+
+    def get_product_category(self, product_id):
+        """Получает категорию товара по ID товара."""
+        return self.product_categories.get(product_id)
+
+    def remove_product(self, product_id):
+        """Удаляет товар по ID из его категории."""
+        category = self.product_categories.get(product_id)
+        if category is None:
+            return None
+        product = category.products[product_id]
+        category.remove_product(product_id)
+        return product
+
+    def add_customer(self, customer):
+        """Добавляет покупателя и индексирует его заказы."""
+        customer.store = self
+        self.customers[customer.id] = customer
+        self.customers_by_email[customer.email] = customer
+        self.mark("customers", customer.id)
+        for order in customer.orders:
+            self.index_order(order)
+
+    def remove_customer(self, customer_id):
+        """Удаляет покупателя по ID вместе с его заказами из индексов."""
+        customer = self.customers.pop(customer_id, None)
+        if customer is None:
+            return None
+        if self.customers_by_email.get(customer.email) is customer:
+            del self.customers_by_email[customer.email]
+        for order in customer.orders:
+            self.orders.pop(order.id, None)
+            self.mark("removed_orders", order.id)
+        customer.store = None
+        self.mark("removed_customers", customer_id)
+        return customer
+
+    def get_customer(self, customer_id):
+        """Получает покупателя по ID."""
+        return self.customers.get(customer_id)
+
+    def find_customer_by_email(self, email):
+        """Получает покупателя по email."""
+        return self.customers_by_email.get(email)
+
+    def index_order(self, order):
+        """Добавляет заказ в индекс."""
+        self.orders[order.id] = order
+        self.mark("orders", order.id)
+
+    def get_order(self, order_id):
+        """Получает заказ по ID (при ленивой загрузке при необходимости дочитывает заказы)."""
+        order = self.orders.get(order_id)
+        if order is None and self.lazy_orders:
+            self.hydrate()
+            order = self.orders.get(order_id)
+        return order
+
+    def hydrate(self):
+        """Загружает все еще не прочитанные истории заказов (после ленивой загрузки)."""
+        pending, self.lazy_orders = self.lazy_orders, []
+        for orders in pending:
+            orders.load()
+
+    def remove_order(self, order_id):
+        """Удаляет заказ по ID."""
+        order = self.orders.pop(order_id, None)
+        if order is not None:
+            order.customer.orders.discard(order_id)
+            self.mark("removed_orders", order_id)
+        return order
+
+    def add_coupon(self, coupon):
+        """Добавляет купон в индекс по коду."""
+        coupon.store = self
+        self.coupons[coupon.code] = coupon
+        self.mark("coupons", coupon.code)
+
+    def get_coupon(self, code):
+        """Получает купон по коду."""
+        return self.coupons.get(code)
+
+    def remove_coupon(self, code):
+        """Удаляет купон по коду (уже примененные скидки остаются на заказах)."""
+        coupon = self.coupons.pop(code, None)
+        if coupon is not None:
+            coupon.store = None
+            self.mark("removed_coupons", code)
+        return coupon
+
+    def pending_orders(self):
+        """Заказы в статусе Pending (при ленивой загрузке дочитывает все заказы)."""
+        self.hydrate()
+        return [order for order in self.orders.values() if order.status == "Pending"]
+
+    def apply_to_orders(self, code, orders=None, now=None):
+        """Применяет купон по коду к заказам, по умолчанию ко всем заказам в статусе Pending.
+
+        Возвращает список заказов, получивших скидку.
+        """
+        coupon = self.coupons.get(code)
+        if coupon is None:
+            raise ValueError(f"Купон {code} не найден.")
+        if orders is None:
+            orders = self.pending_orders()
+        return coupon.apply_to_orders(orders, now)
 
     def __repr__(self):
-        return f"Inventory(products={len(self.products)})"
+        return (f"Store(categories={len(self.categories)}, products={len(self.products)}, "
+                f"customers={len(self.customers)}, orders={len(self.orders)}, coupons={len(self.coupons)})")
 
 
 # -------------------- Функции для работы с файлами --------------------
 
-def save_to_json(categories, customers, filename="store_data.json"):
-    """Сохраняет данные в JSON-файл."""
+def order_fields(order):
+    """Данные заказа для сохранения; купон и скидка пишутся только при наличии."""
     data = {
+        "id": format_id("order", order.id),
+        "items": [
+            {"product_id": format_id("product", item.product.id), "quantity": item.quantity}
+            for item in order.items
+        ],
+        "status": order.status,
+        "total_price": order.total
+    }
+    if order.coupon is not None:
+        data["coupon"] = order.coupon
+        data["discount"] = order.discount
+    return data
+
+
+def coupon_fields(coupon):
+    """Данные купона для сохранения."""
+    return {
+        "code": coupon.code,
+        "discount_percentage": coupon.discount_percentage,
+        "active": coupon.active,
+        "valid_from": coupon.valid_from,
+        "valid_until": coupon.valid_until,
+        "max_uses": coupon.max_uses,
+        "uses": coupon.uses
+    }
+
+
+def store_data(categories, customers, coupons=()):
+    """Снимает копию данных магазина из простых значений для сохранения."""
+    return {
+        "ids": ids.state(),
+        "coupons": [coupon_fields(coupon) for coupon in coupons],
         "categories": [
             {
-                "id": category.id,
+                "id": format_id("category", category.id),
                 "name": category.name,
                 "products": [
                     {
-                        "id": product.id,
+                        "id": format_id("product", product.id),
                         "name": product.name,
                         "description": product.description,
                         "price": product.price,
                         "stock": product.stock
                     }
-                    for product in category.products
+                    for product in category.products.values()
                 ]
             }
             for category in categories
         ],
         "customers": [
             {
-                "id": customer.id,
+                "id": format_id("customer", customer.id),
                 "name": customer.name,
                 "email": customer.email,
-                "orders": [
-                    {
-                        "id": order.id,
-                        "items": [
-                            {"product_id": item.product.id, "quantity": item.quantity}
-                            for item in order.items
-                        ],
-                        "status": order.status,
-                        "total_price": order.calculate_total()
-                    }
-                    for order in customer.orders
-                ]
+                "orders": [order_fields(order) for order in customer.orders]
             }
             for customer in customers
         ]
     }
-    with open(filename, "w", encoding="utf-8") as file:
+
+
+def data_entity_count(data):
+    """Число категорий, товаров, покупателей и заказов в снимке данных."""
+    return (len(data["categories"]) + sum(len(category["products"]) for category in data["categories"])
+            + len(data["customers"]) + sum(len(customer["orders"]) for customer in data["customers"]))
+
+
+def store_entity_count(store):
+    """Число категорий, товаров, покупателей и загруженных заказов в хранилище."""
+    return len(store.categories) + len(store.products) + len(store.customers) + len(store.orders)
+
+
+@metrics.timed("laba1.save_json")
+def write_json(data, filename, codec=None, level=None):
+    """Записывает снимок данных магазина в JSON-файл (сжатый — по расширению или codec)."""
+    with filecodec.open_file(filename, "w", codec, level) as file:
         json.dump(data, file, ensure_ascii=False, indent=4)
+    metrics.count_file(filename, data_entity_count(data))
+
+
+def save_to_json(categories, customers, filename="store_data.json", codec=None, level=None, coupons=()):
+    """Сохраняет данные в JSON-файл."""
+    write_json(store_data(categories, customers, coupons), filename, codec, level)
+
+
+def restore_categories_json(store, categories):
+    """Восстанавливает категории и товары из JSON-данных."""
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for category_data in categories:
+        if debug:
+            logger.debug("Загружаем категорию: %s", category_data["name"])
+        category = Category(category_data["name"], id=parse_id(category_data["id"]))
+        store.add_category(category)
+        for product_data in category_data["products"]:
+            if debug:
+                logger.debug("Добавляем продукт: %s", product_data["name"])
+            product = Product(
+                product_data["name"],
+                product_data["description"],
+                product_data["price"],
+                product_data["stock"],
+                id=parse_id(product_data["id"])
+            )
+            category.add_product(product)
+
+
+def restore_coupons_json(store, coupons):
+    """Восстанавливает купоны из JSON-данных."""
+    for data in coupons:
+        store.add_coupon(Coupon(data["code"], data["discount_percentage"], data["active"],
+                                data["valid_from"], data["valid_until"], data["max_uses"], data["uses"]))
+
+
+def restore_customers_json(store, customers):
+    """Восстанавливает покупателей и их заказы из JSON-данных (товары уже должны быть в store)."""
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for customer_data in customers:
+        if debug:
+            logger.debug("Загружаем клиента: %s", customer_data["name"])
+        customer = Customer(customer_data["name"], customer_data["email"], id=parse_id(customer_data["id"]))
+        store.add_customer(customer)
+        for order_data in customer_data["orders"]:
+            if debug:
+                logger.debug("Добавляем заказ для клиента %s", customer_data["name"])
+            order = Order(customer, id=parse_id(order_data["id"]))
+            order.status = order_data["status"]
+            order.coupon = order_data.get("coupon")
+            order.discount = order_data.get("discount", 0)
+            for item_data in order_data["items"]:
+                if debug:
+                    logger.debug("Добавляем товар в заказ: product_id=%s, quantity=%s",
+                                 item_data["product_id"], item_data["quantity"])
+                product = store.products[parse_id(item_data["product_id"])]
+                # Остатки в файле уже учитывают заказ, поэтому склад не списываем повторно
+                order.restore_item(product, item_data["quantity"])
+            customer.place_order(order)
 
 
-def load_from_json():
+def read_json(filename, codec=None):
+    """Читает снимок данных магазина из JSON-файла."""
+    with filecodec.open_file(filename, "r", codec) as file:
+        return json.load(file)
+
+
+@metrics.timed("laba1.load_json")
+def load_from_json(filename="store_data.json", lazy=False, codec=None):
+    """Загружает данные из JSON-файла в хранилище.
+
+    При lazy=True заказы покупателей читаются из файла только при первом обращении;
+    сжатый файл не поддерживает чтение по смещениям и всегда загружается целиком.
+    """
     try:
-        with open("store_data.json", "r", encoding="utf-8") as file:
-            data = json.load(file)
-
-            categories = []
-            for category_data in data["categories"]:
-                print(f"Загружаем категорию: {category_data['name']}")
-                category = Category(category_data["name"])
-                for product_data in category_data["products"]:
-                    print(f"Добавляем продукт: {product_data['name']}")
-                    product = Product(
-                        product_data["name"],
-                        product_data["description"],
-                        product_data["price"],
-                        product_data["stock"]
-                    )
-                    category.add_product(product)
-                categories.append(category)
-
-            customers = []
-            for customer_data in data["customers"]:
-                print(f"Загружаем клиента: {customer_data['name']}")
-                customer = Customer(customer_data["name"], customer_data["email"])
-                for order_data in customer_data["orders"]:
-                    print(f"Добавляем заказ для клиента {customer_data['name']}")
-                    order = Order(customer)
-                    for item_data in order_data["items"]:
-                        print(f"Добавляем товар в заказ: product_id={item_data['product_id']}, quantity={item_data['quantity']}")
-                        product = categories[item_data["product_id"] - 1].products[item_data["product_id"] - 1]
-                        order.add_item(product, item_data["quantity"])
-                    customer.place_order(order)
-                customers.append(customer)
-
-            return categories, customers
+        if lazy and not filecodec.is_compressed(filename, codec):
+            return load_lazy(filename, "json")
+        data = read_json(filename, codec)
+
+        store = Store()
+        store.checkpoint = data.get("checkpoint", 0)
+        restore_categories_json(store, data["categories"])
+        restore_coupons_json(store, data.get("coupons", []))
+        restore_customers_json(store, data["customers"])
+        ids.restore(data.get("ids", {}))
+        store.sync_ids()
+
+        store.clear_dirty()
+        metrics.count_file(filename, store_entity_count(store))
+        return store
 
     except Exception as e:
-        print(f"Ошибка при загрузке JSON: {e}")
-        return [], []
+        logger.error("Ошибка при загрузке JSON: %s", e)
+        metrics.fail()
+        return Store()
+
+def coupon_xml_attrs(coupon):
+    """Атрибуты XML-элемента coupon из данных купона (пустые ограничения не пишутся)."""
+    return {key: str(value) for key, value in coupon.items() if value is not None}
+
+
+def coupon_from_xml_attrs(attrs):
+    """Данные купона (как в coupon_fields) из атрибутов XML-элемента coupon."""
+    def optional(key, convert):
+        value = attrs.get(key)
+        return None if value is None else convert(value)
+
+    return {
+        "code": attrs["code"],
+        "discount_percentage": float(attrs["discount_percentage"]),
+        "active": attrs.get("active", "True") == "True",
+        "valid_from": optional("valid_from", float),
+        "valid_until": optional("valid_until", float),
+        "max_uses": optional("max_uses", int),
+        "uses": int(attrs.get("uses", 0))
+    }
 
-def save_to_xml(categories, customers, filename="store_data.xml"):
-    """Сохраняет данные в XML-файл."""
+
+def order_from_xml_elem(order_elem):
+    """Данные заказа (как в order_fields) из XML-элемента order."""
+    data = {
+        "id": order_elem.get("id"),
+        "items": [
+            {"product_id": item_elem.get("product_id"), "quantity": int(item_elem.get("quantity"))}
+            for item_elem in order_elem.findall("item")
+        ],
+        "status": order_elem.get("status"),
+        "total_price": float(order_elem.get("total_price"))
+    }
+    if order_elem.get("coupon") is not None:
+        data["coupon"] = order_elem.get("coupon")
+        data["discount"] = float(order_elem.get("discount"))
+    return data
+
+
+def read_xml(filename, codec=None):
+    """Читает снимок данных магазина из XML-файла в том же виде, что и read_json."""
+    with filecodec.open_file(filename, "rb", codec) as file:
+        root = ET.parse(file).getroot()
+    ids_elem = root.find("ids")
+    return {
+        "ids": {} if ids_elem is None else {kind: int(value) for kind, value in ids_elem.attrib.items()},
+        "coupons": [coupon_from_xml_attrs(coupon_elem.attrib) for coupon_elem in root.findall("coupons/coupon")],
+        "categories": [
+            {
+                "id": category_elem.get("id"),
+                "name": category_elem.get("name"),
+                "products": [
+                    {
+                        "id": product_elem.get("id"),
+                        "name": product_elem.get("name"),
+                        "description": product_elem.get("description"),
+                        "price": float(product_elem.get("price")),
+                        "stock": int(product_elem.get("stock"))
+                    }
+                    for product_elem in category_elem.findall("product")
+                ]
+            }
+            for category_elem in root.findall("categories/category")
+        ],
+        "customers": [
+            {
+                "id": customer_elem.get("id"),
+                "name": customer_elem.get("name"),
+                "email": customer_elem.get("email"),
+                "orders": [order_from_xml_elem(order_elem) for order_elem in customer_elem.findall("order")]
+            }
+            for customer_elem in root.findall("customers/customer")
+        ]
+    }
+
+
+@metrics.timed("laba1.save_xml")
+def write_xml(data, filename, codec=None, level=None):
+    """Записывает снимок данных магазина в XML-файл (сжатый — по расширению или codec)."""
     root = ET.Element("store")
+    ET.SubElement(root, "ids", {kind: str(value) for kind, value in data.get("ids", {}).items()})
+
+    coupons_el = ET.SubElement(root, "coupons")
+    for coupon in data.get("coupons", []):
+        ET.SubElement(coupons_el, "coupon", coupon_xml_attrs(coupon))
 
     categories_el = ET.SubElement(root, "categories")
-    for category in categories:
-        category_el = ET.SubElement(categories_el, "category", id=category.id, name=category.name)
-        for product in category.products:
-            ET.SubElement(category_el, "product", id=product.id, name=product.name,
-                          description=product.description, price=str(product.price), stock=str(product.stock))
+    for category in data["categories"]:
+        category_el = ET.SubElement(categories_el, "category", id=category["id"], name=category["name"])
+        for product in category["products"]:
+            ET.SubElement(category_el, "product", id=product["id"], name=product["name"],
+                          description=product["description"], price=str(product["price"]),
+                          stock=str(product["stock"]))
 
     customers_el = ET.SubElement(root, "customers")
-    for customer in customers:
-        customer_el = ET.SubElement(customers_el, "customer", id=customer.id, name=customer.name,
-                                    email=customer.email)
-        for order in customer.orders:
-            order_el = ET.SubElement(customer_el, "order", id=order.id, status=order.status,
-                                     total_price=str(order.calculate_total()))
-            for item in order.items:
-                ET.SubElement(order_el, "item", product_id=item.product.id, quantity=str(item.quantity))
+    for customer in data["customers"]:
+        customer_el = ET.SubElement(customers_el, "customer", id=customer["id"], name=customer["name"],
+                                    email=customer["email"])
+        for order in customer["orders"]:
+            order_el = ET.SubElement(customer_el, "order", id=order["id"], status=order["status"],
+                                     total_price=str(order["total_price"]))
+            if "coupon" in order:
+                order_el.set("coupon", order["coupon"])
+                order_el.set("discount", str(order["discount"]))
+            for item in order["items"]:
+                ET.SubElement(order_el, "item", product_id=item["product_id"], quantity=str(item["quantity"]))
 
     tree = ET.ElementTree(root)
-    tree.write(filename)
+    with filecodec.open_file(filename, "wb", codec, level) as file:
+        tree.write(file)
+    metrics.count_file(filename, data_entity_count(data))
+
+
+def save_to_xml(categories, customers, filename="store_data.xml", codec=None, level=None, coupons=()):
+    """Сохраняет данные в XML-файл."""
+    write_xml(store_data(categories, customers, coupons), filename, codec, level)
+
 
+class BackgroundSaver:
+    """Сохраняет снимки магазина в фоновом потоке.
 
-def load_from_xml():
+    Снимок данных снимается сразу в вызывающем потоке, а медленная
+    сериализация идет в рабочем потоке. Повторные запросы в тот же файл,
+    пока предыдущий еще не начат, объединяются: записывается последний снимок.
+    """
+    writers = {"json": write_json, "xml": write_xml}
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.done = threading.Condition(self.lock)
+        self.pending = {}
+        self.thread = None
+        self.current = None
+        self.completed = 0
+        self.last_error = None
+
+    def request_save(self, store, format_choice, filename=None):
+        """Ставит сохранение в очередь и сразу возвращает управление."""
+        if format_choice not in self.writers:
+            raise ValueError(f"Неизвестный формат: {format_choice}")
+        filename = filename or f"store_data.{format_choice}"
+        data = store_data(store.categories.values(), store.customers.values(), store.coupons.values())
+        with self.lock:
+            self.pending[filename] = (format_choice, data)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            with self.lock:
+                if not self.pending:
+                    self.thread = None
+                    self.current = None
+                    self.done.notify_all()
+                    return
+                filename, (format_choice, data) = self.pending.popitem()
+                self.current = filename
+            try:
+                # Пишем во временный файл, чтобы прерванное сохранение не портило прежний
+                tmp_filename = filecodec.tmp_name(filename)
+                self.writers[format_choice](data, tmp_filename)
+                os.replace(tmp_filename, filename)
+            except Exception as e:
+                with self.lock:
+                    self.last_error = f"{filename}: {e}"
+            else:
+                with self.lock:
+                    self.completed += 1
+
+    def is_busy(self):
+        with self.lock:
+            return self.thread is not None
+
+    def wait(self, timeout=None):
+        """Ждет завершения всех запрошенных сохранений."""
+        with self.lock:
+            return self.done.wait_for(lambda: self.thread is None, timeout)
+
+    def status(self):
+        """Текстовое описание состояния фонового сохранения."""
+        with self.lock:
+            if self.thread is None:
+                state = "нет активных сохранений"
+            elif self.current is None:
+                state = f"сохранение запускается, в очереди: {len(self.pending)}"
+            else:
+                state = f"идет сохранение в {self.current}, в очереди: {len(self.pending)}"
+            text = f"{state}; завершено: {self.completed}"
+            if self.last_error:
+                text += f"; последняя ошибка: {self.last_error}"
+            return text
+
+
+def restore_categories_xml(store, category_elems):
+    """Восстанавливает категории и товары из XML-элементов category."""
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for category_elem in category_elems:
+        category_name = category_elem.get("name")
+        if debug:
+            logger.debug("Загружаем категорию: %s", category_name)
+        category = Category(category_name, id=parse_id(category_elem.get("id")))
+        store.add_category(category)
+        for product_elem in category_elem.findall("product"):
+            product_name = product_elem.get("name")
+            if debug:
+                logger.debug("Добавляем продукт: %s", product_name)
+            product = Product(
+                product_elem.get("name"),
+                product_elem.get("description"),
+                float(product_elem.get("price")),
+                int(product_elem.get("stock")),
+                id=parse_id(product_elem.get("id"))
+            )
+            category.add_product(product)
+
+
+@metrics.timed("laba1.load_xml")
+def load_from_xml(filename="store_data.xml", lazy=False, codec=None):
+    """Загружает данные из XML-файла в хранилище.
+
+    При lazy=True заказы покупателей читаются из файла только при первом обращении;
+    сжатый файл не поддерживает чтение по смещениям и всегда загружается целиком.
+    """
     try:
-        tree = ET.parse("store_data.xml")
-        root = tree.getroot()
-
-        categories = []
-        for category_elem in root.findall("categories/category"):
-            category_name = category_elem.get("name")
-            print(f"Загружаем категорию: {category_name}")
-            category = Category(category_name)
-            for product_elem in category_elem.findall("product"):
-                product_name = product_elem.get("name")
-                print(f"Добавляем продукт: {product_name}")
-                product = Product(
-                    product_elem.get("name"),
-                    product_elem.get("description"),
-                    float(product_elem.get("price")),
-                    int(product_elem.get("stock"))
-                )
-                category.add_product(product)
-            categories.append(category)
-
-        customers = []
+        if lazy and not filecodec.is_compressed(filename, codec):
+            return load_lazy(filename, "xml")
+        with filecodec.open_file(filename, "rb", codec) as file:
+            root = ET.parse(file).getroot()
+
+        store = Store()
+        restore_categories_xml(store, root.findall("categories/category"))
+        restore_coupons_json(store, [coupon_from_xml_attrs(coupon_elem.attrib)
+                                     for coupon_elem in root.findall("coupons/coupon")])
+
+        debug = logger.isEnabledFor(logging.DEBUG)
         for customer_elem in root.findall("customers/customer"):
             customer_name = customer_elem.get("name")
-            print(f"Загружаем клиента: {customer_name}")
-            customer = Customer(customer_name, customer_elem.get("email"))
+            if debug:
+                logger.debug("Загружаем клиента: %s", customer_name)
+            customer = Customer(customer_name, customer_elem.get("email"), id=parse_id(customer_elem.get("id")))
+            store.add_customer(customer)
             for order_elem in customer_elem.findall("order"):
-                print(f"Добавляем заказ для клиента {customer_name}")
-                order = Order(customer)
+                if debug:
+                    logger.debug("Добавляем заказ для клиента %s", customer_name)
+                order = Order(customer, id=parse_id(order_elem.get("id")))
+                order.status = order_elem.get("status")
+                if order_elem.get("coupon") is not None:
+                    order.coupon = order_elem.get("coupon")
+                    order.discount = float(order_elem.get("discount"))
                 for item_elem in order_elem.findall("item"):
-                    product_id = int(item_elem.get("product_id")) - 1
+                    product_id = item_elem.get("product_id")
                     quantity = int(item_elem.get("quantity"))
-                    print(f"Добавляем товар в заказ: product_id={product_id}, quantity={quantity}")
-                    product = categories[product_id].products[product_id]
-                    order.add_item(product, quantity)
+                    if debug:
+                        logger.debug("Добавляем товар в заказ: product_id=%s, quantity=%s", product_id, quantity)
+                    product = store.products[parse_id(product_id)]
+                    order.restore_item(product, quantity)
                 customer.place_order(order)
-            customers.append(customer)
 
-        return categories, customers
+        ids_elem = root.find("ids")
+        if ids_elem is not None:
+            ids.restore(ids_elem.attrib)
+        store.sync_ids()
+        store.clear_dirty()
+        metrics.count_file(filename, store_entity_count(store))
+        return store
 
     except Exception as e:
-        print(f"Ошибка при загрузке XML: {e}")
-        return [], []
+        logger.error("Ошибка при загрузке XML: %s", e)
+        metrics.fail()
+        return Store()
+
+# -------------------- Ленивая загрузка заказов --------------------
+
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def json_skip(text, pos):
+    return JSON_WHITESPACE.match(text, pos).end()
+
+
+def json_members(text, pos, read_value):
+    """Обходит JSON-объект, начинающийся в pos; read_value(key, start) возвращает конец значения.
+
+    Возвращает позицию после закрывающей скобки.
+    """
+    pos = json_skip(text, pos + 1)
+    if text[pos] == "}":
+        return pos + 1
+    while True:
+        key, pos = scanstring(text, pos + 1)
+        pos = json_skip(text, json_skip(text, pos) + 1)
+        pos = json_skip(text, read_value(key, pos))
+        if text[pos] == "}":
+            return pos + 1
+        pos = json_skip(text, pos + 1)
+
+
+def json_elements(text, pos, read_value):
+    """Обходит JSON-массив, начинающийся в pos; read_value(start) возвращает конец элемента."""
+    pos = json_skip(text, pos + 1)
+    if text[pos] == "]":
+        return pos + 1
+    while True:
+        pos = json_skip(text, read_value(pos))
+        if text[pos] == "]":
+            return pos + 1
+        pos = json_skip(text, pos + 1)
+
+
+def scan_json_store(filename):
+    """Строит индекс JSON-файла: смещения каталога и истории заказов каждого покупателя.
+
+    Файл читается как latin-1, поэтому позиции в строке совпадают с байтовыми смещениями.
+    В max_ids запоминается наибольший ID заказа: файлы без отметок ids иначе не дают
+    узнать его, не читая все истории заказов.
+    """
+    with open(filename, "r", encoding="latin-1") as file:
+        text = file.read()
+    decoder = json.JSONDecoder()
+    index = {"checkpoint": 0, "ids": {}, "max_ids": {"order": 0}, "coupons": [], "categories": None,
+             "customers": []}
+    max_ids = index["max_ids"]
+
+    def value_end(pos):
+        return decoder.raw_decode(text, pos)[1]
+
+    def decode(start, end):
+        return json.loads(text[start:end].encode("latin-1"))
+
+    def read_customer(pos):
+        customer = {"orders": None}
+
+        def read_field(key, start):
+            if key == "orders":
+                orders, end = decoder.raw_decode(text, start)
+                customer["orders"] = [start, end]
+                max_ids["order"] = max([max_ids["order"]] + [parse_id(order["id"]) for order in orders])
+                return end
+            end = value_end(start)
+            customer[key] = decode(start, end)
+            return end
+
+        end = json_members(text, pos, read_field)
+        index["customers"].append(customer)
+        return end
+
+    def read_top(key, start):
+        if key == "customers":
+            return json_elements(text, start, read_customer)
+        end = value_end(start)
+        if key == "categories":
+            index["categories"] = [start, end]
+        elif key in ("checkpoint", "ids", "coupons"):
+            index[key] = decode(start, end)
+        return end
+
+    json_members(text, json_skip(text, 0), read_top)
+    return index
+
+
+def scan_xml_store(filename):
+    """Строит индекс XML-файла: смещения каталога и истории заказов каждого покупателя."""
+    parser = expat.ParserCreate()
+    index = {"checkpoint": 0, "ids": {}, "max_ids": {"order": 0}, "coupons": [], "categories": None,
+             "customers": []}
+    max_ids = index["max_ids"]
+    path = []
+
+    def start_element(tag, attrs):
+        parent = path[-1] if path else None
+        path.append(tag)
+        if tag == "ids" and parent == "store":
+            index["ids"] = {kind: int(value) for kind, value in attrs.items()}
+        elif tag == "coupon" and parent == "coupons":
+            index["coupons"].append(coupon_from_xml_attrs(attrs))
+        elif tag == "categories" and parent == "store":
+            index["categories"] = [parser.CurrentByteIndex, None]
+        elif tag == "customer" and parent == "customers":
+            index["customers"].append({"id": attrs.get("id"), "name": attrs.get("name"),
+                                       "email": attrs.get("email"), "orders": None})
+        elif tag == "order" and parent == "customer":
+            max_ids["order"] = max(max_ids["order"], parse_id(attrs["id"]))
+            customer = index["customers"][-1]
+            if customer["orders"] is None:
+                customer["orders"] = [parser.CurrentByteIndex, None]
+
+    def end_element(tag):
+        path.pop()
+        if tag == "categories" and path == ["store"]:
+            categories = index["categories"]
+            if categories[0] == parser.CurrentByteIndex:
+                # Пустой элемент <categories />
+                index["categories"] = None
+            else:
+                categories[1] = parser.CurrentByteIndex + len("</categories>")
+        elif tag == "customer" and path and path[-1] == "customers":
+            orders = index["customers"][-1]["orders"]
+            if orders is not None:
+                orders[1] = parser.CurrentByteIndex
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    with open(filename, "rb") as file:
+        parser.ParseFile(file)
+    return index
+
+
+@metrics.timed("laba1.load_index")
+def load_store_index(filename, fmt):
+    """Возвращает индекс файла магазина, пересобирая его, если файл изменился.
+
+    Индекс кешируется рядом с файлом (filename + ".idx") и привязан к его размеру и mtime.
+    """
+    stat = os.stat(filename)
+    source = [stat.st_size, stat.st_mtime_ns]
+    index_name = filename + ".idx"
+    try:
+        with open(index_name, "r", encoding="utf-8") as file:
+            index = json.load(file)
+        # Индексы без max_ids записаны до появления этого поля и пересобираются
+        if index.get("source") == source and index.get("format") == fmt and "max_ids" in index:
+            metrics.count_file(index_name, len(index["customers"]))
+            return index
+    except (OSError, ValueError):
+        pass
+    index = scan_json_store(filename) if fmt == "json" else scan_xml_store(filename)
+    index["source"] = source
+    index["format"] = fmt
+    metrics.increment("laba1.index_rebuilds")
+    metrics.count(len(index["customers"]), stat.st_size)
+    try:
+        with open(index_name + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(index, file, ensure_ascii=False)
+        os.replace(index_name + ".tmp", index_name)
+    except OSError:
+        pass
+    return index
+
+
+def read_span(filename, span):
+    """Читает байты файла из диапазона [начало, конец)."""
+    with open(filename, "rb") as file:
+        file.seek(span[0])
+        return file.read(span[1] - span[0])
+
+
+class LazyOrders(MutableSequence):
+    """Список заказов покупателя, который читается из файла при первом обращении."""
+    __slots__ = ('customer', 'filename', 'fmt', 'span', 'orders', 'removed', 'lock')
+
+    def __init__(self, customer, filename, fmt, span):
+        self.customer = customer
+        self.filename = filename
+        self.fmt = fmt
+        self.span = span
+        self.orders = None
+        # ID заказов, удаленных до чтения файла; при чтении они пропускаются
+        self.removed = set()
+        self.lock = threading.Lock()
+
+    def records(self):
+        """Читает заказы из файла как список словарей в формате order_fields."""
+        data = read_span(self.filename, self.span)
+        if self.fmt == "json":
+            return json.loads(data)
+        root = ET.fromstring(b"<orders>" + data + b"</orders>")
+        return [order_from_xml_elem(order_elem) for order_elem in root.findall("order")]
+
+    def load(self):
+        """Возвращает заказы, при первом вызове создавая их из файла."""
+        if self.orders is not None:
+            return self.orders
+        with self.lock:
+            if self.orders is None:
+                with metrics.timed("laba1.hydrate_orders"):
+                    self.orders = self.hydrate()
+        return self.orders
+
+    def hydrate(self):
+        store = self.customer.store
+        orders = CustomerOrders()
+        for order_data in self.records():
+            order_id = parse_id(order_data["id"])
+            if order_id in self.removed:
+                continue
+            order = Order(self.customer, id=order_id)
+            order.status = order_data["status"]
+            order.coupon = order_data.get("coupon")
+            order.discount = order_data.get("discount", 0)
+            for item in order_data["items"]:
+                # Остатки в файле уже учитывают заказ, поэтому склад не списываем повторно
+                order.restore_item(store.products[parse_id(item["product_id"])], item["quantity"])
+            orders.append(order)
+            store.orders[order.id] = order
+            # Прочитанные из файла заказы не считаются измененными
+            store.dirty["orders"].discard(order.id)
+        # В файлах без отметок ID заказов известны только после чтения
+        ids.observe("order", max(max(store.orders, default=0), max(self.removed, default=0)))
+        metrics.count(len(orders), self.span[1] - self.span[0])
+        return orders
+
+    def is_loaded(self):
+        return self.orders is not None
+
+    def __getitem__(self, index):
+        return self.load()[index]
+
+    def __setitem__(self, index, value):
+        self.load()[index] = value
+
+    def __delitem__(self, index):
+        del self.load()[index]
+
+    def __len__(self):
+        return len(self.load())
+
+    def insert(self, index, value):
+        self.load().insert(index, value)
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __contains__(self, order):
+        return order in self.load()
+
+    def append(self, order):
+        self.load().append(order)
+
+    def remove(self, order):
+        self.load().remove(order)
+
+    def discard(self, order_id):
+        """Удаляет заказ по ID; непрочитанный файл не читается, а заказ пропускается при чтении."""
+        if self.orders is None:
+            with self.lock:
+                if self.orders is None:
+                    self.removed.add(order_id)
+                    return
+        self.orders.discard(order_id)
+
+    def __repr__(self):
+        if self.orders is None:
+            return f"LazyOrders(customer={self.customer.id}, not loaded)"
+        return repr(self.orders)
+
+
+@metrics.timed("laba1.load_lazy")
+def load_lazy(filename, fmt):
+    """Загружает каталог и покупателей, оставляя истории заказов в файле до первого обращения."""
+    index = load_store_index(filename, fmt)
+    store = Store()
+    store.checkpoint = index["checkpoint"]
+    restore_coupons_json(store, index.get("coupons", []))
+    if index["categories"] is not None:
+        data = read_span(filename, index["categories"])
+        if fmt == "json":
+            restore_categories_json(store, json.loads(data))
+        else:
+            restore_categories_xml(store, ET.fromstring(data).findall("category"))
+
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for customer_data in index["customers"]:
+        if debug:
+            logger.debug("Загружаем клиента: %s", customer_data["name"])
+        customer = Customer(customer_data["name"], customer_data["email"], id=parse_id(customer_data["id"]))
+        store.add_customer(customer)
+        if customer_data["orders"] is not None:
+            customer.orders = LazyOrders(customer, filename, fmt, customer_data["orders"])
+            store.lazy_orders.append(customer.orders)
+
+    ids.restore(index.get("ids", {}))
+    # Заказы еще в файле, поэтому sync_ids их не видит; новые ID выдаются после максимального
+    ids.restore(index["max_ids"])
+    store.sync_ids()
+    store.clear_dirty()
+    metrics.count(store_entity_count(store))
+    return store
+
+
+def delta_records(store, dirty, sequence):
+    """Записи изменений для инкрементальной контрольной точки."""
+    records = []
+    for category_id in dirty["categories"]:
+        category = store.categories.get(category_id)
+        if category is not None:
+            records.append({"op": "category", "id": category.id, "name": category.name})
+    for product_id in dirty["products"]:
+        product = store.products.get(product_id)
+        if product is not None:
+            records.append({
+                "op": "product",
+                "id": product.id,
+                "category_id": store.product_categories[product_id].id,
+                "name": product.name,
+                "description": product.description,
+                "price": product.price,
+                "stock": product.stock
+            })
+    for customer_id in dirty["customers"]:
+        customer = store.customers.get(customer_id)
+        if customer is not None:
+            records.append({"op": "customer", "id": customer.id, "name": customer.name, "email": customer.email})
+    for code in dirty["coupons"]:
+        coupon = store.coupons.get(code)
+        if coupon is not None:
+            record = coupon_fields(coupon)
+            record["op"] = "coupon"
+            records.append(record)
+    for order_id in dirty["orders"]:
+        order = store.orders.get(order_id)
+        if order is not None:
+            records.append({
+                "op": "order",
+                "id": order.id,
+                "customer_id": order.customer.id,
+                "items": [{"product_id": item.product.id, "quantity": item.quantity} for item in order.items],
+                "status": order.status,
+                "coupon": order.coupon,
+                "discount": order.discount
+            })
+    # Удаления записываются только для сущностей, которых действительно нет в хранилище
+    for kind, index in (("removed_orders", store.orders), ("removed_products", store.products),
+                        ("removed_customers", store.customers), ("removed_categories", store.categories),
+                        ("removed_coupons", store.coupons)):
+        for entity_id in dirty[kind]:
+            if entity_id not in index:
+                records.append({"op": kind, "id": entity_id})
+    if records:
+        records.append({"op": "ids", "ids": ids.state()})
+    for record in records:
+        record["seq"] = sequence
+    return records
+
+
+def apply_delta(store, record):
+    """Применяет одну запись изменений к хранилищу."""
+    op = record["op"]
+    if op == "ids":
+        ids.restore(record["ids"])
+        return
+    # Купоны идентифицируются кодом, а не числовым ID
+    if op == "coupon":
+        restore_coupons_json(store, [record])
+        return
+    if op == "removed_coupons":
+        store.remove_coupon(record["id"])
+        return
+    entity_id = parse_id(record["id"])
+    if op == "category":
+        category = store.categories.get(entity_id)
+        if category is None:
+            category = Category(record["name"], id=entity_id)
+            store.add_category(category)
+        category.name = record["name"]
+    elif op == "product":
+        category = store.categories[parse_id(record["category_id"])]
+        product = store.products.get(entity_id)
+        if product is None or store.product_categories[entity_id] is not category:
+            if product is not None:
+                store.remove_product(entity_id)
+            product = Product(record["name"], record["description"], record["price"], record["stock"], id=entity_id)
+            category.add_product(product)
+        product.name = record["name"]
+        product.description = record["description"]
+        product.price = record["price"]
+        product.stock = record["stock"]
+        for listener in store.listeners:
+            listener.product_added(product, category)
+    elif op == "customer":
+        customer = store.customers.get(entity_id)
+        if customer is None:
+            customer = Customer(record["name"], record["email"], id=entity_id)
+            store.add_customer(customer)
+        elif customer.email != record["email"]:
+            store.customers_by_email.pop(customer.email, None)
+            store.customers_by_email[record["email"]] = customer
+        customer.name = record["name"]
+        customer.email = record["email"]
+    elif op == "order":
+        order = store.get_order(entity_id)
+        if order is None:
+            order = Order(store.customers[parse_id(record["customer_id"])], id=entity_id)
+            order.customer.place_order(order)
+        order.items = []
+        order.total = 0
+        for item in record["items"]:
+            order.restore_item(store.products[parse_id(item["product_id"])], item["quantity"])
+        order.status = record["status"]
+        order.coupon = record.get("coupon")
+        order.discount = record.get("discount", 0)
+    elif op == "removed_orders":
+        store.remove_order(entity_id)
+    elif op == "removed_products":
+        store.remove_product(entity_id)
+    elif op == "removed_customers":
+        store.remove_customer(entity_id)
+    elif op == "removed_categories":
+        store.remove_category(entity_id)
+
+
+class Checkpointer:
+    """Инкрементальные контрольные точки магазина в JSON.
+
+    Обычная контрольная точка дописывает в filename + ".delta" только
+    сущности, измененные с прошлого раза. Каждые full_every точек, а также
+    когда журнал изменений перерастает основной файл, магазин
+    сохраняется целиком и журнал очищается.
+    """
+    def __init__(self, store, filename="store_data.json", full_every=20):
+        self.store = store
+        self.filename = filename
+        self.delta_filename = filename + ".delta"
+        self.full_every = full_every
+        self.sequence = store.checkpoint
+        self.deltas = 0
+
+    @classmethod
+    @metrics.timed("laba1.checkpoint_restore")
+    def restore(cls, filename="store_data.json", full_every=20):
+        """Загружает основной файл и применяет к нему журнал изменений."""
+        store = load_from_json(filename)
+        checkpointer = cls(store, filename, full_every)
+        sequences = set()
+        try:
+            with open(checkpointer.delta_filename, "r", encoding="utf-8") as file:
+                for line in file:
+                    if not line.endswith("\n"):
+                        break  # Недописанная запись после сбоя
+                    record = json.loads(line)
+                    # Записи старше основного файла уже учтены в нем
+                    if record["seq"] > store.checkpoint:
+                        apply_delta(store, record)
+                        sequences.add(record["seq"])
+                        metrics.count(1, len(line.encode("utf-8")))
+        except FileNotFoundError:
+            pass
+        store.sync_ids()
+        store.clear_dirty()
+        checkpointer.deltas = len(sequences)
+        checkpointer.sequence = max(sequences, default=store.checkpoint)
+        return checkpointer
+
+    def checkpoint(self, full=False):
+        """Сохраняет изменения; возвращает число записанных записей или None при полной записи."""
+        if (full or self.deltas >= self.full_every or not os.path.exists(self.filename)
+                or self.delta_size() > os.path.getsize(self.filename)):
+            self.full_checkpoint()
+            return None
+        return self.delta_checkpoint()
+
+    def delta_size(self):
+        try:
+            return os.path.getsize(self.delta_filename)
+        except FileNotFoundError:
+            return 0
+
+    @metrics.timed("laba1.checkpoint_full")
+    def full_checkpoint(self):
+        self.store.clear_dirty()
+        self.sequence += 1
+        data = store_data(self.store.categories.values(), self.store.customers.values(),
+                          self.store.coupons.values())
+        data["checkpoint"] = self.sequence
+        tmp_filename = filecodec.tmp_name(self.filename)
+        write_json(data, tmp_filename)
+        os.replace(tmp_filename, self.filename)
+        self.store.checkpoint = self.sequence
+        open(self.delta_filename, "w", encoding="utf-8").close()
+        self.deltas = 0
+
+    @metrics.timed("laba1.checkpoint_delta")
+    def delta_checkpoint(self):
+        dirty = self.store.take_dirty()
+        if not any(dirty.values()):
+            return 0
+        self.sequence += 1
+        records = delta_records(self.store, dirty, self.sequence)
+        text = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        metrics.count(len(records), len(text.encode("utf-8")))
+        with open(self.delta_filename, "a", encoding="utf-8") as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        self.deltas += 1
+        return len(records)
+
 
 def show_menu():
     print("\nМеню:")
@@ -381,13 +1961,27 @@ def show_menu():
     print("5. Показать заказы клиента")
     print("6. Сохранить данные в файл")
     print("7. Загрузить данные из файла")
+    print("8. Статус сохранения")
+    print("9. Поиск товаров")
+    print("10. Метрики")
+    print("11. Применить купон к заказам в ожидании")
     print("0. Выход")
 
 
 if __name__ == "__main__":
-    categories = []
-    customers = [Customer("John Doe", "john@example.com")]
+    logging.basicConfig(level=os.environ.get("LABA_LOG_LEVEL", "INFO"), format="%(message)s")
+    if os.environ.get("LABA_METRICS_FILE"):
+        # LABA_METRICS_INTERVAL — как часто (в секундах) перезаписывать файл метрик
+        interval = float(os.environ.get("LABA_METRICS_INTERVAL", metrics.PROMETHEUS_FILE_INTERVAL))
+        metrics_sink = metrics.add_sink(metrics.PrometheusFileSink(os.environ["LABA_METRICS_FILE"], interval))
+        atexit.register(metrics_sink.flush, metrics.registry)
+    # LABA_CODEC=gzip|bz2|lzma — сохранять и загружать сжатые файлы (store_data.json.gz и т.д.)
+    codec = os.environ.get("LABA_CODEC")
+    store = Store()
+    store.add_customer(Customer("John Doe", "john@example.com"))
     admin = Admin("admin1")
+    saver = BackgroundSaver()
+    product_search = search.ProductSearch.attach(store)
 
     while True:
         show_menu()
@@ -395,10 +1989,11 @@ if __name__ == "__main__":
 
         if choice == "1":
             name = input("Введите название категории: ")
-            category = admin.add_category(name, categories)
+            category = admin.add_category(name, store)
             print(f"Добавлена категория: {category}")
 
         elif choice == "2":
+            categories = list(store.categories.values())
             if not categories:
                 print("Нет доступных категорий. Сначала добавьте категорию.")
                 continue
@@ -416,6 +2011,7 @@ if __name__ == "__main__":
             print(f"Добавлен товар: {product}")
 
         elif choice == "3":
+            customers = list(store.customers.values())
             print("Доступные клиенты:")
             for idx, customer in enumerate(customers):
                 print(f"{idx + 1}. {customer.name} ({customer.email})")
@@ -426,6 +2022,7 @@ if __name__ == "__main__":
             print(f"Создан заказ: {order}")
 
         elif choice == "4":
+            categories = list(store.categories.values())
             if not categories:
                 print("Нет доступных категорий. Сначала добавьте категории и товары.")
                 continue
@@ -439,15 +2036,16 @@ if __name__ == "__main__":
                 print("Нет доступных товаров в этой категории.")
                 continue
 
+            products = list(category.products.values())
             print("Товары:")
-            for idx, product in enumerate(category.products):
+            for idx, product in enumerate(products):
                 print(f"{idx + 1}. {product.name} (Цена: {product.price}, Остаток: {product.stock})")
             prod_idx = int(input("Выберите товар: ")) - 1
-            product = category.products[prod_idx]
+            product = products[prod_idx]
 
             quantity = int(input("Количество: "))
             try:
-                customer = customers[0]  # Для примера используем первого клиента
+                customer = next(iter(store.customers.values()))  # Для примера используем первого клиента
                 order = customer.orders[-1]  # Последний заказ
                 order.add_item(product, quantity)
                 print(f"Товар добавлен в заказ: {product.name}, Количество: {quantity}")
@@ -455,6 +2053,7 @@ if __name__ == "__main__":
                 print(f"Ошибка: {e}")
 
         elif choice == "5":
+            customers = list(store.customers.values())
             print("Доступные клиенты:")
             for idx, customer in enumerate(customers):
                 print(f"{idx + 1}. {customer.name} ({customer.email})")
@@ -469,27 +2068,65 @@ if __name__ == "__main__":
 
         elif choice == "6":
             format_choice = input("Выберите формат (json/xml): ").strip().lower()
-            if format_choice == "json":
-                save_to_json(categories, customers)
-                print("Данные сохранены в JSON-файл.")
-            elif format_choice == "xml":
-                save_to_xml(categories, customers)
-                print("Данные сохранены в XML-файл.")
+            if format_choice in ("json", "xml"):
+                saver.request_save(store, format_choice,
+                                   filecodec.with_extension(f"store_data.{format_choice}", codec))
+                print("Сохранение запущено в фоне.")
             else:
                 print("Неверный формат.")
 
         elif choice == "7":
             format_choice = input("Выберите формат (json/xml): ").strip().lower()
             if format_choice == "json":
-                data = load_from_json()
+                store = load_from_json(filecodec.with_extension("store_data.json", codec), lazy=True)
+                product_search = search.ProductSearch.attach(store)
                 print("Данные загружены из JSON-файла.")
             elif format_choice == "xml":
-                data = load_from_xml()
+                store = load_from_xml(filecodec.with_extension("store_data.xml", codec), lazy=True)
+                product_search = search.ProductSearch.attach(store)
                 print("Данные загружены из XML-файла.")
             else:
                 print("Неверный формат.")
 
+        elif choice == "8":
+            print(f"Сохранение: {saver.status()}")
+
+        elif choice == "9":
+            query = input("Поисковый запрос: ")
+            only_in_stock = input("Только в наличии? (y/n): ").strip().lower() == "y"
+            products = product_search.search(query, in_stock=only_in_stock)
+            if not products:
+                print(f"Ничего не найдено. Возможно, вы искали: {', '.join(product_search.complete(query)) or '-'}")
+            for product in products:
+                print(f"{product.name} (Цена: {product.price}, Остаток: {product.stock}, "
+                      f"Категория: {store.get_product_category(product.id).name})")
+
+        elif choice == "10":
+            operations = metrics.registry.snapshot()["operations"]
+            if not operations:
+                print("Операций еще не было.")
+            for name, stats in sorted(operations.items()):
+                print(f"{name}: вызовов {stats['calls']}, ошибок {stats['errors']}, "
+                      f"{stats['seconds']:.3f} с, сущностей {stats['entities']}, байт {stats['bytes']}")
+
+        elif choice == "11":
+            code = input("Код купона: ").strip()
+            try:
+                if store.get_coupon(code) is None:
+                    percentage = float(input("Новый купон. Скидка, %: "))
+                    max_uses = input("Лимит использований (пусто — без лимита): ").strip()
+                    store.add_coupon(Coupon(code, percentage, max_uses=int(max_uses) if max_uses else None))
+                applied = store.apply_to_orders(code)
+            except ValueError as e:
+                print(e)
+            else:
+                print(f"Купон применен к {len(applied)} заказам, "
+                      f"скидка {sum(order.discount for order in applied):.2f} руб.")
+
         elif choice == "0":
+            if saver.is_busy():
+                print("Дожидаемся завершения сохранения...")
+                saver.wait()
             print("Выход из программы.")
             break
 
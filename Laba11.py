@@ -1,8 +1,23 @@
 import json
+import logging
+import os
+import re
+import threading
 from xml.etree import ElementTree as ET
 
+import filecodec
+import metrics
+import serializers
+from serializers import Field, Many, Nested
+
+logger = logging.getLogger("laba11")
+
 # 1. Продукт
 class Product:
+    __slots__ = ('id', 'name', 'description', 'price', 'category')
+    schema = (Field('id', int), Field('name'), Field('description'), Field('price', float),
+              Nested('category', 'Category'))
+
     def __init__(self, id, name, description, price, category):
         self.id = id
         self.name = name
@@ -10,158 +25,107 @@ class Product:
         self.price = price
         self.category = category
 
-    def to_json(self):
+    def to_ref_json(self, identity):
+        identity.add_category(self.category)
         return {
             'id': self.id,
             'name': self.name,
             'description': self.description,
             'price': self.price,
-            'category': self.category.to_json()
+            'category_id': self.category.id
         }
 
-    def from_json(js):
-        id = js['id']
-        name = js['name']
-        description = js['description']
-        price = js['price']
-        category = Category.from_json(js['category'])
-        return Product(id, name, description, price, category)
+    @staticmethod
+    def from_ref_json(js, identity):
+        category = identity.categories[js['category_id']]
+        return Product(js['id'], js['name'], js['description'], js['price'], category)
 
-    def to_xml(self):
+    def to_ref_xml(self, identity):
+        identity.add_category(self.category)
         product_elem = ET.Element("Product")
         ET.SubElement(product_elem, "Id").text = str(self.id)
         ET.SubElement(product_elem, "Name").text = self.name
         ET.SubElement(product_elem, "Description").text = self.description
         ET.SubElement(product_elem, "Price").text = str(self.price)
-        product_elem.append(self.category.to_xml())
+        ET.SubElement(product_elem, "CategoryId").text = str(self.category.id)
         return product_elem
 
-    def from_xml(elem):
+    @staticmethod
+    def from_ref_xml(elem, identity):
         id = int(elem.find("Id").text)
         name = elem.find("Name").text
         description = elem.find("Description").text
         price = float(elem.find("Price").text)
-        category_elem = elem.find("Category")
-        category = Category.from_xml(category_elem)
+        category = identity.categories[int(elem.find("CategoryId").text)]
         return Product(id, name, description, price, category)
 
 # 2. Категория
 class Category:
+    __slots__ = ('id', 'name')
+    schema = (Field('id', int), Field('name'))
+
     def __init__(self, id, name):
         self.id = id
         self.name = name
 
-    def to_json(self):
-        return {
-            'id': self.id,
-            'name': self.name
-        }
-
-    def from_json(js):
-        return Category(js['id'], js['name'])
-
-    def to_xml(self):
-        category_elem = ET.Element("Category")
-        ET.SubElement(category_elem, "Id").text = str(self.id)
-        ET.SubElement(category_elem, "Name").text = self.name
-        return category_elem
-
-    def from_xml(elem):
-        id = int(elem.find("Id").text)
-        name = elem.find("Name").text
-        return Category(id, name)
-
 # 3. Администратор
 class Admin:
+    schema = (Field('id', int), Field('username'), Field('email'))
+
     def __init__(self, id, username, email):
         self.id = id
         self.username = username
         self.email = email
 
-    def to_json(self):
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email
-        }
-
-    def from_json(js):
-        return Admin(js['id'], js['username'], js['email'])
-
-    def to_xml(self):
-        admin_elem = ET.Element("Admin")
-        ET.SubElement(admin_elem, "Id").text = str(self.id)
-        ET.SubElement(admin_elem, "Username").text = self.username
-        ET.SubElement(admin_elem, "Email").text = self.email
-        return admin_elem
-
-    def from_xml(elem):
-        id = int(elem.find("Id").text)
-        username = elem.find("Username").text
-        email = elem.find("Email").text
-        return Admin(id, username, email)
-
 # 4. Клиент
 class Customer:
+    __slots__ = ('id', 'name', 'email')
+    schema = (Field('id', int), Field('name'), Field('email'))
+
     def __init__(self, id, name, email):
         self.id = id
         self.name = name
         self.email = email
 
-    def to_json(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'email': self.email
-        }
-
-    def from_json(js):
-        return Customer(js['id'], js['name'], js['email'])
-
-    def to_xml(self):
-        customer_elem = ET.Element("Customer")
-        ET.SubElement(customer_elem, "Id").text = str(self.id)
-        ET.SubElement(customer_elem, "Name").text = self.name
-        ET.SubElement(customer_elem, "Email").text = self.email
-        return customer_elem
-
-    def from_xml(elem):
-        id = int(elem.find("Id").text)
-        name = elem.find("Name").text
-        email = elem.find("Email").text
-        return Customer(id, name, email)
-
 # 5. Позиция заказа
 class OrderItem:
+    __slots__ = ('product', 'quantity')
+    schema = (Nested('product', 'Product'), Field('quantity', int))
+
     def __init__(self, product, quantity):
         self.product = product
         self.quantity = quantity
 
-    def to_json(self):
+    def to_ref_json(self, identity):
+        identity.add_product(self.product)
         return {
-            'product': self.product.to_json(),
+            'product_id': self.product.id,
             'quantity': self.quantity
         }
 
-    def from_json(js):
-        product = Product.from_json(js['product'])
-        quantity = js['quantity']
-        return OrderItem(product, quantity)
+    @staticmethod
+    def from_ref_json(js, identity):
+        return OrderItem(identity.products[js['product_id']], js['quantity'])
 
-    def to_xml(self):
+    def to_ref_xml(self, identity):
+        identity.add_product(self.product)
         order_item_elem = ET.Element("OrderItem")
-        order_item_elem.append(self.product.to_xml())
+        ET.SubElement(order_item_elem, "ProductId").text = str(self.product.id)
         ET.SubElement(order_item_elem, "Quantity").text = str(self.quantity)
         return order_item_elem
 
-    def from_xml(elem):
-        product_elem = elem.find("Product")
-        product = Product.from_xml(product_elem)
+    @staticmethod
+    def from_ref_xml(elem, identity):
+        product = identity.products[int(elem.find("ProductId").text)]
         quantity = int(elem.find("Quantity").text)
         return OrderItem(product, quantity)
 
 # 6. Заказ
 class Order:
+    __slots__ = ('id', 'customer', 'items', 'total_price', 'status')
+    schema = (Field('id', int), Nested('customer', 'Customer'), Many('items', 'OrderItem'),
+              Field('total_price', float), Field('status'))
+
     def __init__(self, id, customer, items, total_price, status):
         self.id = id
         self.customer = customer
@@ -169,177 +133,198 @@ class Order:
         self.total_price = total_price
         self.status = status
 
-    def to_json(self):
+    def to_ref_json(self, identity):
+        identity.add_customer(self.customer)
         return {
             'id': self.id,
-            'customer': self.customer.to_json(),
-            'items': [item.to_json() for item in self.items],
+            'customer_id': self.customer.id,
+            'items': [item.to_ref_json(identity) for item in self.items],
             'total_price': self.total_price,
             'status': self.status
         }
 
-    def from_json(js):
-        id = js['id']
-        customer = Customer.from_json(js['customer'])
-        items = [OrderItem.from_json(item) for item in js['items']]
-        total_price = js['total_price']
-        status = js['status']
-        return Order(id, customer, items, total_price, status)
+    @staticmethod
+    def from_ref_json(js, identity):
+        customer = identity.customers[js['customer_id']]
+        items = [OrderItem.from_ref_json(item, identity) for item in js['items']]
+        return Order(js['id'], customer, items, js['total_price'], js['status'])
 
-    def to_xml(self):
+    def to_ref_xml(self, identity):
+        identity.add_customer(self.customer)
         order_elem = ET.Element("Order")
         ET.SubElement(order_elem, "Id").text = str(self.id)
-        order_elem.append(self.customer.to_xml())
+        ET.SubElement(order_elem, "CustomerId").text = str(self.customer.id)
         items_elem = ET.SubElement(order_elem, "Items")
         for item in self.items:
-            items_elem.append(item.to_xml())
+            items_elem.append(item.to_ref_xml(identity))
         ET.SubElement(order_elem, "TotalPrice").text = str(self.total_price)
         ET.SubElement(order_elem, "Status").text = self.status
         return order_elem
 
-    def from_xml(elem):
+    @staticmethod
+    def from_ref_xml(elem, identity):
         id = int(elem.find("Id").text)
-        customer_elem = elem.find("Customer")
-        customer = Customer.from_xml(customer_elem)
-        items_elem = elem.find("Items")
-        items = [OrderItem.from_xml(item_elem) for item_elem in items_elem]
+        customer = identity.customers[int(elem.find("CustomerId").text)]
+        items = [OrderItem.from_ref_xml(item_elem, identity) for item_elem in elem.find("Items")]
         total_price = float(elem.find("TotalPrice").text)
         status = elem.find("Status").text
         return Order(id, customer, items, total_price, status)
 
 # 7. Отзывы
 class Feedback:
+    __slots__ = ('customer', 'product', 'rating', 'comment')
+    schema = (Nested('customer', 'Customer'), Nested('product', 'Product'), Field('rating', int),
+              Field('comment'))
+
     def __init__(self, customer, product, rating, comment):
         self.customer = customer
         self.product = product
         self.rating = rating
         self.comment = comment
 
-    def to_json(self):
+    def to_ref_json(self, identity):
+        identity.add_customer(self.customer)
+        identity.add_product(self.product)
         return {
-            'customer': self.customer.to_json(),
-            'product': self.product.to_json(),
+            'customer_id': self.customer.id,
+            'product_id': self.product.id,
             'rating': self.rating,
             'comment': self.comment
         }
 
-    def from_json(js):
-        customer = Customer.from_json(js['customer'])
-        product = Product.from_json(js['product'])
-        rating = js['rating']
-        comment = js['comment']
-        return Feedback(customer, product, rating, comment)
+    @staticmethod
+    def from_ref_json(js, identity):
+        customer = identity.customers[js['customer_id']]
+        product = identity.products[js['product_id']]
+        return Feedback(customer, product, js['rating'], js['comment'])
 
-    def to_xml(self):
+    def to_ref_xml(self, identity):
+        identity.add_customer(self.customer)
+        identity.add_product(self.product)
         feedback_elem = ET.Element("Feedback")
-        feedback_elem.append(self.customer.to_xml())
-        feedback_elem.append(self.product.to_xml())
+        ET.SubElement(feedback_elem, "CustomerId").text = str(self.customer.id)
+        ET.SubElement(feedback_elem, "ProductId").text = str(self.product.id)
         ET.SubElement(feedback_elem, "Rating").text = str(self.rating)
         ET.SubElement(feedback_elem, "Comment").text = self.comment
         return feedback_elem
 
-    def from_xml(elem):
-        customer_elem = elem.find("Customer")
-        customer = Customer.from_xml(customer_elem)
-        product_elem = elem.find("Product")
-        product = Product.from_xml(product_elem)
+    @staticmethod
+    def from_ref_xml(elem, identity):
+        customer = identity.customers[int(elem.find("CustomerId").text)]
+        product = identity.products[int(elem.find("ProductId").text)]
         rating = int(elem.find("Rating").text)
         comment = elem.find("Comment").text
         return Feedback(customer, product, rating, comment)
 
 # 8. Купоны
 class Coupon:
+    __slots__ = ('code', 'discount')
+    schema = (Field('code'), Field('discount', float))
+
     def __init__(self, code, discount):
         self.code = code
         self.discount = discount
 
-    def to_json(self):
-        return {
-            'code': self.code,
-            'discount': self.discount
-        }
-
-    def from_json(js):
-        return Coupon(js['code'], js['discount'])
-
-    def to_xml(self):
-        coupon_elem = ET.Element("Coupon")
-        ET.SubElement(coupon_elem, "Code").text = self.code
-        ET.SubElement(coupon_elem, "Discount").text = str(self.discount)
-        return coupon_elem
-
-    def from_xml(elem):
-        code = elem.find("Code").text
-        discount = float(elem.find("Discount").text)
-        return Coupon(code, discount)
-
 # 9. Список желаемого
 class Wishlist:
+    schema = (Field('id', int), Nested('customer', 'Customer'), Many('products', 'Product'))
+
     def __init__(self, id, customer, products):
         self.id = id
         self.customer = customer
         self.products = products
 
-    def to_json(self):
+    def to_ref_json(self, identity):
+        identity.add_customer(self.customer)
+        for product in self.products:
+            identity.add_product(product)
         return {
             'id': self.id,
-            'customer': self.customer.to_json(),
-            'products': [product.to_json() for product in self.products]
+            'customer_id': self.customer.id,
+            'product_ids': [product.id for product in self.products]
         }
 
-    def from_json(js):
-        id = js['id']
-        customer = Customer.from_json(js['customer'])
-        products = [Product.from_json(product) for product in js['products']]
-        return Wishlist(id, customer, products)
+    @staticmethod
+    def from_ref_json(js, identity):
+        customer = identity.customers[js['customer_id']]
+        products = [identity.products[product_id] for product_id in js['product_ids']]
+        return Wishlist(js['id'], customer, products)
 
-    def to_xml(self):
+    def to_ref_xml(self, identity):
+        identity.add_customer(self.customer)
         wishlist_elem = ET.Element("Wishlist")
         ET.SubElement(wishlist_elem, "Id").text = str(self.id)
-        wishlist_elem.append(self.customer.to_xml())
-        products_elem = ET.SubElement(wishlist_elem, "Products")
+        ET.SubElement(wishlist_elem, "CustomerId").text = str(self.customer.id)
+        products_elem = ET.SubElement(wishlist_elem, "ProductIds")
         for product in self.products:
-            products_elem.append(product.to_xml())
+            identity.add_product(product)
+            ET.SubElement(products_elem, "ProductId").text = str(product.id)
         return wishlist_elem
 
-    def from_xml(elem):
+    @staticmethod
+    def from_ref_xml(elem, identity):
         id = int(elem.find("Id").text)
-        customer_elem = elem.find("Customer")
-        customer = Customer.from_xml(customer_elem)
-        products_elem = elem.find("Products")
-        products = [Product.from_xml(product_elem) for product_elem in products_elem]
+        customer = identity.customers[int(elem.find("CustomerId").text)]
+        products = [identity.products[int(product_elem.text)] for product_elem in elem.find("ProductIds")]
         return Wishlist(id, customer, products)
 
 # 10. Инвентарь
 class Inventory:
+    schema = (Nested('product', 'Product'), Field('quantity', int))
+
     def __init__(self, product, quantity):
         self.product = product
         self.quantity = quantity
 
-    def to_json(self):
+    def to_ref_json(self, identity):
+        identity.add_product(self.product)
         return {
-            'product': self.product.to_json(),
+            'product_id': self.product.id,
             'quantity': self.quantity
         }
 
-    def from_json(js):
-        product = Product.from_json(js['product'])
-        quantity = js['quantity']
-        return Inventory(product, quantity)
+    @staticmethod
+    def from_ref_json(js, identity):
+        return Inventory(identity.products[js['product_id']], js['quantity'])
 
-    def to_xml(self):
+    def to_ref_xml(self, identity):
+        identity.add_product(self.product)
         inventory_elem = ET.Element("Inventory")
-        inventory_elem.append(self.product.to_xml())
+        ET.SubElement(inventory_elem, "ProductId").text = str(self.product.id)
         ET.SubElement(inventory_elem, "Quantity").text = str(self.quantity)
         return inventory_elem
 
-    def from_xml(elem):
-        product_elem = elem.find("Product")
-        product = Product.from_xml(product_elem)
+    @staticmethod
+    def from_ref_xml(elem, identity):
+        product = identity.products[int(elem.find("ProductId").text)]
         quantity = int(elem.find("Quantity").text)
         return Inventory(product, quantity)
 
-        # CRUD-функции для JSON
+# Сериализаторы to_json/from_json/to_xml/from_xml компилируются по схемам классов
+SCHEMA_CLASSES = (Product, Category, Admin, Customer, OrderItem, Order, Feedback, Coupon, Wishlist, Inventory)
+serializers.install(SCHEMA_CLASSES)
+
+# 11. Карта идентичности для нормализованного формата
+class IdentityMap:
+    """Таблицы сущностей по ID: каждая категория, товар и клиент хранятся один раз"""
+    def __init__(self):
+        self.categories = {}
+        self.products = {}
+        self.customers = {}
+
+    def add_category(self, category):
+        self.categories.setdefault(category.id, category)
+
+    def add_product(self, product):
+        if product.id not in self.products:
+            self.products[product.id] = product
+            self.add_category(product.category)
+
+    def add_customer(self, customer):
+        self.customers.setdefault(customer.id, customer)
+
+# CRUD-функции для JSON
+@metrics.timed("laba11.create_object_json")
 def create_object_json(filename, obj):
     """Добавить объект в JSON файл"""
     try:
@@ -349,6 +334,7 @@ def create_object_json(filename, obj):
     data.append(obj)
     save_to_json(filename, data)
 
+@metrics.timed("laba11.read_objects_json")
 def read_objects_json(filename):
     """Прочитать все объекты из JSON файла"""
     try:
@@ -356,6 +342,7 @@ def read_objects_json(filename):
     except FileNotFoundError:
         return []
 
+@metrics.timed("laba11.update_object_json")
 def update_object_json(filename, obj_id, updated_obj):
     """Обновить объект по ID в JSON файле"""
     data = read_objects_json(filename)
@@ -366,6 +353,7 @@ def update_object_json(filename, obj_id, updated_obj):
             return True
     return False
 
+@metrics.timed("laba11.delete_object_json")
 def delete_object_json(filename, obj_id):
     """Удалить объект по ID из JSON файла"""
     data = read_objects_json(filename)
@@ -373,6 +361,7 @@ def delete_object_json(filename, obj_id):
     save_to_json(filename, data)
 
 # CRUD-функции для XML
+@metrics.timed("laba11.create_object_xml")
 def create_object_xml(filename, obj):
     """Добавить объект в XML файл"""
     try:
@@ -382,6 +371,7 @@ def create_object_xml(filename, obj):
     root.append(obj)
     save_to_xml(filename, root)
 
+@metrics.timed("laba11.read_objects_xml")
 def read_objects_xml(filename):
     """Прочитать все объекты из XML файла"""
     try:
@@ -389,6 +379,7 @@ def read_objects_xml(filename):
     except FileNotFoundError:
         return []
 
+@metrics.timed("laba11.update_object_xml")
 def update_object_xml(filename, obj_id, updated_obj):
     """Обновить объект по ID в XML файле"""
     objects = read_objects_xml(filename)
@@ -399,93 +390,804 @@ def update_object_xml(filename, obj_id, updated_obj):
             return True
     return False
 
+@metrics.timed("laba11.delete_object_xml")
 def delete_object_xml(filename, obj_id):
     """Удалить объект по ID из XML файла"""
     objects = read_objects_xml(filename)
     objects = [obj for obj in objects if obj.id != obj_id]
     save_to_xml(filename, objects)
     
-    # CRUD-функции 
-def create_object_json(filename, obj):
-    """Добавить объект в JSON файл"""
+# Пакетные CRUD-функции: одно чтение и одна запись файла на весь пакет
+def as_updates(updates):
+    """Привести обновления к словарю ID -> объект"""
+    if hasattr(updates, 'items'):
+        return dict(updates.items())
+    return {obj.id: obj for obj in updates}
+
+def create_many(read, save, filename, objects):
+    """Добавить объекты с новыми ID; False для ID, уже бывших в файле или повторенных в пакете"""
+    data = read(filename)
+    known_ids = {obj.id for obj in data}
+    results = []
+    for obj in objects:
+        if obj.id in known_ids:
+            results.append(False)
+            continue
+        known_ids.add(obj.id)
+        data.append(obj)
+        results.append(True)
+    if any(results):
+        save(filename, data)
+    return results
+
+def update_many(read, save, filename, updates):
+    """Заменить объекты по ID за одну запись файла, вернуть ID -> найден ли объект"""
+    updates = as_updates(updates)
+    data = read(filename)
+    results = dict.fromkeys(updates, False)
+    for i, obj in enumerate(data):
+        updated_obj = updates.get(obj.id)
+        if updated_obj is not None:
+            data[i] = updated_obj
+            results[obj.id] = True
+    if any(results.values()):
+        save(filename, data)
+    return results
+
+def delete_many(read, save, filename, obj_ids):
+    """Удалить объекты по ID за одну запись файла, вернуть ID -> найден ли объект"""
+    obj_ids = set(obj_ids)
+    data = read(filename)
+    results = dict.fromkeys(obj_ids, False)
+    kept = []
+    for obj in data:
+        if obj.id in obj_ids:
+            results[obj.id] = True
+        else:
+            kept.append(obj)
+    if len(kept) != len(data):
+        save(filename, kept)
+    return results
+
+@metrics.timed("laba11.create_many_json")
+def create_many_json(filename, objects):
+    """Добавить пакет объектов в JSON файл, вернуть результат по каждому"""
+    return create_many(read_objects_json, save_to_json, filename, objects)
+
+@metrics.timed("laba11.update_many_json")
+def update_many_json(filename, updates):
+    """Обновить пакет объектов (ID -> объект или список объектов) в JSON файле"""
+    return update_many(read_objects_json, save_to_json, filename, updates)
+
+@metrics.timed("laba11.delete_many_json")
+def delete_many_json(filename, obj_ids):
+    """Удалить пакет объектов по ID из JSON файла"""
+    return delete_many(read_objects_json, save_to_json, filename, obj_ids)
+
+@metrics.timed("laba11.create_many_xml")
+def create_many_xml(filename, objects):
+    """Добавить пакет объектов в XML файл, вернуть результат по каждому"""
+    return create_many(read_objects_xml, save_to_xml, filename, objects)
+
+@metrics.timed("laba11.update_many_xml")
+def update_many_xml(filename, updates):
+    """Обновить пакет объектов (ID -> объект или список объектов) в XML файле"""
+    return update_many(read_objects_xml, save_to_xml, filename, updates)
+
+@metrics.timed("laba11.delete_many_xml")
+def delete_many_xml(filename, obj_ids):
+    """Удалить пакет объектов по ID из XML файла"""
+    return delete_many(read_objects_xml, save_to_xml, filename, obj_ids)
+
+# CRUD-функции для JSON Lines
+@metrics.timed("laba11.create_object_jsonl")
+def create_object_jsonl(filename, obj):
+    """Добавить объект в конец JSON Lines файла"""
+    # Если файл оборван на середине строки, новая запись начинается с новой строки
+    prefix = "" if ends_with_newline(filename) else "\n"
+    with filecodec.open_file(filename, 'a') as file:
+        file.write(prefix + to_jsonl_line(obj))
+
+def ends_with_newline(filename):
+    """Заканчивается ли файл переводом строки (пустой или отсутствующий файл — да)
+
+    Читается только последний байт. Конец сжатого файла без распаковки не узнать,
+    поэтому для непустого сжатого файла ответ всегда «нет»: лишняя пустая строка
+    безопасна, при чтении пустые строки пропускаются
+    """
     try:
-        data = load_from_json(filename)
+        if filecodec.is_compressed(filename):
+            return os.path.getsize(filename) == 0
+        with open(filename, 'rb') as file:
+            if file.seek(0, os.SEEK_END) == 0:
+                return True
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b"\n"
     except FileNotFoundError:
-        data = []
-    data.append(obj)
-    save_to_json(filename, data)
+        return True
 
-def read_objects_json(filename):
-    """Прочитать все объекты из JSON файла"""
+@metrics.timed("laba11.read_objects_jsonl")
+def read_objects_jsonl(filename):
+    """Прочитать все объекты из JSON Lines файла"""
     try:
-        return load_from_json(filename)
+        return load_from_jsonl(filename)
     except FileNotFoundError:
         return []
 
-def update_object_json(filename, obj_id, updated_obj):
-    """Обновить объект по ID в JSON файле"""
-    data = read_objects_json(filename)
-    for i, obj in enumerate(data):
-        if obj.id == obj_id:
-            data[i] = updated_obj
-            save_to_json(filename, data)
-            return True
-    return False
+def rewrite_lines_jsonl(filename, changes):
+    """Переписать файл построчно за один проход: changes — ID -> новый объект или None
+    (удалить); вернуть множество найденных ID"""
+    pending = dict(changes)
+    found = set()
+    tmp_filename = filecodec.tmp_name(filename)
+    try:
+        with filecodec.open_file(filename, 'r') as src, filecodec.open_file(tmp_filename, 'w') as dst:
+            for line in src:
+                if not line.strip():
+                    continue
+                if pending:
+                    obj_id = json.loads(line).get('id')
+                    if obj_id in pending:
+                        updated_obj = pending.pop(obj_id)
+                        found.add(obj_id)
+                        if updated_obj is not None:
+                            dst.write(to_jsonl_line(updated_obj))
+                        continue
+                dst.write(line)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+    if found:
+        os.replace(tmp_filename, filename)
+    else:
+        os.remove(tmp_filename)
+    return found
+
+@metrics.timed("laba11.update_object_jsonl")
+def update_object_jsonl(filename, obj_id, updated_obj):
+    """Обновить объект по ID в JSON Lines файле"""
+    try:
+        return obj_id in rewrite_lines_jsonl(filename, {obj_id: updated_obj})
+    except FileNotFoundError:
+        return False
 
-def delete_object_json(filename, obj_id):
-    """Удалить объект по ID из JSON файла"""
-    data = read_objects_json(filename)
-    data = [obj for obj in data if obj.id != obj_id]
-    save_to_json(filename, data)
+@metrics.timed("laba11.delete_object_jsonl")
+def delete_object_jsonl(filename, obj_id):
+    """Удалить объект по ID из JSON Lines файла"""
+    try:
+        return obj_id in rewrite_lines_jsonl(filename, {obj_id: None})
+    except FileNotFoundError:
+        return False
 
+@metrics.timed("laba11.create_many_jsonl")
+def create_many_jsonl(filename, objects):
+    """Дописать пакет объектов в JSON Lines файл одной записью, вернуть результат по каждому
+    (False для ID, уже бывших в файле или повторенных в пакете)"""
+    try:
+        known_ids = {record.get('id') for record in iter_jsonl_records(filename)}
+    except FileNotFoundError:
+        known_ids = set()
+    results = []
+    lines = []
+    for obj in objects:
+        if obj.id in known_ids:
+            results.append(False)
+            continue
+        known_ids.add(obj.id)
+        lines.append(to_jsonl_line(obj))
+        results.append(True)
+    if lines:
+        prefix = "" if ends_with_newline(filename) else "\n"
+        with filecodec.open_file(filename, 'a') as file:
+            file.write(prefix + "".join(lines))
+    return results
+
+@metrics.timed("laba11.update_many_jsonl")
+def update_many_jsonl(filename, updates):
+    """Обновить пакет объектов (ID -> объект или список объектов) за одну перезапись JSON Lines файла"""
+    updates = as_updates(updates)
+    try:
+        found = rewrite_lines_jsonl(filename, updates)
+    except FileNotFoundError:
+        found = set()
+    return {obj_id: obj_id in found for obj_id in updates}
 
-    # Пример объектов
-category = Category(1, "Electronics")
-product = Product(1, "Laptop", "A powerful laptop", 1000.0, category)
-customer = Customer(1, "John Doe", "john@example.com")
-order_item = OrderItem(product, 2)
-order = Order(1, customer, [order_item], 2000.0, "Pending")
+@metrics.timed("laba11.delete_many_jsonl")
+def delete_many_jsonl(filename, obj_ids):
+    """Удалить пакет объектов по ID за одну перезапись JSON Lines файла"""
+    obj_ids = set(obj_ids)
+    try:
+        found = rewrite_lines_jsonl(filename, dict.fromkeys(obj_ids))
+    except FileNotFoundError:
+        found = set()
+    return {obj_id: obj_id in found for obj_id in obj_ids}
 
 # Функции для работы с JSON файлами
 
-def load_from_json(filename):
-    with open(filename, 'r', encoding='utf-8') as file:
+def json_object_class(item):
+    """Класс объекта по набору полей словаря JSON"""
+    cls = JSON_FIELD_CLASSES.get(frozenset(item))
+    if cls is not None:
+        return cls
+    # Неполные записи распознаются по характерному полю
+    if 'status' in item:
+        return Order
+    if 'products' in item:
+        return Wishlist
+    if 'quantity' in item:
+        return Inventory
+    return Feedback
+
+def object_from_json(item):
+    """Восстановить объект из словаря JSON"""
+    return json_object_class(item).from_json(item)
+
+@metrics.timed("laba11.load_from_json")
+def load_from_json(filename, codec=None):
+    with filecodec.open_file(filename, 'r', codec) as file:
         data = json.load(file)
-        return [Order.from_json(item) if 'status' in item else Feedback.from_json(item) for item in data]
+        objects = [object_from_json(item) for item in data]
+    metrics.count_file(filename, len(objects))
+    return objects
+
+# Функции для работы с JSON Lines файлами (один объект на строку)
+
+def iter_from_jsonl(filename, codec=None):
+    """Потоково читает объекты из JSON Lines файла"""
+    with filecodec.open_file(filename, 'r', codec) as file:
+        for line in file:
+            if line.strip():
+                yield object_from_json(json.loads(line))
+
+@metrics.timed("laba11.load_from_jsonl")
+def load_from_jsonl(filename, codec=None):
+    objects = list(iter_from_jsonl(filename, codec))
+    metrics.count_file(filename, len(objects))
+    return objects
+
+def to_jsonl_line(obj):
+    """Сериализовать объект в одну строку JSON Lines"""
+    return json.dumps(obj.to_json(), ensure_ascii=False) + "\n"
+
+@metrics.timed("laba11.save_to_jsonl")
+def save_to_jsonl(filename, objects, codec=None, level=None):
+    count = 0
+    with filecodec.open_file(filename, 'w', codec, level) as file:
+        for obj in objects:
+            file.write(to_jsonl_line(obj))
+            count += 1
+    metrics.count_file(filename, count)
+
+
+# Классы объектов по имени (совпадает с тегом верхнего уровня в XML файле)
+OBJECT_CLASSES = {
+    "Order": Order,
+    "Feedback": Feedback,
+    "Wishlist": Wishlist,
+    "Product": Product,
+    "Category": Category,
+    "Customer": Customer,
+    "Admin": Admin,
+    "Coupon": Coupon,
+    "Inventory": Inventory,
+}
+
+# Набор полей записи JSON -> класс (наборы полей у классов верхнего уровня различаются)
+JSON_FIELD_CLASSES = {frozenset(field.name for field in cls.schema): cls for cls in OBJECT_CLASSES.values()}
+
+def iter_from_xml(filename, codec=None):
+    """Потоково читает объекты из XML файла, освобождая обработанные элементы"""
+    for elem in iter_xml_records(filename, codec):
+        yield OBJECT_CLASSES[elem.tag].from_xml(elem)
+
+@metrics.timed("laba11.load_from_xml")
+def load_from_xml(filename, codec=None):
+    objects = list(iter_from_xml(filename, codec))
+    metrics.count_file(filename, len(objects))
+    return objects
+
+# Запросы: фильтры и проекции проверяются по сырым записям во время потокового
+# разбора, объекты (с вложенными Customer/Product/Category) строятся только для
+# подходящих записей
+
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Размер куска при потоковом чтении JSON-массива
+JSON_CHUNK_SIZE = 1 << 16
+# Символы, которыми может заканчиваться неполное число
+JSON_NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+class JsonBuffer:
+    """Текст JSON файла, дочитываемый кусками по мере разбора"""
+    def __init__(self, file, chunk_size=JSON_CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.text = ''
+        self.pos = 0
+
+    def fill(self):
+        """Дочитать кусок, отбросив разобранное начало; False в конце файла
+
+        Кусок не меньше неразобранного остатка, поэтому большая запись
+        дочитывается за логарифмическое число повторных разборов
+        """
+        chunk = self.file.read(max(self.chunk_size, len(self.text) - self.pos))
+        if not chunk:
+            return False
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Следующий непробельный символ ('' в конце файла)"""
+        while True:
+            self.pos = JSON_WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text) or not self.fill():
+                return self.text[self.pos:self.pos + 1]
+
+    def decode(self, decoder):
+        """Разобрать значение с текущей позиции, дочитывая файл, пока оно не полное"""
+        self.peek()
+        # Число на границе куска могло прочитаться не целиком (1. или -3e): дочитываем,
+        # пока буфер кончается символом числа и файл не закончился
+        while self.text[-1:] in JSON_NUMBER_CHARS and self.fill():
+            pass
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            self.pos = end
+            return value
+
+# Теги XML и тип значения для пути запроса: (тег объекта, путь) -> (теги, тип) или None
+XML_PATHS = {}
+
+def iter_json_records(filename, codec=None, chunk_size=JSON_CHUNK_SIZE):
+    """Потоково разбирает JSON-массив по одному элементу, не создавая объектов
+
+    Файл читается кусками chunk_size символов, в памяти держится только неразобранный остаток
+    """
+    decoder = json.JSONDecoder()
+    with filecodec.open_file(filename, 'r', codec) as file:
+        buffer = JsonBuffer(file, chunk_size)
+        if buffer.peek() != '[':
+            raise ValueError(f"{filename}: ожидался JSON-массив")
+        buffer.pos += 1
+        if buffer.peek() == ']':
+            return
+        while True:
+            yield buffer.decode(decoder)
+            char = buffer.peek()
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"{filename}: ожидалась ',' или ']' в JSON-массиве")
+            buffer.pos += 1
+
+def iter_jsonl_records(filename, codec=None):
+    """Потоково читает записи JSON Lines файла как словари"""
+    with filecodec.open_file(filename, 'r', codec) as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+def iter_xml_records(filename, codec=None):
+    """Потоково выдает элементы объектов верхнего уровня XML файла"""
+    depth = 0
+    root = None
+    with filecodec.open_file(filename, 'rb', codec) as file:
+        for event, elem in ET.iterparse(file, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1:
+                yield elem
+                root.clear()
+
+def json_field(record, path):
+    """Значение поля записи JSON по пути ('customer', 'id') или None"""
+    value = record
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+def xml_path(tag, path):
+    """Теги XML и тип значения поля по пути из схемы класса объекта или None"""
+    key = (tag, path)
+    if key not in XML_PATHS:
+        cls = OBJECT_CLASSES.get(tag)
+        fields = None if cls is None else serializers.schema_path(cls, path)
+        if fields is None or not isinstance(fields[-1], serializers.Field):
+            XML_PATHS[key] = None
+        else:
+            XML_PATHS[key] = (tuple(field.tag for field in fields), fields[-1].type)
+    return XML_PATHS[key]
+
+def xml_field(elem, path):
+    """Значение поля элемента XML по пути ('customer', 'id') или None; тип берется из схемы"""
+    resolved = xml_path(elem.tag, path)
+    if resolved is None:
+        return None
+    tags, type = resolved
+    for tag in tags:
+        elem = elem.find(tag)
+        if elem is None:
+            return None
+    if elem.text is None:
+        return None
+    return type(elem.text)
+
+def matches(value, condition):
+    """Проверить значение: равенство, диапазон (от, до), множество значений или функция"""
+    if callable(condition):
+        return condition(value)
+    if isinstance(condition, tuple):
+        low, high = condition
+        return value is not None and (low is None or value >= low) and (high is None or value <= high)
+    if isinstance(condition, (set, frozenset, list)):
+        return value in condition
+    return value == condition
+
+def run_query(records, field, kind_of, build, where, fields, limit, kind):
+    """Отфильтровать записи, выдать объекты или проекции не более limit штук"""
+    if limit is not None and limit <= 0:
+        return
+    conditions = [(tuple(path.split('.')), condition) for path, condition in (where or {}).items()]
+    projection = None
+    if fields is not None:
+        projection = [(name, tuple(name.split('.'))) for name in fields]
+    found = 0
+    for record in records:
+        if kind is not None and kind_of(record) != kind:
+            continue
+        if not all(matches(field(record, path), condition) for path, condition in conditions):
+            continue
+        if projection is None:
+            yield build(record)
+        else:
+            yield {name: field(record, path) for name, path in projection}
+        found += 1
+        if limit is not None and found >= limit:
+            return
+
+@metrics.timed("laba11.query_json")
+def query_json(filename, where=None, fields=None, limit=None, kind=None, codec=None):
+    """Потоково выбрать объекты из JSON файла.
+
+    where — условия по полям, например {'status': 'Pending', 'customer.id': 42,
+    'total_price': (100, None)}; fields — список полей для проекции (тогда
+    выдаются словари, объекты не создаются); kind — имя класса ('Order');
+    codec — кодек сжатия, если его нельзя определить по расширению
+    """
+    try:
+        yield from run_query(iter_json_records(filename, codec), json_field,
+                             lambda record: json_object_class(record).__name__,
+                             object_from_json, where, fields, limit, kind)
+    except FileNotFoundError:
+        return
+
+@metrics.timed("laba11.query_jsonl")
+def query_jsonl(filename, where=None, fields=None, limit=None, kind=None, codec=None):
+    """Потоково выбрать объекты из JSON Lines файла (параметры как у query_json)"""
+    try:
+        yield from run_query(iter_jsonl_records(filename, codec), json_field,
+                             lambda record: json_object_class(record).__name__,
+                             object_from_json, where, fields, limit, kind)
+    except FileNotFoundError:
+        return
 
+@metrics.timed("laba11.query_xml")
+def query_xml(filename, where=None, fields=None, limit=None, kind=None, codec=None):
+    """Потоково выбрать объекты из XML файла (параметры как у query_json)"""
+    try:
+        yield from run_query(iter_xml_records(filename, codec), xml_field, lambda elem: elem.tag,
+                             lambda elem: OBJECT_CLASSES[elem.tag].from_xml(elem),
+                             where, fields, limit, kind)
+    except FileNotFoundError:
+        return
 
-def load_from_xml(filename):
-    tree = ET.parse(filename)
-    root = tree.getroot()
-    return [Order.from_xml(elem) for elem in root]
+# Нормализованный формат: таблицы сущностей и ссылки на них по ID
+
+@metrics.timed("laba11.save_to_json_normalized")
+def save_to_json_normalized(filename, objects, codec=None, level=None):
+    """Сохранить объекты с общими таблицами категорий, товаров и клиентов"""
+    identity = IdentityMap()
+    records = []
+    for obj in objects:
+        record = obj.to_ref_json(identity)
+        record['type'] = type(obj).__name__
+        records.append(record)
+    data = {
+        'categories': [category.to_json() for category in identity.categories.values()],
+        'products': [product.to_ref_json(identity) for product in identity.products.values()],
+        'customers': [customer.to_json() for customer in identity.customers.values()],
+        'objects': records
+    }
+    with filecodec.open_file(filename, 'w', codec, level) as file:
+        json.dump(data, file, ensure_ascii=False, indent=4)
+    metrics.count_file(filename, len(records))
+
+@metrics.timed("laba11.load_from_json_normalized")
+def load_from_json_normalized(filename, codec=None):
+    """Загрузить объекты из нормализованного JSON, создавая каждую сущность один раз"""
+    with filecodec.open_file(filename, 'r', codec) as file:
+        data = json.load(file)
+    identity = IdentityMap()
+    for js in data['categories']:
+        identity.add_category(Category.from_json(js))
+    for js in data['products']:
+        identity.add_product(Product.from_ref_json(js, identity))
+    for js in data['customers']:
+        identity.add_customer(Customer.from_json(js))
+    objects = [OBJECT_CLASSES[js['type']].from_ref_json(js, identity) for js in data['objects']]
+    metrics.count_file(filename, len(objects))
+    return objects
+
+@metrics.timed("laba11.save_to_xml_normalized")
+def save_to_xml_normalized(filename, objects, codec=None, level=None):
+    """Сохранить объекты в XML с общими таблицами сущностей"""
+    identity = IdentityMap()
+    records = [ET.tostring(obj.to_ref_xml(identity), encoding="unicode") for obj in objects]
+    with filecodec.open_file(filename, 'w', codec, level) as file:
+        file.write("<?xml version='1.0' encoding='utf-8'?>\n<Root><Categories>")
+        for category in identity.categories.values():
+            file.write(ET.tostring(category.to_xml(), encoding="unicode"))
+        file.write("</Categories><Products>")
+        for product in identity.products.values():
+            file.write(ET.tostring(product.to_ref_xml(identity), encoding="unicode"))
+        file.write("</Products><Customers>")
+        for customer in identity.customers.values():
+            file.write(ET.tostring(customer.to_xml(), encoding="unicode"))
+        file.write("</Customers><Objects>")
+        for record in records:
+            file.write(record)
+        file.write("</Objects></Root>")
+    metrics.count_file(filename, len(records))
+
+def iter_from_xml_normalized(filename, codec=None):
+    """Потоково читает объекты из нормализованного XML файла"""
+    identity = IdentityMap()
+    depth = 0
+    section = None
+    with filecodec.open_file(filename, 'rb', codec) as file:
+        for event, elem in ET.iterparse(file, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 2:
+                    section = elem
+                continue
+            depth -= 1
+            if depth != 2:
+                continue
+            if section.tag == "Categories":
+                identity.add_category(Category.from_xml(elem))
+            elif section.tag == "Products":
+                identity.add_product(Product.from_ref_xml(elem, identity))
+            elif section.tag == "Customers":
+                identity.add_customer(Customer.from_xml(elem))
+            else:
+                yield OBJECT_CLASSES[elem.tag].from_ref_xml(elem, identity)
+            section.clear()
+
+@metrics.timed("laba11.load_from_xml_normalized")
+def load_from_xml_normalized(filename, codec=None):
+    objects = list(iter_from_xml_normalized(filename, codec))
+    metrics.count_file(filename, len(objects))
+    return objects
 
 # Функции для сохранения объектов
-def save_to_json(filename, objects):
+@metrics.timed("laba11.save_to_json")
+def save_to_json(filename, objects, codec=None, level=None):
     try:
-        with open(filename, 'w', encoding='utf-8') as file:
-            json.dump([obj.to_json() for obj in objects], file, ensure_ascii=False, indent=4)
-        print(f"Данные успешно сохранены в {filename}")
+        with filecodec.open_file(filename, 'w', codec, level) as file:
+            records = [obj.to_json() for obj in objects]
+            json.dump(records, file, ensure_ascii=False, indent=4)
+        metrics.count_file(filename, len(records))
+        logger.info("Данные успешно сохранены в %s", filename)
     except Exception as e:
-        print(f"Ошибка при сохранении в {filename}: {e}")
-
-def save_to_xml(filename, objects):
-    root_elem = ET.Element("Root")
+        logger.error("Ошибка при сохранении в %s: %s", filename, e)
+        raise
+
+@metrics.timed("laba11.save_to_xml")
+def save_to_xml(filename, objects, codec=None, level=None):
+    """Потоково записывает объекты в XML файл по одному элементу"""
+    with filecodec.open_file(filename, 'w', codec, level) as file:
+        count = write_xml_objects(file, objects)
+    metrics.count_file(filename, count)
+
+def write_xml_objects(file, objects):
+    """Записать объекты в открытый файл как XML документ, вернуть их число"""
+    count = 0
+    file.write("<?xml version='1.0' encoding='utf-8'?>\n<Root>")
     for obj in objects:
-        root_elem.append(obj.to_xml())
-    tree = ET.ElementTree(root_elem)
-    tree.write(filename, encoding="utf-8", xml_declaration=True)
-
-# Сохранение данных
-save_to_json("orders.json", [order])
-save_to_xml("orders.xml", [order])
-
-# Пример загрузки из JSON
-loaded_orders = load_from_json("orders.json")
-for order in loaded_orders:
-    print(order.id, order.customer.name)
-
-# Пример загрузки из XML
-loaded_orders = load_from_xml("orders.xml")
-for order in loaded_orders:
-    print(order.id, order.customer.name)
-
+        file.write(ET.tostring(obj.to_xml(), encoding="unicode"))
+        count += 1
+    file.write("</Root>")
+    return count
+
+def fsync_file(filename):
+    """Сбросить содержимое закрытого файла на диск"""
+    fd = os.open(filename, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+# Журнальное хранилище для CRUD
+def typed_record(obj):
+    """Запись объекта с именем класса: {"type": "Order", "object": {...}}"""
+    return {'type': type(obj).__name__, 'object': obj.to_json()}
+
+def typed_object(record):
+    """Восстановить объект из записи typed_record"""
+    return OBJECT_CLASSES[record['type']].from_json(record['object'])
+
+class LogStore:
+    """Хранилище со снимком в формате JSON/XML и журналом изменений.
+
+    Изменения дописываются в журнал (filename + ".log") одной строкой,
+    fsync выполняется пачками по sync_every записей. compact() сворачивает
+    журнал в новый снимок, чтение воспроизводит снимок и хвост журнала.
+    """
+    def __init__(self, filename, fmt="json", sync_every=100):
+        self.filename = filename
+        self.fmt = fmt
+        self.log_filename = filename + ".log"
+        self.compacting_filename = filename + ".log.compacting"
+        self.sync_every = sync_every
+        self.unsynced = 0
+        self.lock = threading.Lock()
+        self.compact_lock = threading.Lock()
+        if os.path.exists(self.compacting_filename):
+            # Компактизация была прервана: доводим ее до конца
+            self.fold_log()
+        self.log_file = open(self.log_filename, 'a', encoding='utf-8')
+
+    @metrics.timed("laba11.logstore_create")
+    def create(self, obj):
+        self.append("create", obj.id, obj)
+
+    @metrics.timed("laba11.logstore_update")
+    def update(self, obj_id, updated_obj):
+        self.append("update", obj_id, updated_obj)
+
+    @metrics.timed("laba11.logstore_delete")
+    def delete(self, obj_id):
+        self.append("delete", obj_id, None)
+
+    def append(self, op, obj_id, obj):
+        """Дописать запись об изменении в журнал"""
+        record = {'op': op, 'id': obj_id}
+        if obj is not None:
+            record.update(typed_record(obj))
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        metrics.count(1, len(line.encode('utf-8')))
+        with self.lock:
+            self.log_file.write(line)
+            self.log_file.flush()
+            self.unsynced += 1
+            if self.unsynced >= self.sync_every:
+                self.sync_locked()
+
+    def sync(self):
+        """Сбросить журнал на диск"""
+        with self.lock:
+            self.sync_locked()
+
+    def sync_locked(self):
+        self.log_file.flush()
+        os.fsync(self.log_file.fileno())
+        self.unsynced = 0
+
+    def read_snapshot(self):
+        if self.fmt == "xml":
+            return read_objects_xml(self.filename)
+        return read_objects_json(self.filename)
+
+    def write_snapshot(self, objects):
+        """Записать снимок через временный файл: fsync, затем атомарная замена.
+
+        Ошибки записи не перехватываются: прежний снимок остается на месте
+        """
+        tmp_filename = filecodec.tmp_name(self.filename)
+        try:
+            if self.fmt == "xml":
+                save_to_xml(tmp_filename, objects)
+            else:
+                save_to_json(tmp_filename, objects)
+            fsync_file(tmp_filename)
+        except BaseException:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+            raise
+        os.replace(tmp_filename, self.filename)
+
+    def replay(self, log_filename, objects):
+        """Применить записи журнала к словарю объектов"""
+        try:
+            with open(log_filename, 'r', encoding='utf-8') as file:
+                for line in file:
+                    if not line.endswith("\n"):
+                        break  # Недописанная запись после сбоя
+                    record = json.loads(line)
+                    if record['op'] == "delete":
+                        objects.pop(record['id'], None)
+                    else:
+                        objects[record['id']] = typed_object(record)
+        except FileNotFoundError:
+            pass
+
+    def load_objects(self):
+        objects = {obj.id: obj for obj in self.read_snapshot()}
+        self.replay(self.compacting_filename, objects)
+        self.replay(self.log_filename, objects)
+        return objects
+
+    @metrics.timed("laba11.logstore_read")
+    def read(self):
+        """Прочитать все объекты: снимок плюс хвост журнала"""
+        with self.compact_lock:
+            objects = list(self.load_objects().values())
+        metrics.count(len(objects))
+        return objects
+
+    def fold_log(self):
+        """Свернуть отложенный журнал в снимок; журнал удаляется только после записи снимка"""
+        objects = {obj.id: obj for obj in self.read_snapshot()}
+        self.replay(self.compacting_filename, objects)
+        self.write_snapshot(objects.values())
+        os.remove(self.compacting_filename)
+
+    @metrics.timed("laba11.logstore_compact")
+    def compact(self):
+        """Свернуть журнал в новый снимок"""
+        with self.compact_lock:
+            # Текущий журнал откладываем, новые записи идут в свежий файл
+            with self.lock:
+                self.sync_locked()
+                self.log_file.close()
+                os.replace(self.log_filename, self.compacting_filename)
+                self.log_file = open(self.log_filename, 'a', encoding='utf-8')
+            self.fold_log()
+
+    def compact_in_background(self):
+        """Запустить компактизацию в фоновом потоке"""
+        thread = threading.Thread(target=self.compact, daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        with self.lock:
+            self.sync_locked()
+            self.log_file.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Пример объектов
+    category = Category(1, "Electronics")
+    product = Product(1, "Laptop", "A powerful laptop", 1000.0, category)
+    customer = Customer(1, "John Doe", "john@example.com")
+    order_item = OrderItem(product, 2)
+    order = Order(1, customer, [order_item], 2000.0, "Pending")
+
+    # Сохранение данных
+    save_to_json("orders.json", [order])
+    save_to_xml("orders.xml", [order])
+
+    # Пример загрузки из JSON
+    loaded_orders = load_from_json("orders.json")
+    for order in loaded_orders:
+        print(order.id, order.customer.name)
+
+    # Пример загрузки из XML
+    loaded_orders = load_from_xml("orders.xml")
+    for order in loaded_orders:
+        print(order.id, order.customer.name)
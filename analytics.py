@@ -0,0 +1,312 @@
+"""Аналитика продаж и склада на массивах NumPy.
+
+Выручка по категориям, самые продаваемые товары, стоимость склада
+(price * stock) и средний чек считаются векторными группировками
+(np.bincount) по массивам позиций заказов, а не циклами по
+Customer.orders и Order.items. Новые заказы добавляются инкрементально:
+накопленные суммы по товарам дополняются только по новым позициям.
+
+NumPy необязателен: без него массивы — списки Python, а те же операции
+выполняются циклами (результаты совпадают, скорость ниже).
+"""
+import heapq
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import snapshot
+
+# -------------------- Операции над массивами --------------------
+# dtype — int или float; с NumPy им соответствуют int64 и float64
+
+
+def numpy_dtype(dtype):
+    return np.int64 if dtype is int else np.float64
+
+
+def zeros(size, dtype):
+    """Массив из size нулей."""
+    if np is None:
+        return [dtype()] * size
+    return np.zeros(size, dtype=numpy_dtype(dtype))
+
+
+def to_array(values, dtype):
+    """Массив из итерируемых значений."""
+    if np is None:
+        return [dtype(value) for value in values]
+    return np.fromiter(values, dtype=numpy_dtype(dtype))
+
+
+def concat(values, extra, dtype):
+    """Массив values, дополненный значениями extra."""
+    if np is None:
+        return values + [dtype(value) for value in extra]
+    return np.concatenate([values, np.asarray(extra, dtype=numpy_dtype(dtype))])
+
+
+def grow(values, size, dtype):
+    """Дополняет массив нулями до длины size."""
+    if len(values) >= size:
+        return values
+    return concat(values, zeros(size - len(values), dtype), dtype)
+
+
+def bincount(indices, weights, size, dtype):
+    """Суммы weights по номерам indices: массив длины size."""
+    if np is None:
+        sums = [dtype()] * size
+        for index, weight in zip(indices, weights):
+            sums[index] += weight
+        return sums
+    return np.bincount(indices, weights=weights, minlength=size).astype(numpy_dtype(dtype))
+
+
+def add(values, other):
+    """Поэлементная сумма массивов одной длины."""
+    if np is None:
+        return [a + b for a, b in zip(values, other)]
+    return values + other
+
+
+def multiply(values, other):
+    """Поэлементное произведение массивов одной длины."""
+    if np is None:
+        return [a * b for a, b in zip(values, other)]
+    return values * other
+
+
+def take(values, indices):
+    """Значения values по номерам indices."""
+    if np is None:
+        return [values[index] for index in indices]
+    return values[indices]
+
+
+def total(values):
+    return float(sum(values) if np is None else values.sum())
+
+
+def segment_rows(offsets):
+    """Номер отрезка для каждого элемента по границам offsets: [0, 2, 3] -> [0, 0, 1]."""
+    if np is None:
+        return [row for row in range(len(offsets) - 1) for _ in range(offsets[row + 1] - offsets[row])]
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def top_rows(values, limit):
+    """Номера limit наибольших значений по убыванию; при равенстве первым идет меньший номер."""
+    limit = min(limit, len(values))
+    if limit == 0:
+        return []
+    if np is None:
+        return heapq.nlargest(limit, range(len(values)), key=values.__getitem__)
+    # Порог — limit-е по величине значение; из равных порогу берутся первые по номеру
+    threshold = np.partition(values, len(values) - limit)[len(values) - limit]
+    above = np.flatnonzero(values > threshold)
+    top = np.concatenate([above, np.flatnonzero(values == threshold)[:limit - len(above)]])
+    return top[np.argsort(-values[top], kind="stable")].tolist()
+
+
+def to_list(values):
+    return values if np is None else values.tolist()
+
+
+def column_array(snap, name, dtype):
+    """Копия колонки снимка в массив (mmap можно закрыть сразу после чтения)."""
+    if np is None:
+        return [dtype(value) for value in snap.column(name)]
+    storage = {"Q": np.uint64, "q": np.int64, "d": np.float64}[snap.sections[name][0]]
+    return np.frombuffer(snap.column(name), dtype=storage).astype(numpy_dtype(dtype))
+
+
+class SalesAnalytics:
+    """Накопленные агрегаты продаж и склада по товарам и категориям."""
+    def __init__(self):
+        self.category_keys = []
+        self.category_names = []
+        self.category_rows = {}
+        self.product_names = []
+        self.product_rows = {}
+        # Новые товары сначала копятся в списках и переносятся в массивы пачкой
+        self.new_categories = []
+        self.new_prices = []
+        self.new_stock = []
+        self.product_category = zeros(0, int)
+        self.prices = zeros(0, float)
+        self.stock = zeros(0, int)
+        self.units_sold = zeros(0, int)
+        self.product_revenue = zeros(0, float)
+        self.order_count = 0
+        self.order_revenue = 0.0
+
+    # -------------------- Регистрация товаров --------------------
+
+    def add_category(self, key, name):
+        """Регистрирует категорию и возвращает номер ее строки."""
+        row = self.category_rows.get(key)
+        if row is None:
+            row = len(self.category_names)
+            self.category_rows[key] = row
+            self.category_keys.append(key)
+            self.category_names.append(name)
+        return row
+
+    def add_product(self, key, name, category_row, price, stock=0):
+        """Регистрирует товар и возвращает номер его строки."""
+        row = self.product_rows.get(key)
+        if row is None:
+            row = len(self.product_names)
+            self.product_rows[key] = row
+            self.product_names.append(name)
+            self.new_categories.append(category_row)
+            self.new_prices.append(price)
+            self.new_stock.append(stock)
+        return row
+
+    def flush_products(self):
+        """Переносит зарегистрированные товары в массивы."""
+        if self.new_prices:
+            self.product_category = concat(self.product_category, self.new_categories, int)
+            self.prices = concat(self.prices, self.new_prices, float)
+            self.stock = concat(self.stock, self.new_stock, int)
+            self.new_categories = []
+            self.new_prices = []
+            self.new_stock = []
+        count = len(self.product_names)
+        self.units_sold = grow(self.units_sold, count, int)
+        self.product_revenue = grow(self.product_revenue, count, float)
+
+    # -------------------- Инкрементальное добавление продаж --------------------
+
+    def add_sales(self, item_products, item_quantities, item_revenue, order_totals):
+        """Добавляет пачку позиций заказов, заданных массивами, к накопленным суммам."""
+        self.flush_products()
+        count = len(self.product_names)
+        self.units_sold = add(self.units_sold, bincount(item_products, item_quantities, count, int))
+        self.product_revenue = add(self.product_revenue, bincount(item_products, item_revenue, count, float))
+        self.order_count += len(order_totals)
+        self.order_revenue += total(order_totals)
+
+    def add_laba1_orders(self, orders):
+        """Добавляет заказы Laba1; их товары должны быть уже зарегистрированы."""
+        orders = list(orders)
+        items = [item for order in orders for item in order.items]
+        rows = self.product_rows
+        self.add_sales(
+            to_array((rows[item.product.id] for item in items), int),
+            to_array((item.quantity for item in items), int),
+            to_array((item.total_price for item in items), float),
+            to_array((order.total for order in orders), float),
+        )
+
+    def add_laba11_orders(self, orders):
+        """Добавляет заказы Laba11, регистрируя новые товары и категории."""
+        orders = list(orders)
+        items = [item for order in orders for item in order.items]
+        for item in items:
+            product = item.product
+            if product.id not in self.product_rows:
+                category_row = self.add_category(product.category.id, product.category.name)
+                self.add_product(product.id, product.name, category_row, product.price)
+        rows = self.product_rows
+        self.add_sales(
+            to_array((rows[item.product.id] for item in items), int),
+            to_array((item.quantity for item in items), int),
+            to_array((item.product.price * item.quantity for item in items), float),
+            to_array((order.total_price for order in orders), float),
+        )
+
+    # -------------------- Построение --------------------
+
+    @classmethod
+    def from_laba1_store(cls, store):
+        """Строит аналитику по Laba1.Store: каталог, остатки и все заказы."""
+        analytics = cls()
+        store.hydrate()
+        for category in store.categories.values():
+            category_row = analytics.add_category(category.id, category.name)
+            for product in category.products.values():
+                analytics.add_product(product.id, product.name, category_row, product.price, product.stock)
+        analytics.add_laba1_orders(store.orders.values())
+        return analytics
+
+    @classmethod
+    def from_laba11_orders(cls, orders, inventory=()):
+        """Строит аналитику по списку заказов Laba11; остатки берутся из объектов Inventory."""
+        analytics = cls()
+        for record in inventory:
+            product = record.product
+            category_row = analytics.add_category(product.category.id, product.category.name)
+            analytics.add_product(product.id, product.name, category_row, product.price, record.quantity)
+        analytics.add_laba11_orders(orders)
+        return analytics
+
+    @classmethod
+    def from_laba1_snapshot(cls, filename):
+        """Строит аналитику прямо по колонкам бинарного снимка Laba1, без создания объектов."""
+        analytics = cls()
+        with snapshot.open_laba1_snapshot(filename) as snap:
+            category_count = snap.count("category.id")
+            for row in range(category_count):
+                analytics.add_category(snap.value("category.id", row), snap.value("category.name", row))
+            product_count = snap.count("product.id")
+            for row in range(product_count):
+                analytics.product_rows[snap.value("product.id", row)] = row
+                analytics.product_names.append(snap.value("product.name", row))
+
+            analytics.product_category = segment_rows(column_array(snap, "category.offsets", int))
+            analytics.prices = column_array(snap, "product.price", float)
+            analytics.stock = column_array(snap, "product.stock", int)
+
+            item_products = column_array(snap, "item.product", int)
+            item_quantities = column_array(snap, "item.quantity", int)
+            item_revenue = multiply(take(analytics.prices, item_products), item_quantities)
+            order_offsets = column_array(snap, "order.offsets", int)
+            order_totals = bincount(segment_rows(order_offsets), item_revenue, len(order_offsets) - 1, float)
+            analytics.add_sales(item_products, item_quantities, item_revenue, order_totals)
+        return analytics
+
+    def refresh_laba1_stock(self, store):
+        """Перечитывает остатки товаров из Laba1.Store."""
+        self.flush_products()
+        for product_id, product in store.products.items():
+            row = self.product_rows.get(product_id)
+            if row is not None:
+                self.stock[row] = product.stock
+
+    # -------------------- Запросы --------------------
+
+    def category_labels(self):
+        """Ключи результатов по категориям: (ID, название); названия могут повторяться."""
+        return list(zip(self.category_keys, self.category_names))
+
+    def revenue_by_category(self):
+        """Выручка по категориям: {(ID категории, название): сумма}."""
+        self.flush_products()
+        revenue = bincount(self.product_category, self.product_revenue, len(self.category_names), float)
+        return dict(zip(self.category_labels(), to_list(revenue)))
+
+    def top_selling_products(self, limit=10):
+        """Самые продаваемые товары: список (название, продано штук)."""
+        self.flush_products()
+        return [(self.product_names[row], int(self.units_sold[row])) for row in top_rows(self.units_sold, limit)]
+
+    def stock_valuation(self):
+        """Стоимость склада (price * stock): общая и {(ID категории, название): сумма}."""
+        self.flush_products()
+        values = multiply(self.prices, self.stock)
+        by_category = bincount(self.product_category, values, len(self.category_names), float)
+        return total(values), dict(zip(self.category_labels(), to_list(by_category)))
+
+    def average_order_value(self):
+        """Средняя сумма заказа."""
+        if self.order_count == 0:
+            return 0.0
+        return self.order_revenue / self.order_count
+
+    def __repr__(self):
+        return (f"SalesAnalytics(categories={len(self.category_names)}, products={len(self.product_names)}, "
+                f"orders={self.order_count})")
@@ -0,0 +1 @@
+"""Бенчмарки для модулей Laba1 и Laba11."""
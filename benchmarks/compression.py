@@ -0,0 +1,115 @@
+"""Бенчмарк сжатия файлов магазина: размер и скорость по кодекам и уровням.
+
+Для каждого формата (Laba1 JSON/XML, Laba11 JSON/XML/JSON Lines), кодека
+и уровня сохраняет и загружает синтетический магазин. Каждая строка
+вывода — JSON-объект с полями module, format, codec, level, entities,
+save_seconds, load_seconds, file_bytes, raw_bytes и ratio. При --bandwidth
+добавляется load_seconds_at_bandwidth: время загрузки плюс чтение файла
+с хранилища заданной пропускной способности (МБ/с), то есть оценка для
+медленного диска или NFS, где загрузка упирается в ввод-вывод.
+
+Запуск из корня репозитория:
+    python -m benchmarks.compression --sizes 10000 100000 --bandwidth 50
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import Laba1
+import Laba11
+from benchmarks.generator import StoreShape, generate_laba1_store, generate_laba11_orders
+from benchmarks.serialization import measure
+
+LEVELS = {"none": [None], "gzip": [1, 6, 9], "bz2": [1, 9], "lzma": [0, 1, 6]}
+
+
+def laba1_formats(store):
+    categories = list(store.categories.values())
+    customers = list(store.customers.values())
+    return [
+        ("json",
+         lambda filename, codec, level: Laba1.save_to_json(categories, customers, filename, codec, level),
+         lambda filename, codec: Laba1.load_from_json(filename, codec=codec)),
+        ("xml",
+         lambda filename, codec, level: Laba1.save_to_xml(categories, customers, filename, codec, level),
+         lambda filename, codec: Laba1.load_from_xml(filename, codec=codec)),
+    ]
+
+
+def laba11_formats(orders):
+    return [
+        ("json",
+         lambda filename, codec, level: Laba11.save_to_json(filename, orders, codec, level),
+         lambda filename, codec: Laba11.load_from_json(filename, codec)),
+        ("xml",
+         lambda filename, codec, level: Laba11.save_to_xml(filename, orders, codec, level),
+         lambda filename, codec: Laba11.load_from_xml(filename, codec)),
+        ("jsonl",
+         lambda filename, codec, level: Laba11.save_to_jsonl(filename, orders, codec, level),
+         lambda filename, codec: Laba11.load_from_jsonl(filename, codec)),
+    ]
+
+
+def run(entities, seed, codecs, bandwidth, output):
+    shape = StoreShape.from_entities(entities)
+    suites = [
+        ("Laba1", laba1_formats(generate_laba1_store(shape, seed))),
+        ("Laba11", laba11_formats(generate_laba11_orders(shape, seed))),
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        for module, formats in suites:
+            for fmt, save, load in formats:
+                raw_bytes = None
+                for codec in codecs:
+                    for level in LEVELS[codec]:
+                        filename = os.path.join(directory, f"{module}.{fmt}")
+                        _, save_seconds, _ = measure(lambda: save(filename, codec, level), False)
+                        _, load_seconds, _ = measure(lambda: load(filename, codec), False)
+                        file_bytes = os.path.getsize(filename)
+                        if codec == "none":
+                            raw_bytes = file_bytes
+                        record = {
+                            "module": module,
+                            "format": fmt,
+                            "codec": codec,
+                            "level": level,
+                            "entities": entities,
+                            "save_seconds": round(save_seconds, 6),
+                            "load_seconds": round(load_seconds, 6),
+                            "file_bytes": file_bytes,
+                            "raw_bytes": raw_bytes,
+                            "ratio": round(raw_bytes / file_bytes, 2) if raw_bytes else None,
+                        }
+                        if bandwidth:
+                            record["load_seconds_at_bandwidth"] = round(
+                                load_seconds + file_bytes / (bandwidth * 1024 * 1024), 6)
+                        output.write(json.dumps(record) + "\n")
+                        output.flush()
+                        os.remove(filename)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--codecs", nargs="+", choices=list(LEVELS), default=list(LEVELS),
+                        help="кодеки для сравнения (none — без сжатия, нужен для ratio)")
+    parser.add_argument("--bandwidth", type=float,
+                        help="пропускная способность хранилища в МБ/с для оценки загрузки")
+    parser.add_argument("--output", help="файл для результатов (по умолчанию stdout)")
+    args = parser.parse_args()
+    codecs = ["none"] + [codec for codec in args.codecs if codec != "none"]
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for entities in args.sizes:
+            run(entities, args.seed, codecs, args.bandwidth, output)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Детерминированный генератор синтетических магазинов для бенчмарков.
+
+Одинаковые параметры и seed всегда дают одинаковые данные, поэтому
+результаты разных запусков можно сравнивать между собой.
+"""
+import random
+
+import Laba1
+import Laba11
+
+
+class StoreShape:
+    """Размеры синтетического магазина."""
+    def __init__(self, categories, products, customers, orders_per_customer=3, items_per_order=3):
+        self.categories = categories
+        self.products = products
+        self.customers = customers
+        self.orders_per_customer = orders_per_customer
+        self.items_per_order = items_per_order
+
+    @classmethod
+    def from_entities(cls, entities):
+        """Форма магазина примерно из entities сущностей всех типов.
+
+        Около 35% товаров, 5% покупателей, 15% заказов и 45% позиций заказов.
+        """
+        return cls(
+            categories=max(1, entities // 1000),
+            products=max(1, entities * 35 // 100),
+            customers=max(1, entities // 20),
+        )
+
+    def __repr__(self):
+        return (f"StoreShape(categories={self.categories}, products={self.products}, "
+                f"customers={self.customers}, orders_per_customer={self.orders_per_customer}, "
+                f"items_per_order={self.items_per_order})")
+
+
+def count_between(rng, mean):
+    """Случайное число от 1 до 2 * mean - 1 со средним mean."""
+    return rng.randint(1, max(1, 2 * mean - 1))
+
+
+def generate_laba1_store(shape, seed=0):
+    """Строит Laba1.Store с категориями, товарами, покупателями и заказами."""
+    rng = random.Random(seed)
+    store = Laba1.Store()
+
+    categories = []
+    for i in range(shape.categories):
+        category = Laba1.Category(f"Категория {i}")
+        store.add_category(category)
+        categories.append(category)
+
+    products = []
+    for i in range(shape.products):
+        product = Laba1.Product(
+            f"Товар {i}",
+            f"Описание товара {i}",
+            round(rng.uniform(10, 100000), 2),
+            rng.randint(0, 1000)
+        )
+        categories[i % len(categories)].add_product(product)
+        products.append(product)
+
+    for i in range(shape.customers):
+        customer = Laba1.Customer(f"Покупатель {i}", f"customer{i}@example.com")
+        store.add_customer(customer)
+        for _ in range(rng.randint(0, 2 * shape.orders_per_customer)):
+            order = Laba1.Order(customer)
+            for _ in range(count_between(rng, shape.items_per_order)):
+                order.restore_item(rng.choice(products), rng.randint(1, 5))
+            customer.place_order(order)
+
+    return store
+
+
+def generate_laba11_orders(shape, seed=0):
+    """Строит список заказов Laba11 с общими товарами, категориями и клиентами."""
+    rng = random.Random(seed)
+    categories = [Laba11.Category(i + 1, f"Категория {i}") for i in range(shape.categories)]
+    products = [
+        Laba11.Product(i + 1, f"Товар {i}", f"Описание товара {i}",
+                       round(rng.uniform(10, 100000), 2), categories[i % len(categories)])
+        for i in range(shape.products)
+    ]
+    customers = [
+        Laba11.Customer(i + 1, f"Покупатель {i}", f"customer{i}@example.com")
+        for i in range(shape.customers)
+    ]
+
+    orders = []
+    for customer in customers:
+        for _ in range(rng.randint(0, 2 * shape.orders_per_customer)):
+            items = [
+                Laba11.OrderItem(rng.choice(products), rng.randint(1, 5))
+                for _ in range(count_between(rng, shape.items_per_order))
+            ]
+            total_price = sum(item.product.price * item.quantity for item in items)
+            orders.append(Laba11.Order(len(orders) + 1, customer, items, total_price, "Pending"))
+
+    return orders
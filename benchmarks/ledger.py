@@ -0,0 +1,75 @@
+"""Журнал склада Laba1: скорость записи событий и восстановления остатков.
+
+Замеряет резервирование товаров с журналом в файле, пакетное пополнение
+и восстановление остатков: полным проигрыванием журнала и по снимку
+с проигрыванием только хвоста.
+
+Запуск из корня репозитория:
+    python -m benchmarks.ledger --products 10000 --events 200000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from Laba1 import Category, Inventory, Product, Store
+
+
+def make_store(products, stock):
+    store = Store()
+    category = Category("Бенчмарк")
+    store.add_category(category)
+    for i in range(products):
+        category.add_product(Product(f"Товар {i}", "", 10.0, stock))
+    return store
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run(products, events, snapshot_every, seed):
+    rng = random.Random(seed)
+    store = make_store(products, events)
+    catalog = list(store.products.values())
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "inventory.log")
+        inventory = Inventory(filename, snapshot_every)
+        inventory.attach(store)
+
+        picks = [rng.choice(catalog) for _ in range(events)]
+        _, seconds = timed(lambda: [product.reserve(1) for product in picks])
+        print(f"резервирование: событий={events} время={seconds:.3f}с событий/с={events / seconds:.0f}")
+
+        rows = [(product.id, 1) for product in catalog]
+        _, seconds = timed(lambda: inventory.restock_many(rows))
+        print(f"пакетное пополнение: товаров={len(rows)} время={seconds:.3f}с")
+        inventory.file.flush()
+
+        expected = dict(inventory.levels)
+        restored, seconds = timed(lambda: Inventory.restore(filename, snapshot_every))
+        print(f"восстановление по снимку: хвост={restored.since_snapshot} событий время={seconds:.3f}с")
+        os.remove(filename + ".snapshot")
+        full, full_seconds = timed(lambda: Inventory.restore(filename, snapshot_every))
+        print(f"восстановление без снимка: событий={full.since_snapshot} время={full_seconds:.3f}с")
+        if restored.levels != expected or full.levels != expected:
+            raise AssertionError("Восстановленные остатки не совпадают с журналом.")
+        for ledger in (inventory, restored, full):
+            ledger.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--snapshot-every", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.products, args.events, args.snapshot_every, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Память на одну сущность для классов Laba1 и Laba11: __slots__ против __dict__.
+
+Для сравнения «до» строится копия каждого класса без __slots__, у которой
+экземпляры хранят атрибуты в __dict__. Замеры делаются через tracemalloc
+на синтетическом каталоге.
+
+Запуск из корня репозитория:
+    python -m benchmarks.memory --count 100000
+"""
+import argparse
+import gc
+import tracemalloc
+
+import Laba1
+import Laba11
+
+
+def unslotted(cls):
+    """Копия класса без __slots__ — экземпляры хранят атрибуты в __dict__."""
+    namespace = {
+        key: value for key, value in vars(cls).items()
+        if key not in cls.__slots__ and key not in ("__slots__", "__dict__", "__weakref__")
+    }
+    return type(cls.__name__, (), namespace)
+
+
+def laba1_factories(classes):
+    customer = Laba1.Customer("Покупатель", "customer@example.com")
+    product = Laba1.Product("Товар", "Описание", 10.0, 10 ** 9)
+    return {
+        "Product": lambda i: classes["Product"](f"Товар {i}", "Описание", 10.0, 5),
+        "Category": lambda i: classes["Category"](f"Категория {i}"),
+        "Customer": lambda i: classes["Customer"](f"Покупатель {i}", f"c{i}@example.com"),
+        "Order": lambda i: classes["Order"](customer),
+        "OrderItem": lambda i: classes["OrderItem"](product, 1 + i % 5),
+        "Feedback": lambda i: classes["Feedback"](customer, product, "Отзыв"),
+        "Coupon": lambda i: classes["Coupon"](f"CODE{i}", 10),
+    }
+
+
+def laba11_factories(classes):
+    category = Laba11.Category(1, "Категория")
+    customer = Laba11.Customer(1, "Покупатель", "customer@example.com")
+    product = Laba11.Product(1, "Товар", "Описание", 10.0, category)
+    return {
+        "Product": lambda i: classes["Product"](i, f"Товар {i}", "Описание", 10.0, category),
+        "Category": lambda i: classes["Category"](i, f"Категория {i}"),
+        "Customer": lambda i: classes["Customer"](i, f"Покупатель {i}", f"c{i}@example.com"),
+        "Order": lambda i: classes["Order"](i, customer, [], 0.0, "Pending"),
+        "OrderItem": lambda i: classes["OrderItem"](product, 1 + i % 5),
+        "Feedback": lambda i: classes["Feedback"](customer, product, 5, "Отзыв"),
+        "Coupon": lambda i: classes["Coupon"](f"CODE{i}", 10.0),
+    }
+
+
+def measure(factory, count):
+    """Средний прирост памяти в байтах на один созданный объект."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+def run(module, make_factories, count):
+    names = ["Product", "Category", "Customer", "Order", "OrderItem", "Feedback", "Coupon"]
+    slotted = {name: getattr(module, name) for name in names}
+    plain = {name: unslotted(cls) for name, cls in slotted.items()}
+    slotted_factories = make_factories(slotted)
+    plain_factories = make_factories(plain)
+    results = []
+    for name in names:
+        before = measure(plain_factories[name], count)
+        after = measure(slotted_factories[name], count)
+        results.append((module.__name__, name, before, after))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'модуль':<8} {'класс':<10} {'__dict__, Б':>12} {'__slots__, Б':>13} {'экономия':>9}")
+    for module, make_factories in ((Laba1, laba1_factories), (Laba11, laba11_factories)):
+        for module_name, name, before, after in run(module, make_factories, args.count):
+            saving = 100 * (before - after) / before
+            print(f"{module_name:<8} {name:<10} {before:>12.1f} {after:>13.1f} {saving:>8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
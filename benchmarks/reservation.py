@@ -0,0 +1,72 @@
+"""Пропускная способность резервирования товаров в Laba1 под пулом потоков.
+
+Запуск из корня репозитория:
+    python -m benchmarks.reservation --threads 1 2 4 8 --orders 20000
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Laba1 import Customer, Order, Product
+
+
+def make_catalog(products, stock):
+    return [Product(f"Товар {i}", "", 10.0, stock) for i in range(products)]
+
+
+def place_orders(catalog, customer, orders, cart_size, seed):
+    """Оформляет заказы со случайными корзинами, возвращает число успешных."""
+    rng = random.Random(seed)
+    placed = 0
+    for _ in range(orders):
+        cart = [(rng.choice(catalog), rng.randint(1, 3)) for _ in range(cart_size)]
+        order = Order(customer)
+        try:
+            order.add_items(cart)
+        except ValueError:
+            continue
+        customer.place_order(order)
+        placed += 1
+    return placed
+
+
+def run(threads, orders, products, stock, cart_size):
+    catalog = make_catalog(products, stock)
+    customer = Customer("Бенчмарк", "bench@example.com")
+    per_thread = orders // threads
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [
+            pool.submit(place_orders, catalog, customer, per_thread, cart_size, seed)
+            for seed in range(threads)
+        ]
+        placed = sum(future.result() for future in futures)
+    elapsed = time.perf_counter() - start
+
+    # Проверка: списанный остаток совпадает с суммой позиций заказов
+    reserved = sum(item.quantity for order in customer.orders for item in order.items)
+    remaining = sum(product.stock for product in catalog)
+    if reserved + remaining != products * stock or remaining < 0:
+        raise AssertionError("Остатки на складе не сходятся с заказами.")
+    return placed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--stock", type=int, default=50)
+    parser.add_argument("--cart-size", type=int, default=3)
+    args = parser.parse_args()
+
+    for threads in args.threads:
+        placed, elapsed = run(threads, args.orders, args.products, args.stock, args.cart_size)
+        print(f"потоков={threads} заказов={placed} время={elapsed:.3f}с "
+              f"заказов/с={placed / elapsed:.0f}")
+
+
+if __name__ == "__main__":
+    main()
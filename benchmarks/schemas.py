@@ -0,0 +1,278 @@
+"""Пропускная способность сериализаторов Laba11: по схемам против написанных вручную.
+
+Для сравнения «до» здесь сохранены прежние методы to_json/from_json/
+to_xml/from_xml классов заказа (Order, OrderItem, Customer, Product,
+Category) в виде функций. Обе реализации прогоняются на одних и тех же
+синтетических заказах; результаты проверяются на совпадение. Каждая
+строка вывода — JSON-объект с полями operation, implementation, objects,
+seconds и objects_per_second.
+
+Запуск из корня репозитория:
+    python -m benchmarks.schemas --entities 100000 --repeat 5
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+from xml.etree import ElementTree as ET
+
+import Laba11
+from benchmarks.generator import StoreShape, generate_laba11_orders
+
+
+# -------------------- Прежние методы, написанные вручную --------------------
+
+def category_to_json(self):
+    return {
+        'id': self.id,
+        'name': self.name
+    }
+
+
+def category_from_json(js):
+    return Laba11.Category(js['id'], js['name'])
+
+
+def category_to_xml(self):
+    category_elem = ET.Element("Category")
+    ET.SubElement(category_elem, "Id").text = str(self.id)
+    ET.SubElement(category_elem, "Name").text = self.name
+    return category_elem
+
+
+def category_from_xml(elem):
+    id = int(elem.find("Id").text)
+    name = elem.find("Name").text
+    return Laba11.Category(id, name)
+
+
+def product_to_json(self):
+    return {
+        'id': self.id,
+        'name': self.name,
+        'description': self.description,
+        'price': self.price,
+        'category': category_to_json(self.category)
+    }
+
+
+def product_from_json(js):
+    id = js['id']
+    name = js['name']
+    description = js['description']
+    price = js['price']
+    category = category_from_json(js['category'])
+    return Laba11.Product(id, name, description, price, category)
+
+
+def product_to_xml(self):
+    product_elem = ET.Element("Product")
+    ET.SubElement(product_elem, "Id").text = str(self.id)
+    ET.SubElement(product_elem, "Name").text = self.name
+    ET.SubElement(product_elem, "Description").text = self.description
+    ET.SubElement(product_elem, "Price").text = str(self.price)
+    product_elem.append(category_to_xml(self.category))
+    return product_elem
+
+
+def product_from_xml(elem):
+    id = int(elem.find("Id").text)
+    name = elem.find("Name").text
+    description = elem.find("Description").text
+    price = float(elem.find("Price").text)
+    category_elem = elem.find("Category")
+    category = category_from_xml(category_elem)
+    return Laba11.Product(id, name, description, price, category)
+
+
+def customer_to_json(self):
+    return {
+        'id': self.id,
+        'name': self.name,
+        'email': self.email
+    }
+
+
+def customer_from_json(js):
+    return Laba11.Customer(js['id'], js['name'], js['email'])
+
+
+def customer_to_xml(self):
+    customer_elem = ET.Element("Customer")
+    ET.SubElement(customer_elem, "Id").text = str(self.id)
+    ET.SubElement(customer_elem, "Name").text = self.name
+    ET.SubElement(customer_elem, "Email").text = self.email
+    return customer_elem
+
+
+def customer_from_xml(elem):
+    id = int(elem.find("Id").text)
+    name = elem.find("Name").text
+    email = elem.find("Email").text
+    return Laba11.Customer(id, name, email)
+
+
+def order_item_to_json(self):
+    return {
+        'product': product_to_json(self.product),
+        'quantity': self.quantity
+    }
+
+
+def order_item_from_json(js):
+    product = product_from_json(js['product'])
+    quantity = js['quantity']
+    return Laba11.OrderItem(product, quantity)
+
+
+def order_item_to_xml(self):
+    order_item_elem = ET.Element("OrderItem")
+    order_item_elem.append(product_to_xml(self.product))
+    ET.SubElement(order_item_elem, "Quantity").text = str(self.quantity)
+    return order_item_elem
+
+
+def order_item_from_xml(elem):
+    product_elem = elem.find("Product")
+    product = product_from_xml(product_elem)
+    quantity = int(elem.find("Quantity").text)
+    return Laba11.OrderItem(product, quantity)
+
+
+def order_to_json(self):
+    return {
+        'id': self.id,
+        'customer': customer_to_json(self.customer),
+        'items': [order_item_to_json(item) for item in self.items],
+        'total_price': self.total_price,
+        'status': self.status
+    }
+
+
+def order_from_json(js):
+    id = js['id']
+    customer = customer_from_json(js['customer'])
+    items = [order_item_from_json(item) for item in js['items']]
+    total_price = js['total_price']
+    status = js['status']
+    return Laba11.Order(id, customer, items, total_price, status)
+
+
+def order_to_xml(self):
+    order_elem = ET.Element("Order")
+    ET.SubElement(order_elem, "Id").text = str(self.id)
+    order_elem.append(customer_to_xml(self.customer))
+    items_elem = ET.SubElement(order_elem, "Items")
+    for item in self.items:
+        items_elem.append(order_item_to_xml(item))
+    ET.SubElement(order_elem, "TotalPrice").text = str(self.total_price)
+    ET.SubElement(order_elem, "Status").text = self.status
+    return order_elem
+
+
+def order_from_xml(elem):
+    id = int(elem.find("Id").text)
+    customer_elem = elem.find("Customer")
+    customer = customer_from_xml(customer_elem)
+    items_elem = elem.find("Items")
+    items = [order_item_from_xml(item_elem) for item_elem in items_elem]
+    total_price = float(elem.find("TotalPrice").text)
+    status = elem.find("Status").text
+    return Laba11.Order(id, customer, items, total_price, status)
+
+
+HANDWRITTEN = {
+    "to_json": order_to_json,
+    "from_json": order_from_json,
+    "to_xml": order_to_xml,
+    "from_xml": order_from_xml,
+}
+
+COMPILED = {
+    "to_json": Laba11.Order.to_json,
+    "from_json": Laba11.Order.from_json,
+    "to_xml": Laba11.Order.to_xml,
+    "from_xml": Laba11.Order.from_xml,
+}
+
+
+# -------------------- Замеры --------------------
+
+def best_time(func, inputs, repeat):
+    """Лучшее время из repeat прогонов func по всем inputs; возвращает (секунды, результаты).
+
+    Сборщик мусора на время замера отключается: иначе его проходы по
+    миллионам созданных объектов случайно попадают в одну из реализаций.
+    """
+    best = None
+    results = None
+    for _ in range(repeat):
+        results = None
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            results = [func(value) for value in inputs]
+            seconds = time.perf_counter() - start
+        finally:
+            gc.enable()
+        best = seconds if best is None else min(best, seconds)
+    return best, results
+
+
+def check_same(operation, expected, actual):
+    """Проверяет, что обе реализации дают одинаковый результат."""
+    if operation == "to_json":
+        same = expected == actual
+    elif operation == "to_xml":
+        same = [ET.tostring(elem) for elem in expected] == [ET.tostring(elem) for elem in actual]
+    else:
+        same = [order_to_json(obj) for obj in expected] == [order_to_json(obj) for obj in actual]
+    if not same:
+        raise AssertionError(f"{operation}: результаты реализаций различаются")
+
+
+def run(entities, seed, repeat, output):
+    orders = generate_laba11_orders(StoreShape.from_entities(entities), seed)
+    inputs = {
+        "to_json": orders,
+        "from_json": [order_to_json(order) for order in orders],
+        "to_xml": orders,
+        "from_xml": [ET.fromstring(ET.tostring(order_to_xml(order))) for order in orders],
+    }
+    for operation in ("to_json", "from_json", "to_xml", "from_xml"):
+        results = {}
+        for implementation, functions in (("handwritten", HANDWRITTEN), ("compiled", COMPILED)):
+            seconds, results[implementation] = best_time(functions[operation], inputs[operation], repeat)
+            record = {
+                "operation": operation,
+                "implementation": implementation,
+                "objects": len(orders),
+                "seconds": round(seconds, 6),
+                "objects_per_second": round(len(orders) / seconds) if seconds else None,
+            }
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+        check_same(operation, results["handwritten"], results["compiled"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, nargs="+", default=[100000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="файл для результатов (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for entities in args.entities:
+            run(entities, args.seed, args.repeat, output)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
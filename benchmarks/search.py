@@ -0,0 +1,100 @@
+"""Поиск товаров Laba1: построение индекса и задержка запросов по размеру каталога.
+
+Каталог генерируется детерминированно: названия и описания составлены из
+словаря псевдослов с неравномерной частотой (частые слова встречаются
+в десятках тысяч товаров, редкие — в единицах), а уникальный артикул в
+названии каждого товара растит словарь вместе с каталогом. Для каждого размера
+выводится время построения индекса, затем по каждому виду запросов
+(одно слово, два слова, префикс, фильтр по категории, только в наличии)
+медиана, 99-й перцентиль и максимум задержки в миллисекундах.
+
+Запуск из корня репозитория:
+    python -m benchmarks.search --sizes 100000 300000 1000000
+"""
+import argparse
+import random
+import time
+
+import search
+from Laba1 import Category, Product
+
+SYLLABLES = ["ка", "ро", "ми", "то", "ла", "не", "су", "пе", "бо", "ви", "да", "ге", "жу", "зо", "ли",
+             "му", "ны", "ор", "пу", "ре", "си", "ту", "фа", "хе", "це", "ча", "ша", "эр", "юн", "яр"]
+
+
+def make_vocabulary(rng):
+    words = {a + b for a in SYLLABLES for b in SYLLABLES}
+    words |= {a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES}
+    words = sorted(words)
+    rng.shuffle(words)
+    return words
+
+
+def pick(rng, vocabulary):
+    """Слово со смещением к началу словаря: первые слова намного частотнее."""
+    return vocabulary[int(len(vocabulary) * rng.random() ** 3)]
+
+
+def make_catalog(size, seed):
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    categories = [Category(f"Категория {i}", id=i) for i in range(max(1, size // 1000))]
+    catalog = []
+    for i in range(size):
+        # Артикул в названии уникален: словарь растет вместе с каталогом
+        name = " ".join(pick(rng, vocabulary) for _ in range(3)) + f" арт{i}"
+        description = " ".join(pick(rng, vocabulary) for _ in range(8))
+        product = Product(name, description, 10.0, rng.randint(0, 5), id=i + 1)
+        catalog.append((product, rng.choice(categories)))
+    return catalog
+
+
+def make_queries(catalog, count, seed):
+    rng = random.Random(seed)
+    queries = {"одно слово": [], "два слова": [], "префикс": [], "категория": [], "в наличии": []}
+    for _ in range(count):
+        product, category = rng.choice(catalog)
+        words = search.tokenize(product.name)
+        queries["одно слово"].append(((words[0],), {"prefix": False}))
+        queries["два слова"].append(((" ".join(words[:2]),), {"prefix": False}))
+        queries["префикс"].append(((words[0] + " " + words[1][:3],), {}))
+        queries["категория"].append(((words[0],), {"category_id": category.id, "prefix": False}))
+        queries["в наличии"].append(((words[0],), {"in_stock": True, "prefix": False}))
+    return queries
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(size, queries_count, seed):
+    catalog = make_catalog(size, seed)
+    index = search.ProductSearch()
+    start = time.perf_counter()
+    for product, category in catalog:
+        index.product_added(product, category)
+    print(f"товаров={size} построение={time.perf_counter() - start:.2f}с слов={len(index.postings)}")
+
+    for kind, queries in make_queries(catalog, queries_count, seed).items():
+        latencies = []
+        for args, kwargs in queries:
+            start = time.perf_counter()
+            index.search(*args, **kwargs)
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"  {kind}: медиана={percentile(latencies, 0.5):.3f}мс "
+              f"p99={percentile(latencies, 0.99):.3f}мс макс={max(latencies):.3f}мс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 300000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.queries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
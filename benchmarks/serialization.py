@@ -0,0 +1,122 @@
+"""Бенчмарк сохранения, загрузки и CRUD-функций Laba1 и Laba11.
+
+Каждая строка вывода — JSON-объект с полями module, operation, entities,
+seconds, peak_bytes и file_bytes, что удобно для сравнения между запусками.
+
+Запуск из корня репозитория:
+    python -m benchmarks.serialization --sizes 1000 10000 100000 --output bench.jsonl
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import Laba1
+import Laba11
+from benchmarks.generator import StoreShape, generate_laba1_store, generate_laba11_orders
+
+
+def measure(operation, trace_memory=True):
+    """Выполняет операцию, возвращает (результат, секунды, пик памяти в байтах)."""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = operation()
+        seconds = time.perf_counter() - start
+        peak = 0
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+def file_size(filename):
+    return os.path.getsize(filename) if os.path.exists(filename) else 0
+
+
+def laba1_cases(store, directory):
+    categories = list(store.categories.values())
+    customers = list(store.customers.values())
+    json_file = os.path.join(directory, "store_data.json")
+    xml_file = os.path.join(directory, "store_data.xml")
+    return [
+        ("save_to_json", lambda: Laba1.save_to_json(categories, customers, json_file), json_file),
+        ("load_from_json", lambda: Laba1.load_from_json(json_file), json_file),
+        ("save_to_xml", lambda: Laba1.save_to_xml(categories, customers, xml_file), xml_file),
+        ("load_from_xml", lambda: Laba1.load_from_xml(xml_file), xml_file),
+    ]
+
+
+def laba11_cases(orders, directory):
+    json_file = os.path.join(directory, "orders.json")
+    xml_file = os.path.join(directory, "orders.xml")
+    jsonl_file = os.path.join(directory, "orders.jsonl")
+    first = orders[0]
+    batch = orders[:100]
+    return [
+        ("save_to_json", lambda: Laba11.save_to_json(json_file, orders), json_file),
+        ("load_from_json", lambda: Laba11.load_from_json(json_file), json_file),
+        ("create_object_json", lambda: Laba11.create_object_json(json_file, first), json_file),
+        ("update_object_json", lambda: Laba11.update_object_json(json_file, first.id, first), json_file),
+        ("delete_object_json", lambda: Laba11.delete_object_json(json_file, first.id), json_file),
+        ("update_many_json", lambda: Laba11.update_many_json(json_file, batch), json_file),
+        ("save_to_xml", lambda: Laba11.save_to_xml(xml_file, orders), xml_file),
+        ("load_from_xml", lambda: Laba11.load_from_xml(xml_file), xml_file),
+        ("create_object_xml", lambda: Laba11.create_object_xml(xml_file, first), xml_file),
+        ("update_object_xml", lambda: Laba11.update_object_xml(xml_file, first.id, first), xml_file),
+        ("delete_object_xml", lambda: Laba11.delete_object_xml(xml_file, first.id), xml_file),
+        ("update_many_xml", lambda: Laba11.update_many_xml(xml_file, batch), xml_file),
+        ("save_to_jsonl", lambda: Laba11.save_to_jsonl(jsonl_file, orders), jsonl_file),
+        ("create_object_jsonl", lambda: Laba11.create_object_jsonl(jsonl_file, first), jsonl_file),
+        ("update_object_jsonl", lambda: Laba11.update_object_jsonl(jsonl_file, first.id, first), jsonl_file),
+        ("delete_object_jsonl", lambda: Laba11.delete_object_jsonl(jsonl_file, first.id), jsonl_file),
+    ]
+
+
+def run(entities, seed, trace_memory, output):
+    shape = StoreShape.from_entities(entities)
+    with tempfile.TemporaryDirectory() as directory:
+        suites = [
+            ("Laba1", laba1_cases(generate_laba1_store(shape, seed), directory)),
+            ("Laba11", laba11_cases(generate_laba11_orders(shape, seed), directory)),
+        ]
+        for module, cases in suites:
+            for operation, case, filename in cases:
+                _, seconds, peak = measure(case, trace_memory)
+                record = {
+                    "module": module,
+                    "operation": operation,
+                    "entities": entities,
+                    "seconds": round(seconds, 6),
+                    "peak_bytes": peak,
+                    "file_bytes": file_size(filename),
+                }
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="не замерять пик памяти (tracemalloc замедляет операции)")
+    parser.add_argument("--output", help="файл для результатов (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for entities in args.sizes:
+            run(entities, args.seed, not args.no_memory, output)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""Метрики и трассировка операций загрузки, сохранения и CRUD.
+
+Операции оборачиваются в timed("имя"): для каждой копятся число вызовов
+и ошибок, суммарное и максимальное время, число сущностей и байт
+(их сообщает сама операция через count()). Завершенные операции
+передаются приемникам: в журнал logging, в память или в текстовый файл
+в формате Prometheus. По запросу каждая операция профилируется cProfile.
+"""
+import cProfile
+import functools
+import inspect
+import logging
+import os
+import pstats
+import threading
+import time
+
+OPERATION_FIELDS = ("calls", "errors", "seconds", "max_seconds", "entities", "bytes")
+
+# Интервал перезаписи файла метрик по умолчанию, секунды (как интервал опроса Prometheus)
+PROMETHEUS_FILE_INTERVAL = 15.0
+
+PROMETHEUS_METRICS = (
+    ("calls", "store_operation_calls_total", "counter", "Число вызовов операции."),
+    ("errors", "store_operation_errors_total", "counter", "Число вызовов, завершившихся ошибкой."),
+    ("seconds", "store_operation_seconds_total", "counter", "Суммарное время операции в секундах."),
+    ("max_seconds", "store_operation_seconds_max", "gauge", "Максимальное время одного вызова в секундах."),
+    ("entities", "store_operation_entities_total", "counter", "Число обработанных сущностей."),
+    ("bytes", "store_operation_bytes_total", "counter", "Число прочитанных или записанных байт."),
+)
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class Span:
+    """Одна выполняющаяся операция."""
+    __slots__ = ('operation', 'started', 'entities', 'bytes', 'error', 'profile')
+
+    def __init__(self, operation):
+        self.operation = operation
+        self.started = time.perf_counter()
+        self.entities = 0
+        self.bytes = 0
+        self.error = False
+        self.profile = None
+
+
+class Timer:
+    """Замер операции: контекстный менеджер и декоратор.
+
+    Состояние вызова хранится в стеке текущего потока, поэтому один Timer
+    можно использовать из нескольких потоков и во вложенных вызовах.
+    """
+    def __init__(self, metrics, operation):
+        self.metrics = metrics
+        self.operation = operation
+
+    def __enter__(self):
+        return self.metrics.start(self.operation)
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.finish(exc_type is not None)
+        return False
+
+    def __call__(self, func):
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                # Генератор чередуется с кодом вызывающего, поэтому в стек потока не попадает:
+                # время считается от создания до исчерпания, сущности — по выданным объектам
+                started = time.perf_counter()
+                entities = 0
+                error = False
+                try:
+                    for value in func(*args, **kwargs):
+                        entities += 1
+                        yield value
+                except BaseException as exc:
+                    # Недочитанный генератор закрывается через GeneratorExit — это не ошибка
+                    error = not isinstance(exc, GeneratorExit)
+                    raise
+                finally:
+                    self.metrics.record(self.operation, time.perf_counter() - started, entities, 0, error)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self:
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class Metrics:
+    """Реестр метрик операций и счетчиков с подключаемыми приемниками."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.operations = {}
+        self.counters = {}
+        self.sinks = []
+        self.local = threading.local()
+        self.profiling = False
+        self.profile_directory = None
+        self.profile_lock = threading.Lock()
+        self.profiles = {}
+
+    # -------------------- Замеры --------------------
+
+    def timed(self, operation):
+        """Замер операции: with metrics.timed("имя"): ... или @metrics.timed("имя")."""
+        return Timer(self, operation)
+
+    def stack(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def start(self, operation):
+        span = Span(operation)
+        stack = self.stack()
+        # Профилируется только внешняя операция и только в одном потоке за раз
+        if self.profiling and not stack and self.profile_lock.acquire(blocking=False):
+            span.profile = cProfile.Profile()
+            span.profile.enable()
+        stack.append(span)
+        return span
+
+    def finish(self, error):
+        span = self.stack().pop()
+        seconds = time.perf_counter() - span.started
+        if span.profile is not None:
+            span.profile.disable()
+            try:
+                self.save_profile(span.operation, span.profile)
+            finally:
+                self.profile_lock.release()
+        self.record(span.operation, seconds, span.entities, span.bytes, error or span.error)
+
+    def count(self, entities=0, nbytes=0):
+        """Добавляет сущности и байты к текущей операции потока."""
+        stack = self.stack()
+        if stack:
+            span = stack[-1]
+            span.entities += entities
+            span.bytes += nbytes
+
+    def fail(self):
+        """Отмечает текущую операцию как ошибочную (если ошибка перехвачена внутри нее)."""
+        stack = self.stack()
+        if stack:
+            stack[-1].error = True
+
+    def count_file(self, filename, entities=0):
+        """Добавляет к текущей операции размер файла в байтах."""
+        try:
+            nbytes = os.path.getsize(filename)
+        except OSError:
+            nbytes = 0
+        self.count(entities, nbytes)
+
+    def increment(self, name, value=1):
+        """Увеличивает отдельный счетчик."""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record(self, operation, seconds, entities=0, nbytes=0, error=False):
+        """Учитывает завершенную операцию и передает ее приемникам."""
+        with self.lock:
+            stats = self.operations.get(operation)
+            if stats is None:
+                stats = self.operations[operation] = dict.fromkeys(OPERATION_FIELDS, 0)
+            stats["calls"] += 1
+            stats["errors"] += error
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["entities"] += entities
+            stats["bytes"] += nbytes
+            sinks = list(self.sinks)
+        if sinks:
+            event = {"operation": operation, "seconds": seconds, "entities": entities,
+                     "bytes": nbytes, "error": error}
+            for sink in sinks:
+                sink.emit(event, self)
+
+    # -------------------- Приемники и выгрузка --------------------
+
+    def add_sink(self, sink):
+        with self.lock:
+            self.sinks.append(sink)
+        return sink
+
+    def remove_sink(self, sink):
+        with self.lock:
+            self.sinks.remove(sink)
+
+    def snapshot(self):
+        """Копия накопленных метрик: {"operations": {...}, "counters": {...}}."""
+        with self.lock:
+            return {
+                "operations": {name: dict(stats) for name, stats in self.operations.items()},
+                "counters": dict(self.counters),
+            }
+
+    def reset(self):
+        with self.lock:
+            self.operations = {}
+            self.counters = {}
+            self.profiles = {}
+
+    def prometheus_text(self):
+        """Метрики в текстовом формате Prometheus."""
+        data = self.snapshot()
+        lines = []
+        for field, name, kind, help_text in PROMETHEUS_METRICS:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for operation, stats in sorted(data["operations"].items()):
+                lines.append(f'{name}{{operation="{escape_label(operation)}"}} {stats[field]}')
+        if data["counters"]:
+            lines.append("# HELP store_counter_total Отдельные счетчики.")
+            lines.append("# TYPE store_counter_total counter")
+            for counter, value in sorted(data["counters"].items()):
+                lines.append(f'store_counter_total{{name="{escape_label(counter)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    # -------------------- Профилирование --------------------
+
+    def enable_profiling(self, directory=None):
+        """Включает cProfile для операций; при directory профили пишутся в <операция>.prof."""
+        self.profile_directory = directory
+        self.profiling = True
+
+    def disable_profiling(self):
+        self.profiling = False
+
+    def save_profile(self, operation, profile):
+        with self.lock:
+            stats = self.profiles.get(operation)
+            if stats is None:
+                stats = self.profiles[operation] = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        if self.profile_directory is not None:
+            os.makedirs(self.profile_directory, exist_ok=True)
+            stats.dump_stats(os.path.join(self.profile_directory, operation + ".prof"))
+
+    def profile_stats(self, operation):
+        """Накопленный профиль операции (pstats.Stats) или None."""
+        return self.profiles.get(operation)
+
+
+class LoggingSink:
+    """Пишет каждую завершенную операцию в журнал logging."""
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger("metrics")
+        self.level = level
+
+    def emit(self, event, metrics):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, "%s: %.6f с, сущностей %d, байт %d%s",
+                            event["operation"], event["seconds"], event["entities"], event["bytes"],
+                            ", ошибка" if event["error"] else "")
+
+
+class MemorySink:
+    """Сохраняет события в памяти (для тестов и отладки)."""
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, metrics):
+        self.events.append(event)
+
+    def clear(self):
+        self.events = []
+
+
+class PrometheusFileSink:
+    """Выгружает все метрики в текстовом формате Prometheus в файл.
+
+    Файл перезаписывается атомарно не чаще одного раза в interval секунд;
+    flush() записывает его немедленно, его стоит вызвать при завершении,
+    чтобы последние операции попали в файл.
+    """
+    def __init__(self, filename, interval=PROMETHEUS_FILE_INTERVAL):
+        self.filename = filename
+        self.interval = interval
+        self.written = None
+        self.lock = threading.Lock()
+
+    def emit(self, event, metrics):
+        now = time.monotonic()
+        if self.written is None or now - self.written >= self.interval:
+            self.flush(metrics)
+
+    def flush(self, metrics):
+        with self.lock:
+            tmp_filename = self.filename + ".tmp"
+            with open(tmp_filename, "w", encoding="utf-8") as file:
+                file.write(metrics.prometheus_text())
+            os.replace(tmp_filename, self.filename)
+            self.written = time.monotonic()
+
+
+# Общий реестр, в который пишут Laba1 и Laba11
+registry = Metrics()
+timed = registry.timed
+count = registry.count
+count_file = registry.count_file
+fail = registry.fail
+increment = registry.increment
+add_sink = registry.add_sink
+remove_sink = registry.remove_sink
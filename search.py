@@ -0,0 +1,316 @@
+"""Полнотекстовый поиск товаров Laba1 по инвертированному индексу.
+
+Индекс хранит для каждого слова из Product.name и Product.description
+словарь {ID товара: вес}; для слов, встречающихся больше чем в
+IMPACT_MIN товарах, те же товары еще и сгруппированы по весу
+(impact-ordered postings). Оценка товара — сумма idf * вес по словам
+запроса, поэтому все товары, попавшие в одну комбинацию групп (по
+группе на слово), имеют одну оценку. Запрос обходит такие комбинации
+от наибольшей верхней границы оценки, сужая множества пересечением на
+уровне C, и останавливается, как только набрано limit товаров: частые
+слова целиком не обходятся на Python. Худший случай — сочетания частых
+слов, которые редко встречаются вместе, и фильтры, отсеивающие почти
+всех: тогда пересекаются все группы самого короткого списка. Задержки
+по размерам каталога замеряет benchmarks.search.
+
+Для поиска по префиксу (автодополнения) словарь слов держится
+отсортированным: основной список плюс небольшой список новых слов
+(не длиннее 8·√V для словаря из V слов), который сливается с основным
+за линейное время; удаленные слова пропускаются при поиске и
+вычищаются, когда их набирается половина словаря. Поэтому добавление
+слова не сдвигает весь словарь.
+Индекс подписывается на Store и обновляется при добавлении и удалении
+товаров.
+"""
+import heapq
+import itertools
+import math
+import re
+from bisect import bisect_left, insort
+
+TOKEN_RE = re.compile(r"\w+")
+NAME_WEIGHT = 3
+MAX_EXPANSIONS = 64
+VOCABULARY_MERGE_MIN = 1024
+PROBE_LIMIT = 64
+IMPACT_MIN = 64
+
+
+def contains(words, word):
+    """Есть ли слово в отсортированном списке."""
+    position = bisect_left(words, word)
+    return position < len(words) and words[position] == word
+
+
+def group_by_weight(posting):
+    """Товары списка вхождений, сгруппированные по весу {вес: множество ID}."""
+    groups = {}
+    for product_id, weight in posting.items():
+        groups.setdefault(weight, set()).add(product_id)
+    return groups
+
+
+def leaf_products(hits, group):
+    """Товары пересечения hits и group (hits — None, если ограничений нет).
+
+    Первые кандидаты меньшего множества проверяются по одному: для частых
+    сочетаний слов limit товаров набирается без обхода; иначе множества
+    пересекаются целиком на уровне C.
+    """
+    if hits is None:
+        yield from group
+        return
+    small, large = (hits, group) if len(hits) <= len(group) else (group, hits)
+    if len(small) <= PROBE_LIMIT:
+        yield from small & large
+        return
+    probed = []
+    for product_id in small:
+        if len(probed) == PROBE_LIMIT:
+            break
+        probed.append(product_id)
+        if product_id in large:
+            yield product_id
+    else:
+        return
+    yield from (small & large).difference(probed)
+
+
+def tokenize(text):
+    """Разбивает текст на слова: регистр не учитывается, «ё» приравнивается к «е»."""
+    return TOKEN_RE.findall(text.casefold().replace("ё", "е"))
+
+
+class ProductSearch:
+    """Инвертированный индекс по названиям и описаниям товаров."""
+    def __init__(self):
+        self.postings = {}
+        self.impacts = {}
+        self.vocabulary = []
+        self.recent = []
+        self.stale = 0
+        self.products = {}
+        self.product_tokens = {}
+        self.product_category = {}
+        self.category_products = {}
+
+    @classmethod
+    def attach(cls, store):
+        """Строит индекс по товарам хранилища и подписывает его на изменения."""
+        index = cls()
+        for product_id, product in store.products.items():
+            index.product_added(product, store.product_categories[product_id])
+        store.add_listener(index)
+        return index
+
+    # -------------------- Обновление индекса --------------------
+
+    def product_added(self, product, category):
+        """Индексирует товар; повторный вызов переиндексирует измененный товар."""
+        if product.id in self.products:
+            self.product_removed(product.id)
+        weights = {}
+        for token in tokenize(product.name):
+            weights[token] = weights.get(token, 0) + NAME_WEIGHT
+        for token in tokenize(product.description):
+            weights[token] = weights.get(token, 0) + 1
+        for token, weight in weights.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = {}
+                self.add_token(token)
+            posting[product.id] = weight
+            impacts = self.impacts.get(token)
+            if impacts is not None:
+                impacts.setdefault(weight, set()).add(product.id)
+            elif len(posting) > IMPACT_MIN:
+                self.impacts[token] = group_by_weight(posting)
+        self.products[product.id] = product
+        self.product_tokens[product.id] = tuple(weights)
+        self.product_category[product.id] = category.id
+        self.category_products.setdefault(category.id, set()).add(product.id)
+
+    def product_removed(self, product_id):
+        """Убирает товар из индекса."""
+        if self.products.pop(product_id, None) is None:
+            return
+        for token in self.product_tokens.pop(product_id):
+            posting = self.postings[token]
+            weight = posting.pop(product_id)
+            impacts = self.impacts.get(token)
+            if impacts is not None:
+                group = impacts[weight]
+                group.discard(product_id)
+                if not group:
+                    del impacts[weight]
+            if not posting:
+                del self.postings[token]
+                self.impacts.pop(token, None)
+                self.remove_token(token)
+        category_id = self.product_category.pop(product_id)
+        members = self.category_products[category_id]
+        members.discard(product_id)
+        if not members:
+            del self.category_products[category_id]
+
+    # -------------------- Словарь слов --------------------
+
+    def add_token(self, token):
+        if contains(self.vocabulary, token) or contains(self.recent, token):
+            # Удаленное слово вернулось раньше слияния
+            self.stale -= 1
+            return
+        insort(self.recent, token)
+        if len(self.recent) > max(VOCABULARY_MERGE_MIN, 8 * math.isqrt(len(self.vocabulary))):
+            # Два отсортированных участка timsort сливает за линейное время
+            self.vocabulary = sorted(self.vocabulary + self.recent)
+            self.recent = []
+
+    def remove_token(self, token):
+        # Слово остается в отсортированных списках; prefix_tokens его пропускает
+        self.stale += 1
+        if self.stale > max(VOCABULARY_MERGE_MIN, len(self.vocabulary) // 2):
+            self.vocabulary = sorted(self.postings)
+            self.recent = []
+            self.stale = 0
+
+    def prefix_tokens(self, prefix):
+        """Слова словаря, начинающиеся с prefix (в алфавитном порядке)."""
+        words = set()
+        for vocabulary in (self.vocabulary, self.recent):
+            position = bisect_left(vocabulary, prefix)
+            while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+                words.add(vocabulary[position])
+                position += 1
+        return sorted(word for word in words if word in self.postings)
+
+    # -------------------- Запросы --------------------
+
+    def complete(self, prefix, limit=10):
+        """Автодополнение: самые частые слова с заданным префиксом."""
+        tokens = tokenize(prefix)
+        if not tokens:
+            return []
+        return heapq.nlargest(limit, self.prefix_tokens(tokens[-1]),
+                              key=lambda token: len(self.postings[token]))
+
+    def term_words(self, token, prefix):
+        """Слова словаря для слова запроса; последнее слово может быть префиксом."""
+        if not prefix:
+            return [token] if token in self.postings else []
+        expansions = self.prefix_tokens(token)
+        if len(expansions) > MAX_EXPANSIONS:
+            expansions = heapq.nlargest(MAX_EXPANSIONS, expansions,
+                                        key=lambda word: len(self.postings[word]))
+        return expansions
+
+    def term_groups(self, words):
+        """Товары слова запроса по группам [(вес, товары)] в порядке убывания веса.
+
+        Товары частого слова — готовые группы по весу (множества ID). Редкое
+        слово дается одним словарем {ID товара: вес} с его наибольшим весом:
+        search группирует его, только если до него дойдет очередь. Для
+        префикса это группы всех подходящих слов: товар с несколькими такими
+        словами входит в несколько групп, и search учитывает его один раз —
+        по первой (лучшей) из них.
+        """
+        groups = []
+        for word in words:
+            impacts = self.impacts.get(word)
+            if impacts is None:
+                posting = self.postings[word]
+                groups.append((max(posting.values()), posting))
+            else:
+                groups.extend(impacts.items())
+        groups.sort(key=lambda pair: pair[0], reverse=True)
+        return groups
+
+    def search(self, query, category_id=None, in_stock=False, limit=10, prefix=True):
+        """Ищет товары, содержащие все слова запроса, по убыванию релевантности.
+
+        Последнее слово запроса при prefix=True ищется как префикс; вес товара
+        для префикса — лучший среди подходящих слов. Фильтры: category_id —
+        только товары категории, in_stock — только товары в наличии. Порядок
+        товаров с одинаковой оценкой не определен.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or limit <= 0:
+            return []
+        words = [self.term_words(token, prefix and i == len(tokens) - 1) for i, token in enumerate(tokens)]
+        if not all(words):
+            return []
+        hits = None
+        if category_id is not None:
+            hits = self.category_products.get(category_id)
+            if not hits:
+                return []
+
+        terms = [self.term_groups(term) for term in words]
+        sizes = [sum(len(self.postings[word]) for word in term) for term in words]
+        total = len(self.products)
+        idfs = [math.log(1 + total / size) for size in sizes]
+        # Самые короткие списки первыми: пересечения сужаются быстрее всего
+        order = sorted(range(len(terms)), key=sizes.__getitem__)
+        terms = [terms[i] for i in order]
+        idfs = [idfs[i] for i in order]
+        # rest[i] — наибольший возможный вклад слов начиная с i-го
+        rest = [0.0] * (len(terms) + 1)
+        for i in reversed(range(len(terms))):
+            rest[i] = rest[i + 1] + idfs[i] * terms[i][0][0]
+
+        # Узел — выбранные группы первых level слов: оценка score и товары hits
+        # (для листа — пара множеств, пересекаемая лениво). Узлы разворачиваются
+        # в порядке верхней границы оценки, поэтому листья выходят по убыванию
+        # оценки, и обход заканчивается, как только набрано limit товаров
+        counter = itertools.count()
+        heap = [(-rest[0], next(counter), 0, 0.0, hits, None)]
+
+        def expand(level, score, hits, groups):
+            idf = idfs[level]
+            for weight, group in groups:
+                node_score = score + idf * weight
+                bound = -(node_score + rest[level + 1])
+                if isinstance(group, dict):
+                    # Редкое слово: группируется по весу, когда узел дойдет до вершины кучи
+                    heapq.heappush(heap, (bound, next(counter), level, score, hits, group))
+                    continue
+                if level + 1 == len(terms):
+                    node_hits = (hits, group)
+                elif hits is None:
+                    node_hits = group
+                else:
+                    node_hits = hits & group
+                    if not node_hits:
+                        continue
+                heapq.heappush(heap, (bound, next(counter), level + 1, node_score, node_hits, None))
+
+        products = self.products
+        found = []
+        seen = set()
+        grouped = {}
+        while heap:
+            _, _, level, score, hits, posting = heapq.heappop(heap)
+            if posting is not None:
+                groups = grouped.get(id(posting))
+                if groups is None:
+                    groups = grouped[id(posting)] = group_by_weight(posting).items()
+                expand(level, score, hits, groups)
+            elif level < len(terms):
+                expand(level, score, hits, terms[level])
+            else:
+                for product_id in leaf_products(*hits):
+                    if product_id in seen:
+                        continue
+                    seen.add(product_id)
+                    if in_stock and products[product_id].stock <= 0:
+                        continue
+                    found.append(products[product_id])
+                    if len(found) == limit:
+                        return found
+        return found
+
+    def __len__(self):
+        return len(self.products)
+
+    def __repr__(self):
+        return f"ProductSearch(products={len(self.products)}, tokens={len(self.postings)})"
@@ -0,0 +1,232 @@
+"""Сериализаторы, скомпилированные по декларативной схеме класса.
+
+Схема класса — кортеж полей в порядке аргументов конструктора:
+Field — скалярное значение (int, float, str), Nested — вложенная
+сущность, Many — список сущностей. В XML поле хранится в дочернем
+элементе с тегом из имени поля в CamelCase (total_price -> TotalPrice),
+вложенная сущность — в элементе с именем своего класса, список — в
+элементе-обертке.
+
+При импорте install() генерирует для каждого класса исходный код четырех
+функций (to_json, from_json, to_xml, from_xml) и компилирует его. Вложенные
+сущности разворачиваются в код родителя, поэтому в горячем пути нет ни
+обхода полей по схеме, ни вызовов методов вложенных классов, а каждый
+дочерний элемент XML ищется ровно один раз; элементы списков
+кодируются функциями своего класса.
+"""
+from xml.etree import ElementTree as ET
+
+
+class Field:
+    """Скалярное поле: type приводит текст XML к значению (int, float, str)."""
+    __slots__ = ('name', 'type', 'tag')
+
+    def __init__(self, name, type=str, tag=None):
+        self.name = name
+        self.type = type
+        self.tag = tag or xml_tag(name)
+
+
+class Nested:
+    """Вложенная сущность класса cls (имя класса, если он объявлен ниже)."""
+    __slots__ = ('name', 'cls', 'tag')
+
+    def __init__(self, name, cls, tag=None):
+        self.name = name
+        self.cls = cls
+        self.tag = tag
+
+
+class Many:
+    """Список сущностей класса cls; в XML — элементы внутри обертки tag."""
+    __slots__ = ('name', 'cls', 'tag')
+
+    def __init__(self, name, cls, tag=None):
+        self.name = name
+        self.cls = cls
+        self.tag = tag or xml_tag(name)
+
+
+def xml_tag(name):
+    """Имя поля -> тег XML: total_price -> TotalPrice."""
+    return "".join(part.capitalize() for part in name.split('_'))
+
+
+def schema_path(cls, path):
+    """Поля схемы по пути имен ('customer', 'id') от класса cls или None, если пути нет.
+
+    Путь проходит только через Nested; вызывается после install(), когда
+    классы и теги вложенных сущностей уже определены.
+    """
+    fields = []
+    for name in path:
+        if fields and not isinstance(fields[-1], Nested):
+            return None
+        if fields:
+            cls = fields[-1].cls
+        field = next((field for field in cls.schema if field.name == name), None)
+        if field is None:
+            return None
+        fields.append(field)
+    return fields
+
+
+class Compiler:
+    """Генерирует исходный код сериализаторов для набора классов со схемами."""
+    def __init__(self, classes):
+        self.classes = {cls.__name__: cls for cls in classes}
+        self.counter = 0
+        self.namespace = {'Element': ET.Element, 'SubElement': ET.SubElement}
+
+    def resolve(self, cls):
+        return self.classes[cls] if isinstance(cls, str) else cls
+
+    def var(self, prefix):
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def constant(self, value):
+        """Имя класса или функции приведения в пространстве имен кода."""
+        name = value.__name__
+        if self.namespace.setdefault(name, value) is not value:
+            name = self.var(name)
+            self.namespace[name] = value
+        return name
+
+    def fields(self, cls):
+        fields = []
+        for field in cls.schema:
+            if isinstance(field, (Nested, Many)):
+                field.cls = self.resolve(field.cls)
+                if isinstance(field, Nested) and field.tag is None:
+                    field.tag = field.cls.__name__
+            fields.append(field)
+        return fields
+
+    # -------------------- JSON --------------------
+
+    def encode_json(self, cls, source, lines):
+        """Выражение-словарь для объекта source; присваивания добавляются в lines."""
+        items = []
+        for field in self.fields(cls):
+            value = f"{source}.{field.name}"
+            if isinstance(field, Nested):
+                nested = self.var("o")
+                lines.append(f"{nested} = {value}")
+                value = self.encode_json(field.cls, nested, lines)
+            elif isinstance(field, Many):
+                encode = f"encode_json_{field.cls.__name__}"
+                value = f"[{encode}(x) for x in {value}]"
+            items.append(f"{field.name!r}: {value}")
+        return "{" + ", ".join(items) + "}"
+
+    def decode_json(self, cls, source, lines):
+        """Выражение-конструктор объекта из словаря source."""
+        args = []
+        for field in self.fields(cls):
+            value = f"{source}[{field.name!r}]"
+            if isinstance(field, Nested):
+                nested = self.var("d")
+                lines.append(f"{nested} = {value}")
+                value = self.decode_json(field.cls, nested, lines)
+            elif isinstance(field, Many):
+                decode = f"decode_json_{field.cls.__name__}"
+                value = f"[{decode}(x) for x in {value}]"
+            args.append(value)
+        return f"{self.constant(cls)}({', '.join(args)})"
+
+    # -------------------- XML --------------------
+
+    def encode_xml(self, cls, source, elem, lines):
+        """Операторы, заполняющие элемент elem полями объекта source."""
+        for field in self.fields(cls):
+            value = f"{source}.{field.name}"
+            if isinstance(field, Field):
+                text = value if field.type is str else f"str({value})"
+                lines.append(f"SubElement({elem}, {field.tag!r}).text = {text}")
+            elif isinstance(field, Nested):
+                nested, child = self.var("o"), self.var("e")
+                lines.append(f"{nested} = {value}")
+                lines.append(f"{child} = SubElement({elem}, {field.tag!r})")
+                self.encode_xml(field.cls, nested, child, lines)
+            else:
+                child = self.var("e")
+                encode = f"encode_xml_{field.cls.__name__}"
+                lines.append(f"{child} = SubElement({elem}, {field.tag!r})")
+                lines.append(f"{child}.extend([{encode}(x) for x in {value}])")
+
+    def decode_xml(self, cls, elem, lines):
+        """Выражение-конструктор объекта из элемента elem."""
+        args = []
+        for field in self.fields(cls):
+            child = f"{elem}.find({field.tag!r})"
+            if isinstance(field, Field):
+                value = f"{child}.text"
+                if field.type is not str:
+                    value = f"{self.constant(field.type)}({value})"
+            elif isinstance(field, Nested):
+                nested = self.var("x")
+                lines.append(f"{nested} = {child}")
+                value = self.decode_xml(field.cls, nested, lines)
+            else:
+                decode = f"decode_xml_{field.cls.__name__}"
+                value = f"[{decode}(x) for x in {child}]"
+            args.append(value)
+        return f"{self.constant(cls)}({', '.join(args)})"
+
+    # -------------------- Сборка --------------------
+
+    def source(self, cls):
+        name = cls.__name__
+        code = []
+
+        lines = []
+        result = self.encode_json(cls, "obj", lines)
+        code.append(self.function(f"encode_json_{name}", "obj", lines, result))
+
+        lines = []
+        result = self.decode_json(cls, "js", lines)
+        code.append(self.function(f"decode_json_{name}", "js", lines, result))
+
+        elem = self.var("e")
+        lines = [f"{elem} = Element({name!r})"]
+        self.encode_xml(cls, "obj", elem, lines)
+        code.append(self.function(f"encode_xml_{name}", "obj", lines, elem))
+
+        lines = []
+        result = self.decode_xml(cls, "elem", lines)
+        code.append(self.function(f"decode_xml_{name}", "elem", lines, result))
+        return "\n".join(code)
+
+    def function(self, name, argument, lines, result):
+        body = "".join(f"    {line}\n" for line in lines)
+        return f"def {name}({argument}):\n{body}    return {result}\n"
+
+    def compile(self):
+        """Компилирует функции всех классов; возвращает {класс: {имя: функция}}."""
+        source = "\n".join(self.source(cls) for cls in self.classes.values())
+        exec(compile(source, "<serializers>", "exec"), self.namespace)
+        return {
+            cls: {kind: self.namespace[f"{kind}_{cls.__name__}"]
+                  for kind in ("encode_json", "decode_json", "encode_xml", "decode_xml")}
+            for cls in self.classes.values()
+        }
+
+
+def install(classes):
+    """Компилирует сериализаторы по схемам и ставит их классам как
+    to_json/to_xml и статические from_json/from_xml.
+    """
+    compiled = Compiler(classes).compile()
+    for cls, functions in compiled.items():
+        cls.to_json = functions["encode_json"]
+        cls.from_json = staticmethod(functions["decode_json"])
+        cls.to_xml = functions["encode_xml"]
+        cls.from_xml = staticmethod(functions["decode_xml"])
+    return compiled
+
+
+def source(classes):
+    """Исходный код сериализаторов (для отладки схем)."""
+    compiler = Compiler(classes)
+    return "\n".join(compiler.source(cls) for cls in compiler.classes.values())
@@ -0,0 +1,216 @@
+"""Шардированное хранение: данные магазина разбиты на N файлов с манифестом.
+
+Laba1: категории распределяются по шардам по ID категории, покупатели
+вместе с заказами — по ID покупателя. Каждый шард — обычный файл в
+формате store_data (JSON или XML); купонов немного, и они хранятся в
+манифесте. Laba11: объекты распределяются по ID
+покупателя (для Inventory — по ID категории товара).
+
+Чтение и запись шардов выполняются параллельно в ProcessPoolExecutor:
+для Laba1 процессы разбирают файлы в простые словари, а объекты
+создаются в основном процессе; объекты Laba11 передаются из процессов
+целиком. Манифест (manifest.json) перечисляет файлы текущего поколения
+и заменяется атомарно после записи всех шардов, поэтому прерванное
+сохранение не портит предыдущую версию. При codec шарды сжимаются
+(laba1-1-000.json.gz), загрузчики определяют кодек по расширению.
+"""
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import Laba1
+import Laba11
+import filecodec
+import metrics
+
+MANIFEST = "manifest.json"
+
+LABA1_READERS = {"json": Laba1.read_json, "xml": Laba1.read_xml}
+LABA1_WRITERS = {"json": Laba1.write_json, "xml": Laba1.write_xml}
+LABA11_READERS = {"json": Laba11.read_objects_json, "xml": Laba11.read_objects_xml,
+                  "jsonl": Laba11.read_objects_jsonl}
+LABA11_WRITERS = {"json": Laba11.save_to_json, "xml": Laba11.save_to_xml, "jsonl": Laba11.save_to_jsonl}
+
+
+def shard_of(key, shards):
+    """Номер шарда для ключа; не зависит от процесса (в отличие от hash())."""
+    return zlib.crc32(str(key).encode("utf-8")) % shards
+
+
+def default_shards():
+    return os.cpu_count() or 1
+
+
+def run_parallel(func, *iterables, workers=None):
+    """Выполняет func по элементам iterables в пуле процессов; при одном задании — в текущем."""
+    tasks = list(zip(*iterables))
+    workers = min(workers or default_shards(), len(tasks))
+    if workers <= 1:
+        return [func(*args) for args in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, *zip(*tasks)))
+
+
+# -------------------- Манифест --------------------
+
+def read_manifest(directory):
+    """Читает манифест каталога с шардами."""
+    with open(os.path.join(directory, MANIFEST), "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def write_manifest(directory, manifest):
+    """Атомарно заменяет манифест и удаляет файлы шардов прежних поколений."""
+    try:
+        previous = read_manifest(directory)
+    except FileNotFoundError:
+        previous = None
+    filename = os.path.join(directory, MANIFEST)
+    with open(filename + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=4)
+    os.replace(filename + ".tmp", filename)
+    if previous is not None:
+        current = {shard["file"] for shard in manifest["shards"]}
+        for shard in previous["shards"]:
+            if shard["file"] not in current:
+                try:
+                    os.remove(os.path.join(directory, shard["file"]))
+                except FileNotFoundError:
+                    pass
+
+
+def next_generation(directory):
+    try:
+        return read_manifest(directory)["generation"] + 1
+    except FileNotFoundError:
+        return 1
+
+
+def shard_filenames(directory, module, fmt, shards, codec=None):
+    """Имена файлов шардов нового поколения."""
+    generation = next_generation(directory)
+    names = [filecodec.with_extension(f"{module}-{generation}-{number:03d}.{fmt}", codec)
+             for number in range(shards)]
+    return generation, names
+
+
+def write_shard(writer, data, filename):
+    """Записывает один шард через временный файл (выполняется в процессе пула)."""
+    tmp_filename = filecodec.tmp_name(filename)
+    writer(data, tmp_filename)
+    os.replace(tmp_filename, filename)
+
+
+def write_laba11_shard(writer, objects, filename):
+    tmp_filename = filecodec.tmp_name(filename)
+    writer(tmp_filename, objects)
+    os.replace(tmp_filename, filename)
+
+
+# -------------------- Laba1 --------------------
+
+@metrics.timed("shards.laba1_save")
+def save_laba1_sharded(store, directory, shards=None, fmt="json", workers=None, codec=None):
+    """Сохраняет Laba1.Store в shards файлов формата fmt (json/xml) и пишет манифест."""
+    shards = shards or default_shards()
+    os.makedirs(directory, exist_ok=True)
+    data = Laba1.store_data(store.categories.values(), store.customers.values(), store.coupons.values())
+    parts = [{"categories": [], "customers": []} for _ in range(shards)]
+    for category in data["categories"]:
+        parts[shard_of(category["id"], shards)]["categories"].append(category)
+    for customer in data["customers"]:
+        parts[shard_of(customer["id"], shards)]["customers"].append(customer)
+
+    generation, names = shard_filenames(directory, "laba1", fmt, shards, codec)
+    paths = [os.path.join(directory, name) for name in names]
+    run_parallel(write_shard, [LABA1_WRITERS[fmt]] * shards, parts, paths, workers=workers)
+    write_manifest(directory, {
+        "module": "laba1",
+        "format": fmt,
+        "generation": generation,
+        "checkpoint": store.checkpoint,
+        "ids": data["ids"],
+        "coupons": data["coupons"],
+        "shards": [
+            {
+                "file": name,
+                "categories": len(part["categories"]),
+                "products": sum(len(category["products"]) for category in part["categories"]),
+                "customers": len(part["customers"]),
+                "orders": sum(len(customer["orders"]) for customer in part["customers"])
+            }
+            for name, part in zip(names, parts)
+        ]
+    })
+    metrics.count(Laba1.data_entity_count(data), sum(os.path.getsize(path) for path in paths))
+
+
+@metrics.timed("shards.laba1_load")
+def load_laba1_sharded(directory, workers=None):
+    """Загружает Laba1.Store из каталога с шардами; файлы разбираются параллельно."""
+    manifest = read_manifest(directory)
+    paths = [os.path.join(directory, shard["file"]) for shard in manifest["shards"]]
+    parts = run_parallel(LABA1_READERS[manifest["format"]], paths, workers=workers)
+
+    # Сначала весь каталог: заказы любого шарда ссылаются на товары других шардов
+    store = Laba1.Store()
+    store.checkpoint = manifest.get("checkpoint", 0)
+    Laba1.restore_coupons_json(store, manifest.get("coupons", []))
+    for part in parts:
+        Laba1.restore_categories_json(store, part["categories"])
+    for part in parts:
+        Laba1.restore_customers_json(store, part["customers"])
+    Laba1.ids.restore(manifest.get("ids", {}))
+    store.sync_ids()
+    store.clear_dirty()
+    metrics.count(Laba1.store_entity_count(store), sum(os.path.getsize(path) for path in paths))
+    return store
+
+
+# -------------------- Laba11 --------------------
+
+def laba11_shard_key(obj):
+    """Ключ шарда объекта Laba11: покупатель, иначе категория товара, иначе ID."""
+    customer = getattr(obj, "customer", None)
+    if customer is not None:
+        return customer.id
+    product = getattr(obj, "product", None)
+    if product is not None:
+        return product.category.id
+    return getattr(obj, "id", None)
+
+
+@metrics.timed("shards.laba11_save")
+def save_laba11_sharded(objects, directory, shards=None, fmt="json", workers=None, codec=None):
+    """Сохраняет объекты Laba11 в shards файлов формата fmt (json/xml/jsonl) и пишет манифест."""
+    shards = shards or default_shards()
+    os.makedirs(directory, exist_ok=True)
+    parts = [[] for _ in range(shards)]
+    for obj in objects:
+        parts[shard_of(laba11_shard_key(obj), shards)].append(obj)
+
+    generation, names = shard_filenames(directory, "laba11", fmt, shards, codec)
+    paths = [os.path.join(directory, name) for name in names]
+    run_parallel(write_laba11_shard, [LABA11_WRITERS[fmt]] * shards, parts, paths, workers=workers)
+    write_manifest(directory, {
+        "module": "laba11",
+        "format": fmt,
+        "generation": generation,
+        "shards": [{"file": name, "objects": len(part)} for name, part in zip(names, parts)]
+    })
+    metrics.count(sum(len(part) for part in parts), sum(os.path.getsize(path) for path in paths))
+
+
+@metrics.timed("shards.laba11_load")
+def load_laba11_sharded(directory, workers=None):
+    """Загружает объекты Laba11 из каталога с шардами.
+
+    Объекты идут по шардам; внутри шарда порядок сохранения сохраняется.
+    """
+    manifest = read_manifest(directory)
+    paths = [os.path.join(directory, shard["file"]) for shard in manifest["shards"]]
+    parts = run_parallel(LABA11_READERS[manifest["format"]], paths, workers=workers)
+    objects = [obj for part in parts for obj in part]
+    metrics.count(len(objects), sum(os.path.getsize(path) for path in paths))
+    return objects
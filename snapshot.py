@@ -0,0 +1,526 @@
+"""Бинарный колоночный снимок магазина (Laba1) и заказов (Laba11).
+
+Файл снимка состоит из заголовка, таблицы секций и самих секций.
+Каждая секция — колонка чисел одного типа (array typecode) или
+колонка индексов в общей таблице строк. Загрузчик отображает файл в
+память через mmap, поэтому при старте читаются только те страницы,
+к которым действительно обращаются. JSON и XML остаются форматами
+обмена, для них есть конвертеры в обе стороны.
+"""
+import array
+import math
+import mmap
+import struct
+import sys
+
+import Laba1
+import Laba11
+
+MAGIC = b"SNAP"
+VERSION = 1
+KIND_LABA1 = 1
+KIND_LABA11 = 2
+
+HEADER = struct.Struct("<4sHHI")
+SECTION = struct.Struct("<31scQQ")
+ALIGNMENT = 8
+
+# Колонки строк хранятся как индексы uint32 в таблице строк
+STRING_TYPECODE = "s"
+STRING_OFFSETS = "strings.offsets"
+STRING_DATA = "strings.data"
+
+
+class SnapshotWriter:
+    """Накапливает колонки и строки и записывает их в файл снимка."""
+    def __init__(self, kind, columns):
+        for name in columns:
+            if len(name) >= SECTION.size - 17:
+                raise ValueError(f"Слишком длинное имя колонки: {name}")
+        self.kind = kind
+        self.columns = {
+            name: (typecode, array.array("I" if typecode == STRING_TYPECODE else typecode))
+            for name, typecode in columns.items()
+        }
+        self.strings = {}
+        self.string_data = bytearray()
+        self.string_offsets = array.array("Q", [0])
+
+    def column(self, name):
+        return self.columns[name][1]
+
+    def intern(self, value):
+        """Добавляет строку в таблицу строк и возвращает ее индекс."""
+        index = self.strings.get(value)
+        if index is None:
+            index = len(self.strings)
+            self.strings[value] = index
+            self.string_data += value.encode("utf-8")
+            self.string_offsets.append(len(self.string_data))
+        return index
+
+    def add_string(self, name, value):
+        self.column(name).append(self.intern(value))
+
+    def write(self, filename):
+        sections = [(name, typecode, little_endian(values)) for name, (typecode, values) in self.columns.items()]
+        sections.append((STRING_OFFSETS, "Q", little_endian(self.string_offsets)))
+        sections.append((STRING_DATA, "B", bytes(self.string_data)))
+
+        offset = align(HEADER.size + SECTION.size * len(sections))
+        table = []
+        for name, typecode, data in sections:
+            table.append(SECTION.pack(name.encode("ascii"), typecode.encode("ascii"), offset, len(data)))
+            offset = align(offset + len(data))
+
+        with open(filename, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.kind, len(sections)))
+            file.write(b"".join(table))
+            for name, typecode, data in sections:
+                file.write(b"\0" * (align(file.tell()) - file.tell()))
+                file.write(data)
+
+
+class Snapshot:
+    """Снимок, отображенный в память; колонки читаются лениво."""
+    def __init__(self, filename):
+        self.views = {}
+        self.sections = {}
+        self.file = open(filename, "rb")
+        self.mm = None
+        try:
+            # Пустой файл mmap не отображает (ValueError), в обрезанном нет заголовка (struct.error)
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self.kind, count = HEADER.unpack_from(self.mm, 0)
+        except (ValueError, struct.error) as e:
+            self.close()
+            raise ValueError(f"Снимок {filename} пуст или обрезан.") from e
+        except BaseException:
+            self.close()
+            raise
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{filename} не является снимком версии {VERSION}.")
+        size = len(self.mm)
+        for i in range(count):
+            position = HEADER.size + i * SECTION.size
+            if position + SECTION.size > size:
+                self.close()
+                raise ValueError(f"Снимок {filename} обрезан: таблица секций выходит за конец файла.")
+            name, typecode, offset, length = SECTION.unpack_from(self.mm, position)
+            if offset + length > size:
+                self.close()
+                raise ValueError(f"Снимок {filename} обрезан: секция выходит за конец файла.")
+            self.sections[name.rstrip(b"\0").decode("ascii")] = (typecode.decode("ascii"), offset, length)
+
+    def column(self, name):
+        """Колонка как memoryview поверх mmap (без копирования на little-endian)."""
+        view = self.views.get(name)
+        if view is None:
+            typecode, offset, length = self.sections[name]
+            storage = "I" if typecode == STRING_TYPECODE else typecode
+            view = memoryview(self.mm)[offset:offset + length]
+            if storage != "B":
+                if sys.byteorder == "little":
+                    view = view.cast(storage)
+                else:
+                    values = array.array(storage, view.tobytes())
+                    values.byteswap()
+                    view = values
+            self.views[name] = view
+        return view
+
+    def count(self, name):
+        """Количество значений в колонке без ее чтения."""
+        typecode, _, length = self.sections[name]
+        storage = "I" if typecode == STRING_TYPECODE else typecode
+        return length // array.array(storage).itemsize
+
+    def string(self, index):
+        """Строка из таблицы строк по индексу."""
+        offsets = self.column(STRING_OFFSETS)
+        return bytes(self.column(STRING_DATA)[offsets[index]:offsets[index + 1]]).decode("utf-8")
+
+    def value(self, name, row):
+        """Значение колонки в строке row; индексы строк заменяются самими строками."""
+        value = self.column(name)[row]
+        if self.sections[name][0] == STRING_TYPECODE:
+            return self.string(value)
+        return value
+
+    def row(self, prefix, row):
+        """Все колонки с префиксом prefix (например, "product") для строки row."""
+        start = prefix + "."
+        return {
+            name[len(start):]: self.value(name, row)
+            for name in self.sections if name.startswith(start) and not name.endswith(".offsets")
+        }
+
+    def close(self):
+        for view in self.views.values():
+            if isinstance(view, memoryview):
+                view.release()
+        self.views.clear()
+        if self.mm is not None:
+            self.mm.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def swapped(values):
+    values = array.array(values.typecode, values)
+    values.byteswap()
+    return values.tobytes()
+
+
+def little_endian(values):
+    return values.tobytes() if sys.byteorder == "little" else swapped(values)
+
+
+def open_snapshot(filename, kind):
+    snapshot = Snapshot(filename)
+    if snapshot.kind != kind:
+        snapshot.close()
+        raise ValueError(f"{filename} содержит снимок другого типа.")
+    return snapshot
+
+
+# -------------------- Laba1: магазин --------------------
+
+# Товары идут подряд по категориям, заказы — по покупателям, позиции — по заказам;
+# колонки *.offsets задают границы этих диапазонов.
+# ID Laba1 хранятся целыми числами; снимки со строковыми ID ("product_12") тоже читаются.
+# Пустые ограничения купона: NaN для valid_from/valid_until и -1 для max_uses;
+# order.has_coupon отличает заказ без купона от купона с пустым кодом.
+LABA1_COLUMNS = {
+    "ids.kind": STRING_TYPECODE,
+    "ids.value": "q",
+    "category.id": "q",
+    "category.name": STRING_TYPECODE,
+    "category.offsets": "Q",
+    "product.id": "q",
+    "product.name": STRING_TYPECODE,
+    "product.description": STRING_TYPECODE,
+    "product.price": "d",
+    "product.stock": "q",
+    "customer.id": "q",
+    "customer.name": STRING_TYPECODE,
+    "customer.email": STRING_TYPECODE,
+    "customer.offsets": "Q",
+    "order.id": "q",
+    "order.status": STRING_TYPECODE,
+    "order.has_coupon": "B",
+    "order.coupon": STRING_TYPECODE,
+    "order.discount": "d",
+    "order.offsets": "Q",
+    "item.product": "q",
+    "item.quantity": "q",
+    "coupon.code": STRING_TYPECODE,
+    "coupon.discount_percentage": "d",
+    "coupon.active": "B",
+    "coupon.valid_from": "d",
+    "coupon.valid_until": "d",
+    "coupon.max_uses": "q",
+    "coupon.uses": "q",
+}
+
+
+def optional_float(value):
+    return math.nan if value is None else value
+
+
+def restore_optional_float(value):
+    return None if math.isnan(value) else value
+
+
+def save_laba1_snapshot(store, filename):
+    """Сохраняет Laba1.Store в бинарный снимок."""
+    writer = SnapshotWriter(KIND_LABA1, LABA1_COLUMNS)
+    product_rows = {}
+    for kind, value in Laba1.ids.state().items():
+        writer.add_string("ids.kind", kind)
+        writer.column("ids.value").append(value)
+
+    category_offsets = writer.column("category.offsets")
+    category_offsets.append(0)
+    for category in store.categories.values():
+        writer.column("category.id").append(category.id)
+        writer.add_string("category.name", category.name)
+        for product in category.products.values():
+            product_rows[product.id] = len(product_rows)
+            writer.column("product.id").append(product.id)
+            writer.add_string("product.name", product.name)
+            writer.add_string("product.description", product.description)
+            writer.column("product.price").append(product.price)
+            writer.column("product.stock").append(product.stock)
+        category_offsets.append(len(product_rows))
+
+    customer_offsets = writer.column("customer.offsets")
+    order_offsets = writer.column("order.offsets")
+    customer_offsets.append(0)
+    order_offsets.append(0)
+    orders = 0
+    items = 0
+    for customer in store.customers.values():
+        writer.column("customer.id").append(customer.id)
+        writer.add_string("customer.name", customer.name)
+        writer.add_string("customer.email", customer.email)
+        for order in customer.orders:
+            writer.column("order.id").append(order.id)
+            writer.add_string("order.status", order.status)
+            writer.column("order.has_coupon").append(order.coupon is not None)
+            writer.add_string("order.coupon", order.coupon or "")
+            writer.column("order.discount").append(order.discount)
+            for item in order.items:
+                writer.column("item.product").append(product_rows[item.product.id])
+                writer.column("item.quantity").append(item.quantity)
+                items += 1
+            orders += 1
+            order_offsets.append(items)
+        customer_offsets.append(orders)
+
+    for coupon in store.coupons.values():
+        writer.add_string("coupon.code", coupon.code)
+        writer.column("coupon.discount_percentage").append(coupon.discount_percentage)
+        writer.column("coupon.active").append(coupon.active)
+        writer.column("coupon.valid_from").append(optional_float(coupon.valid_from))
+        writer.column("coupon.valid_until").append(optional_float(coupon.valid_until))
+        writer.column("coupon.max_uses").append(-1 if coupon.max_uses is None else coupon.max_uses)
+        writer.column("coupon.uses").append(coupon.uses)
+
+    writer.write(filename)
+
+
+def open_laba1_snapshot(filename):
+    """Открывает снимок Laba1 для ленивого доступа к колонкам."""
+    return open_snapshot(filename, KIND_LABA1)
+
+
+def load_laba1_snapshot(filename):
+    """Загружает снимок в Laba1.Store."""
+    with open_laba1_snapshot(filename) as snapshot:
+        store = Laba1.Store()
+        products = []
+        category_offsets = snapshot.column("category.offsets")
+        prices = snapshot.column("product.price")
+        stocks = snapshot.column("product.stock")
+        for row in range(snapshot.count("category.id")):
+            category = Laba1.Category(snapshot.value("category.name", row),
+                                      id=Laba1.parse_id(snapshot.value("category.id", row)))
+            store.add_category(category)
+            for product_row in range(category_offsets[row], category_offsets[row + 1]):
+                product = Laba1.Product(
+                    snapshot.value("product.name", product_row),
+                    snapshot.value("product.description", product_row),
+                    prices[product_row],
+                    stocks[product_row],
+                    id=Laba1.parse_id(snapshot.value("product.id", product_row))
+                )
+                category.add_product(product)
+                products.append(product)
+
+        customer_offsets = snapshot.column("customer.offsets")
+        order_offsets = snapshot.column("order.offsets")
+        item_products = snapshot.column("item.product")
+        item_quantities = snapshot.column("item.quantity")
+        # Снимки без купонов (до их появления) читаются как магазин без скидок
+        has_coupons = "order.has_coupon" in snapshot.sections
+        if "coupon.code" in snapshot.sections:
+            restore_laba1_coupons(store, snapshot)
+        for row in range(snapshot.count("customer.id")):
+            customer = Laba1.Customer(snapshot.value("customer.name", row), snapshot.value("customer.email", row),
+                                      id=Laba1.parse_id(snapshot.value("customer.id", row)))
+            store.add_customer(customer)
+            for order_row in range(customer_offsets[row], customer_offsets[row + 1]):
+                order = Laba1.Order(customer, id=Laba1.parse_id(snapshot.value("order.id", order_row)))
+                order.status = snapshot.value("order.status", order_row)
+                if has_coupons and snapshot.value("order.has_coupon", order_row):
+                    order.coupon = snapshot.value("order.coupon", order_row)
+                    order.discount = snapshot.value("order.discount", order_row)
+                for item_row in range(order_offsets[order_row], order_offsets[order_row + 1]):
+                    order.restore_item(products[item_products[item_row]], item_quantities[item_row])
+                customer.place_order(order)
+        if "ids.kind" in snapshot.sections:
+            Laba1.ids.restore({snapshot.value("ids.kind", row): snapshot.value("ids.value", row)
+                               for row in range(snapshot.count("ids.kind"))})
+        store.sync_ids()
+        store.clear_dirty()
+        return store
+
+
+def restore_laba1_coupons(store, snapshot):
+    """Восстанавливает купоны магазина из колонок coupon.* снимка."""
+    for row in range(snapshot.count("coupon.code")):
+        max_uses = snapshot.value("coupon.max_uses", row)
+        store.add_coupon(Laba1.Coupon(
+            snapshot.value("coupon.code", row),
+            snapshot.value("coupon.discount_percentage", row),
+            bool(snapshot.value("coupon.active", row)),
+            restore_optional_float(snapshot.value("coupon.valid_from", row)),
+            restore_optional_float(snapshot.value("coupon.valid_until", row)),
+            None if max_uses < 0 else max_uses,
+            snapshot.value("coupon.uses", row)
+        ))
+
+
+def laba1_json_to_snapshot(json_filename, snapshot_filename):
+    save_laba1_snapshot(Laba1.load_from_json(json_filename), snapshot_filename)
+
+
+def laba1_xml_to_snapshot(xml_filename, snapshot_filename):
+    save_laba1_snapshot(Laba1.load_from_xml(xml_filename), snapshot_filename)
+
+
+def laba1_snapshot_to_json(snapshot_filename, json_filename):
+    store = load_laba1_snapshot(snapshot_filename)
+    Laba1.save_to_json(store.categories.values(), store.customers.values(), json_filename,
+                       coupons=store.coupons.values())
+
+
+def laba1_snapshot_to_xml(snapshot_filename, xml_filename):
+    store = load_laba1_snapshot(snapshot_filename)
+    Laba1.save_to_xml(store.categories.values(), store.customers.values(), xml_filename,
+                      coupons=store.coupons.values())
+
+
+# -------------------- Laba11: заказы --------------------
+
+# Ссылки на товары, категории и клиентов — номера строк в их колонках
+LABA11_COLUMNS = {
+    "category.id": "q",
+    "category.name": STRING_TYPECODE,
+    "product.id": "q",
+    "product.name": STRING_TYPECODE,
+    "product.description": STRING_TYPECODE,
+    "product.price": "d",
+    "product.category": "q",
+    "customer.id": "q",
+    "customer.name": STRING_TYPECODE,
+    "customer.email": STRING_TYPECODE,
+    "order.id": "q",
+    "order.customer": "q",
+    "order.total_price": "d",
+    "order.status": STRING_TYPECODE,
+    "order.offsets": "Q",
+    "item.product": "q",
+    "item.quantity": "q",
+}
+
+
+def save_laba11_snapshot(orders, filename):
+    """Сохраняет список заказов Laba11 в бинарный снимок с общими таблицами сущностей."""
+    identity = Laba11.IdentityMap()
+    for order in orders:
+        identity.add_customer(order.customer)
+        for item in order.items:
+            identity.add_product(item.product)
+
+    writer = SnapshotWriter(KIND_LABA11, LABA11_COLUMNS)
+    category_rows = {}
+    for category in identity.categories.values():
+        category_rows[category.id] = len(category_rows)
+        writer.column("category.id").append(category.id)
+        writer.add_string("category.name", category.name)
+
+    product_rows = {}
+    for product in identity.products.values():
+        product_rows[product.id] = len(product_rows)
+        writer.column("product.id").append(product.id)
+        writer.add_string("product.name", product.name)
+        writer.add_string("product.description", product.description)
+        writer.column("product.price").append(product.price)
+        writer.column("product.category").append(category_rows[product.category.id])
+
+    customer_rows = {}
+    for customer in identity.customers.values():
+        customer_rows[customer.id] = len(customer_rows)
+        writer.column("customer.id").append(customer.id)
+        writer.add_string("customer.name", customer.name)
+        writer.add_string("customer.email", customer.email)
+
+    order_offsets = writer.column("order.offsets")
+    order_offsets.append(0)
+    items = 0
+    for order in orders:
+        writer.column("order.id").append(order.id)
+        writer.column("order.customer").append(customer_rows[order.customer.id])
+        writer.column("order.total_price").append(order.total_price)
+        writer.add_string("order.status", order.status)
+        for item in order.items:
+            writer.column("item.product").append(product_rows[item.product.id])
+            writer.column("item.quantity").append(item.quantity)
+            items += 1
+        order_offsets.append(items)
+
+    writer.write(filename)
+
+
+def open_laba11_snapshot(filename):
+    """Открывает снимок Laba11 для ленивого доступа к колонкам."""
+    return open_snapshot(filename, KIND_LABA11)
+
+
+def load_laba11_snapshot(filename):
+    """Загружает снимок в список заказов Laba11; каждая сущность создается один раз."""
+    with open_laba11_snapshot(filename) as snapshot:
+        category_ids = snapshot.column("category.id")
+        categories = [
+            Laba11.Category(category_ids[row], snapshot.value("category.name", row))
+            for row in range(len(category_ids))
+        ]
+        product_ids = snapshot.column("product.id")
+        prices = snapshot.column("product.price")
+        product_categories = snapshot.column("product.category")
+        products = [
+            Laba11.Product(product_ids[row], snapshot.value("product.name", row),
+                           snapshot.value("product.description", row), prices[row],
+                           categories[product_categories[row]])
+            for row in range(len(product_ids))
+        ]
+        customer_ids = snapshot.column("customer.id")
+        customers = [
+            Laba11.Customer(customer_ids[row], snapshot.value("customer.name", row),
+                            snapshot.value("customer.email", row))
+            for row in range(len(customer_ids))
+        ]
+
+        order_ids = snapshot.column("order.id")
+        order_customers = snapshot.column("order.customer")
+        totals = snapshot.column("order.total_price")
+        order_offsets = snapshot.column("order.offsets")
+        item_products = snapshot.column("item.product")
+        item_quantities = snapshot.column("item.quantity")
+        orders = []
+        for row in range(len(order_ids)):
+            items = [
+                Laba11.OrderItem(products[item_products[item_row]], item_quantities[item_row])
+                for item_row in range(order_offsets[row], order_offsets[row + 1])
+            ]
+            orders.append(Laba11.Order(order_ids[row], customers[order_customers[row]], items,
+                                       totals[row], snapshot.value("order.status", row)))
+        return orders
+
+
+def laba11_json_to_snapshot(json_filename, snapshot_filename):
+    save_laba11_snapshot(Laba11.load_from_json(json_filename), snapshot_filename)
+
+
+def laba11_xml_to_snapshot(xml_filename, snapshot_filename):
+    save_laba11_snapshot(Laba11.load_from_xml(xml_filename), snapshot_filename)
+
+
+def laba11_snapshot_to_json(snapshot_filename, json_filename):
+    Laba11.save_to_json(json_filename, load_laba11_snapshot(snapshot_filename))
+
+
+def laba11_snapshot_to_xml(snapshot_filename, xml_filename):
+    Laba11.save_to_xml(xml_filename, load_laba11_snapshot(snapshot_filename))
@@ -0,0 +1,439 @@
+"""Подключаемые хранилища для CRUD-функций Laba11.
+
+Все хранилища реализуют один интерфейс StorageBackend: create, read,
+update, delete, их пакетные варианты и write_all для полной перезаписи.
+Файловые хранилища (JSON, XML, JSON Lines) опираются на функции Laba11
+и служат форматами экспорта; SqliteBackend хранит сущности в
+индексированных таблицах, так что обновление по ID — это точечная запись.
+"""
+import abc
+import sqlite3
+
+import Laba11
+
+
+class StorageBackend(abc.ABC):
+    """Общий интерфейс хранилищ объектов Laba11.
+
+    Пакетные методы по умолчанию вызывают одиночные по очереди; хранилища
+    переопределяют их, чтобы обработать пакет за одну запись.
+    """
+    @abc.abstractmethod
+    def create(self, obj):
+        """Добавить объект."""
+
+    @abc.abstractmethod
+    def read(self):
+        """Прочитать все объекты."""
+
+    @abc.abstractmethod
+    def update(self, obj_id, updated_obj):
+        """Обновить объект по ID; вернуть True, если он найден."""
+
+    @abc.abstractmethod
+    def delete(self, obj_id):
+        """Удалить объект по ID; вернуть True, если он найден."""
+
+    @abc.abstractmethod
+    def write_all(self, objects):
+        """Заменить все содержимое хранилища объектами objects."""
+
+    def create_many(self, objects):
+        """Добавить пакет объектов; вернуть список результатов по каждому."""
+        results = []
+        for obj in objects:
+            self.create(obj)
+            results.append(True)
+        return results
+
+    def update_many(self, updates):
+        return {obj_id: self.update(obj_id, obj) for obj_id, obj in Laba11.as_updates(updates).items()}
+
+    def delete_many(self, obj_ids):
+        return {obj_id: self.delete(obj_id) for obj_id in set(obj_ids)}
+
+
+def export_objects(source, target):
+    """Скопировать все объекты из одного хранилища в другое."""
+    target.write_all(source.read())
+
+
+# -------------------- Файловые хранилища --------------------
+
+class JsonFileBackend(StorageBackend):
+    def __init__(self, filename):
+        self.filename = filename
+
+    def create(self, obj):
+        Laba11.create_object_json(self.filename, obj)
+
+    def read(self):
+        return Laba11.read_objects_json(self.filename)
+
+    def update(self, obj_id, updated_obj):
+        return Laba11.update_object_json(self.filename, obj_id, updated_obj)
+
+    def delete(self, obj_id):
+        return Laba11.delete_many_json(self.filename, [obj_id])[obj_id]
+
+    def write_all(self, objects):
+        Laba11.save_to_json(self.filename, objects)
+
+    def create_many(self, objects):
+        return Laba11.create_many_json(self.filename, objects)
+
+    def update_many(self, updates):
+        return Laba11.update_many_json(self.filename, updates)
+
+    def delete_many(self, obj_ids):
+        return Laba11.delete_many_json(self.filename, obj_ids)
+
+
+class XmlFileBackend(StorageBackend):
+    def __init__(self, filename):
+        self.filename = filename
+
+    def create(self, obj):
+        Laba11.create_object_xml(self.filename, obj)
+
+    def read(self):
+        return Laba11.read_objects_xml(self.filename)
+
+    def update(self, obj_id, updated_obj):
+        return Laba11.update_object_xml(self.filename, obj_id, updated_obj)
+
+    def delete(self, obj_id):
+        return Laba11.delete_many_xml(self.filename, [obj_id])[obj_id]
+
+    def write_all(self, objects):
+        Laba11.save_to_xml(self.filename, objects)
+
+    def create_many(self, objects):
+        return Laba11.create_many_xml(self.filename, objects)
+
+    def update_many(self, updates):
+        return Laba11.update_many_xml(self.filename, updates)
+
+    def delete_many(self, obj_ids):
+        return Laba11.delete_many_xml(self.filename, obj_ids)
+
+
+class JsonLinesBackend(StorageBackend):
+    def __init__(self, filename):
+        self.filename = filename
+
+    def create(self, obj):
+        Laba11.create_object_jsonl(self.filename, obj)
+
+    def read(self):
+        return Laba11.read_objects_jsonl(self.filename)
+
+    def update(self, obj_id, updated_obj):
+        return Laba11.update_object_jsonl(self.filename, obj_id, updated_obj)
+
+    def delete(self, obj_id):
+        return Laba11.delete_object_jsonl(self.filename, obj_id)
+
+    def write_all(self, objects):
+        Laba11.save_to_jsonl(self.filename, objects)
+
+    def create_many(self, objects):
+        return Laba11.create_many_jsonl(self.filename, objects)
+
+    def update_many(self, updates):
+        return Laba11.update_many_jsonl(self.filename, updates)
+
+    def delete_many(self, obj_ids):
+        return Laba11.delete_many_jsonl(self.filename, obj_ids)
+
+
+# -------------------- SQLite --------------------
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT
+);
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    description TEXT,
+    price REAL,
+    category_id INTEGER REFERENCES categories(id)
+);
+CREATE INDEX IF NOT EXISTS products_category ON products(category_id);
+CREATE TABLE IF NOT EXISTS customers (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    email TEXT
+);
+CREATE INDEX IF NOT EXISTS customers_email ON customers(email);
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    customer_id INTEGER REFERENCES customers(id),
+    total_price REAL,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS orders_customer ON orders(customer_id);
+CREATE INDEX IF NOT EXISTS orders_status ON orders(status);
+CREATE TABLE IF NOT EXISTS order_items (
+    order_id INTEGER REFERENCES orders(id) ON DELETE CASCADE,
+    position INTEGER,
+    product_id INTEGER REFERENCES products(id),
+    quantity INTEGER,
+    PRIMARY KEY (order_id, position)
+);
+CREATE INDEX IF NOT EXISTS order_items_product ON order_items(product_id);
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    customer_id INTEGER REFERENCES customers(id),
+    product_id INTEGER REFERENCES products(id),
+    rating INTEGER,
+    comment TEXT
+);
+CREATE INDEX IF NOT EXISTS feedback_product ON feedback(product_id);
+CREATE TABLE IF NOT EXISTS wishlists (
+    id INTEGER PRIMARY KEY,
+    customer_id INTEGER REFERENCES customers(id)
+);
+CREATE TABLE IF NOT EXISTS wishlist_products (
+    wishlist_id INTEGER REFERENCES wishlists(id) ON DELETE CASCADE,
+    position INTEGER,
+    product_id INTEGER REFERENCES products(id),
+    PRIMARY KEY (wishlist_id, position)
+);
+CREATE TABLE IF NOT EXISTS inventory (
+    product_id INTEGER PRIMARY KEY REFERENCES products(id),
+    quantity INTEGER
+);
+"""
+
+UPSERT_CATEGORY = "INSERT INTO categories (id, name) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET name = excluded.name"
+UPSERT_PRODUCT = (
+    "INSERT INTO products (id, name, description, price, category_id) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET name = excluded.name, description = excluded.description, "
+    "price = excluded.price, category_id = excluded.category_id"
+)
+UPSERT_CUSTOMER = (
+    "INSERT INTO customers (id, name, email) VALUES (?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET name = excluded.name, email = excluded.email"
+)
+UPSERT_ORDER = (
+    "INSERT INTO orders (id, customer_id, total_price, status) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET customer_id = excluded.customer_id, "
+    "total_price = excluded.total_price, status = excluded.status"
+)
+INSERT_ORDER_ITEM = "INSERT INTO order_items (order_id, position, product_id, quantity) VALUES (?, ?, ?, ?)"
+INSERT_FEEDBACK = "INSERT INTO feedback (customer_id, product_id, rating, comment) VALUES (?, ?, ?, ?)"
+UPSERT_WISHLIST = (
+    "INSERT INTO wishlists (id, customer_id) VALUES (?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET customer_id = excluded.customer_id"
+)
+INSERT_WISHLIST_PRODUCT = "INSERT INTO wishlist_products (wishlist_id, position, product_id) VALUES (?, ?, ?)"
+UPSERT_INVENTORY = (
+    "INSERT INTO inventory (product_id, quantity) VALUES (?, ?) "
+    "ON CONFLICT(product_id) DO UPDATE SET quantity = excluded.quantity"
+)
+
+
+class SqliteBackend(StorageBackend):
+    """Хранилище в SQLite: сущности в индексированных таблицах, журнал WAL.
+
+    Order, Wishlist, Feedback и Inventory хранятся в своих таблицах и
+    ссылаются на товары, категории и клиентов по ID. Пакетные операции
+    выполняются одной транзакцией через executemany.
+    """
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # -------------------- Запись --------------------
+
+    def write_entities(self, objects):
+        """Upsert категорий, товаров и клиентов, на которые ссылаются объекты."""
+        identity = Laba11.IdentityMap()
+        for obj in objects:
+            if isinstance(obj, Laba11.Product):
+                identity.add_product(obj)
+            elif isinstance(obj, Laba11.Category):
+                identity.add_category(obj)
+            elif isinstance(obj, Laba11.Customer):
+                identity.add_customer(obj)
+            else:
+                obj.to_ref_json(identity)
+        cursor = self.connection.cursor()
+        cursor.executemany(UPSERT_CATEGORY, [(c.id, c.name) for c in identity.categories.values()])
+        cursor.executemany(UPSERT_PRODUCT, [
+            (p.id, p.name, p.description, p.price, p.category.id) for p in identity.products.values()
+        ])
+        cursor.executemany(UPSERT_CUSTOMER, [(c.id, c.name, c.email) for c in identity.customers.values()])
+
+    def write_objects(self, objects):
+        """Записать объекты и их связи (внутри уже открытой транзакции)."""
+        objects = list(objects)
+        self.write_entities(objects)
+        cursor = self.connection.cursor()
+        orders = [obj for obj in objects if isinstance(obj, Laba11.Order)]
+        wishlists = [obj for obj in objects if isinstance(obj, Laba11.Wishlist)]
+        if orders:
+            cursor.executemany("DELETE FROM order_items WHERE order_id = ?", [(o.id,) for o in orders])
+            cursor.executemany(UPSERT_ORDER, [(o.id, o.customer.id, o.total_price, o.status) for o in orders])
+            cursor.executemany(INSERT_ORDER_ITEM, [
+                (o.id, position, item.product.id, item.quantity)
+                for o in orders for position, item in enumerate(o.items)
+            ])
+        if wishlists:
+            cursor.executemany("DELETE FROM wishlist_products WHERE wishlist_id = ?", [(w.id,) for w in wishlists])
+            cursor.executemany(UPSERT_WISHLIST, [(w.id, w.customer.id) for w in wishlists])
+            cursor.executemany(INSERT_WISHLIST_PRODUCT, [
+                (w.id, position, product.id) for w in wishlists for position, product in enumerate(w.products)
+            ])
+        cursor.executemany(INSERT_FEEDBACK, [
+            (f.customer.id, f.product.id, f.rating, f.comment)
+            for f in objects if isinstance(f, Laba11.Feedback)
+        ])
+        cursor.executemany(UPSERT_INVENTORY, [
+            (i.product.id, i.quantity) for i in objects if isinstance(i, Laba11.Inventory)
+        ])
+
+    def create(self, obj):
+        with self.connection:
+            self.write_objects([obj])
+
+    def create_many(self, objects):
+        objects = list(objects)
+        with self.connection:
+            self.write_objects(objects)
+        return [True] * len(objects)
+
+    def existing_ids(self, obj_ids):
+        """ID из obj_ids, для которых есть заказ или список желаемого."""
+        found = set()
+        for obj_id in obj_ids:
+            row = self.connection.execute(
+                "SELECT 1 FROM orders WHERE id = ? UNION ALL SELECT 1 FROM wishlists WHERE id = ?",
+                (obj_id, obj_id)
+            ).fetchone()
+            if row is not None:
+                found.add(obj_id)
+        return found
+
+    def update(self, obj_id, updated_obj):
+        return self.update_many({obj_id: updated_obj})[obj_id]
+
+    def update_many(self, updates):
+        updates = Laba11.as_updates(updates)
+        with self.connection:
+            found = self.existing_ids(updates)
+            self.delete_ids([obj_id for obj_id in found if updates[obj_id].id != obj_id])
+            self.write_objects(updates[obj_id] for obj_id in found)
+        return {obj_id: obj_id in found for obj_id in updates}
+
+    def delete_ids(self, obj_ids):
+        params = [(obj_id,) for obj_id in obj_ids]
+        self.connection.executemany("DELETE FROM orders WHERE id = ?", params)
+        self.connection.executemany("DELETE FROM wishlists WHERE id = ?", params)
+
+    def delete(self, obj_id):
+        return self.delete_many([obj_id])[obj_id]
+
+    def delete_many(self, obj_ids):
+        obj_ids = set(obj_ids)
+        with self.connection:
+            found = self.existing_ids(obj_ids)
+            self.delete_ids(found)
+        return {obj_id: obj_id in found for obj_id in obj_ids}
+
+    def write_all(self, objects):
+        with self.connection:
+            for table in ("order_items", "orders", "wishlist_products", "wishlists", "feedback",
+                          "inventory", "products", "categories", "customers"):
+                self.connection.execute(f"DELETE FROM {table}")
+            self.write_objects(objects)
+
+    # -------------------- Чтение --------------------
+
+    def load_entities(self, products_sql=None, customers_sql=None, params=()):
+        """Карта идентичности с категориями, товарами и клиентами.
+
+        Без фильтров читаются все сущности; products_sql и customers_sql —
+        подзапросы, выбирающие ID нужных товаров и клиентов.
+        """
+        categories_where = products_where = customers_where = ""
+        if products_sql is not None:
+            products_where = f"WHERE id IN ({products_sql})"
+            categories_where = f"WHERE id IN (SELECT category_id FROM products {products_where})"
+            customers_where = f"WHERE id IN ({customers_sql})"
+        identity = Laba11.IdentityMap()
+        for row in self.connection.execute(f"SELECT id, name FROM categories {categories_where}", params):
+            identity.add_category(Laba11.Category(*row))
+        for id, name, description, price, category_id in self.connection.execute(
+                f"SELECT id, name, description, price, category_id FROM products {products_where}", params):
+            identity.add_product(Laba11.Product(id, name, description, price, identity.categories[category_id]))
+        for row in self.connection.execute(f"SELECT id, name, email FROM customers {customers_where}", params):
+            identity.add_customer(Laba11.Customer(*row))
+        return identity
+
+    def read_orders(self, identity, obj_id=None):
+        orders_where = items_where = ""
+        params = ()
+        if obj_id is not None:
+            orders_where, items_where, params = "WHERE id = ?", "WHERE order_id = ?", (obj_id,)
+        orders = {}
+        for id, customer_id, total_price, status in self.connection.execute(
+                f"SELECT id, customer_id, total_price, status FROM orders {orders_where} ORDER BY id", params):
+            orders[id] = Laba11.Order(id, identity.customers[customer_id], [], total_price, status)
+        for order_id, product_id, quantity in self.connection.execute(
+                f"SELECT order_id, product_id, quantity FROM order_items {items_where} "
+                "ORDER BY order_id, position", params):
+            orders[order_id].items.append(Laba11.OrderItem(identity.products[product_id], quantity))
+        return list(orders.values())
+
+    def read_wishlists(self, identity, obj_id=None):
+        wishlists_where = products_where = ""
+        params = ()
+        if obj_id is not None:
+            wishlists_where, products_where, params = "WHERE id = ?", "WHERE wishlist_id = ?", (obj_id,)
+        wishlists = {}
+        for id, customer_id in self.connection.execute(
+                f"SELECT id, customer_id FROM wishlists {wishlists_where} ORDER BY id", params):
+            wishlists[id] = Laba11.Wishlist(id, identity.customers[customer_id], [])
+        for wishlist_id, product_id in self.connection.execute(
+                f"SELECT wishlist_id, product_id FROM wishlist_products {products_where} "
+                "ORDER BY wishlist_id, position", params):
+            wishlists[wishlist_id].products.append(identity.products[product_id])
+        return list(wishlists.values())
+
+    def read(self):
+        identity = self.load_entities()
+        objects = self.read_orders(identity) + self.read_wishlists(identity)
+        for customer_id, product_id, rating, comment in self.connection.execute(
+                "SELECT customer_id, product_id, rating, comment FROM feedback ORDER BY id"):
+            objects.append(Laba11.Feedback(identity.customers[customer_id], identity.products[product_id],
+                                           rating, comment))
+        for product_id, quantity in self.connection.execute("SELECT product_id, quantity FROM inventory"):
+            objects.append(Laba11.Inventory(identity.products[product_id], quantity))
+        return objects
+
+    def get(self, obj_id):
+        """Прочитать один заказ или список желаемого по ID точечными индексными запросами."""
+        identity = self.load_entities(
+            "SELECT product_id FROM order_items WHERE order_id = ? "
+            "UNION SELECT product_id FROM wishlist_products WHERE wishlist_id = ?",
+            "SELECT customer_id FROM orders WHERE id = ? UNION SELECT customer_id FROM wishlists WHERE id = ?",
+            (obj_id, obj_id)
+        )
+        found = self.read_orders(identity, obj_id) or self.read_wishlists(identity, obj_id)
+        return found[0] if found else None
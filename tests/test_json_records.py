@@ -0,0 +1,39 @@
+"""Потоковый разбор JSON-массива в Laba11.iter_json_records."""
+import json
+import os
+import tempfile
+import unittest
+
+import Laba11
+
+
+class IterJsonRecordsTest(unittest.TestCase):
+    def records(self, text, chunk_size):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "records.json")
+            with open(filename, "w", encoding="utf-8") as file:
+                file.write(text)
+            return list(Laba11.iter_json_records(filename, chunk_size=chunk_size))
+
+    def test_chunk_size_one(self):
+        # Каждое число и строка разрезаны на границах кусков во всех позициях
+        texts = [
+            '[]',
+            ' [ 1.5 , -3e2 ,1.5E+3, 0, -0.25 ] ',
+            '[{"id": 1, "price": 12.5, "name": "Ноутбук"}, 7, true, null, "x"]',
+        ]
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertEqual(self.records(text, 1), json.loads(text))
+
+    def test_split_numbers(self):
+        self.assertEqual(self.records('[10.25, -3e2, 1.5E+3]', 1), [10.25, -300.0, 1500.0])
+        self.assertEqual(self.records('[123456789, 0.5]', 3), [123456789, 0.5])
+
+    def test_incomplete_number_raises(self):
+        with self.assertRaises(ValueError):
+            self.records('[1.]', 1)
+
+
+if __name__ == "__main__":
+    unittest.main()